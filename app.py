@@ -1,7 +1,6 @@
 import streamlit as st
 import math
 import pandas as pd
-from io import BytesIO
 import os
 hide_streamlit_style = """
             <style>
@@ -18,227 +17,78 @@ hide_streamlit_style = """
             """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # -------------------------------------------------------------------
-# 1. الثوابت العامة (Constants)
+# 1. الثوابت العامة والدوال المساعدة (من محرك التخطيط)
 # -------------------------------------------------------------------
-
-TOTAL_WORK_HOURS = 24
-SUPERVISORS_PER_SHIFT = 1 # مشرف فترة ثابت 1 لكل وردية
-ASSISTANT_HEADS_PER_SHIFT = 1
-DEFAULT_HEAD_ASSISTANT_RATIO = 1
-
-# تم تحديث: إضافة أدوار (مدير) و (اداري)
-DEFAULT_SALARY = {
-    "رئيس": 37000,
-    "مساعد رئيس": 30000,
-    "مشرف فترة": 25000, # تم التعديل
-    "مقدم خدمة": 8500,
-    "مدير": 20000,       # دور جديد
-    "اداري": 12000,      # دور جديد
-}
-
-# تعريف الإدارات
-DEPARTMENTS = {
-    "الضيافة": [], # يتم التعامل معها ديناميكياً
-    "الوصول والمغادرة": [
-        {"name": "استقبال الهجرة", "type": "Ratio", "default_ratio": 100, "default_coverage": 50, "default_criterion": 'Flow'},
-        {"name": "استقبال المطار", "type": "Ratio", "default_ratio": 100, "default_coverage": 50, "default_criterion": 'Flow'},
-        {"name": "استقبال القطار", "type": "Ratio", "default_ratio": 100, "default_coverage": 20, "default_criterion": 'Flow'},
-        {"name": "إرشاد الحافلات", "type": "Bus_Ratio", "default_ratio": 1, "default_criterion": 'Flow'},
-    ],
-    "الدعم والمساندة": [
-        {"name": "متابعة ميدانية", "type": "Ratio", "default_ratio": 200, "default_coverage": 100, "default_criterion": 'Flow'},
-        {"name": "الخدمات الميدانية والاسكان ", "type": "Ratio", "default_ratio": 200, "default_coverage": 100, "default_criterion": 'Present'},
-        {"name": "الزيارة وإرشاد التأهيين ", "type": "Ratio", "default_ratio": 200, "default_coverage": 100, "default_criterion": 'Flow'},
-        {"name": " الدعم والضيافة", "type": "Time", "default_time": 5.0, "default_coverage": 100, "default_criterion": 'Present'},
-        {"name": "الرعاية صحية", "type": "Ratio", "default_ratio": 1500, "default_coverage": 100, "default_criterion": 'Present'},
-    ],
-    # القسم الجديد - الإدارات المساندة (تم التعديل لتصبح جميعها Manual_HR)
-    "الإدارات المساندة": [
-        {"name": "الصيانة", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 1, "default_criterion": 'Present'},
-        {"name": "الدعم الفني", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 1, "default_criterion": 'Present'},
-        {"name": "الموارد البشرية", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 2, "default_criterion": 'Present'}, 
-        {"name": "الجودة", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 1, "default_criterion": 'Present'},
-        {"name": "السكرتارية", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 1, "default_criterion": 'Present'},
-        {"name": "التواصل المؤسسي", "type": "Manual_HR", "default_manager_count": 1, "default_admin_count": 1, "default_criterion": 'Present'},
-    ]
-}
-
-ALL_DEPARTMENTS_FLAT = {}
-for category, depts in DEPARTMENTS.items():
-    for dept in depts:
-        ALL_DEPARTMENTS_FLAT[dept['name']] = dept.copy()
-        ALL_DEPARTMENTS_FLAT[dept['name']]['category'] = category
-
-TRANSLATION_MAP = {
-    "Head": "رئيس",
-    "Assistant_Head": "مساعد رئيس",
-    "Field_Supervisor": "مشرف فترة",
-    "Service_Provider": "مقدم خدمة",
-}
+from engine import (
+    SUPERVISORS_PER_SHIFT,
+    DEFAULT_SALARY,
+    DEFAULT_HOSPITALITY_RATIO,
+    DEFAULT_CENTER_NAME,
+    SIDEBAR_DEFAULT_PARAMS,
+    QUEUE_TYPE,
+    QUEUE_ELIGIBLE_TYPES,
+    DEFAULT_QUEUE_SETTINGS,
+    TRANSLATION_MAP,
+    TOTAL_COLUMN,
+    calculate_time_based_staff,
+    calculate_ratio_based_staff,
+    distribute_staff,
+    read_global_params,
+    read_salaries,
+    plan_cost,
+    department_defaults,
+    Center,
+    IncrementalPlan,
+)
+from cache import PLAN_CACHE, cached_unified_plan
+from catalog import HOSPITALITY_CATEGORY, catalog_error, current_catalog
+from shared import SessionSettings, baseline, shared_version, warm_up
+from centers_io import (
+    CENTERS_PAGE_SIZES,
+    EDITOR_LABELS,
+    read_centers_file,
+    validate_centers,
+    build_centers,
+    centers_frame,
+    filter_centers,
+    apply_center_edits,
+    batch_update_centers,
+)
+from bus_schedule import read_schedule_file, bus_concurrency
+from scenarios import save_scenario, list_scenarios, load_inputs, delete_scenario, diff_scenarios
+from manifests import RECEPTION_DEPARTMENTS, aggregate_manifest, manifest_summary
+from timeline import INTRADAY_PROFILES, INTRADAY_PROFILE_LABELS, demand_timeline
+from profiling import PROFILE_ENABLED_DEFAULT, RerunProfiler
+from budget import CATEGORY_SALARIES_KEY, PROFILE_COLUMN, Budget
+from cashflow import (
+    DEFAULT_ACCRUAL_SETTINGS,
+    DEFAULT_WINDOW_DAYS,
+    CUMULATIVE_COST_COLUMN,
+    DAILY_COST_COLUMN,
+    AccrualSchedule,
+    cash_flow,
+    department_daily_costs,
+    read_accrual_settings,
+)
+from exports import cached_manpower_excel, cached_budget_excel, cached_plan_budget_excel, cached_vehicle_excel
+from sweep import SWEEP_PARAM_LABELS, parse_values, run_sweep
+from routing import DEFAULT_ROUTING_SETTINGS, read_sites_file, build_routes, vehicles_for_routes
+from fleet_simulation import DEFAULT_FLEET_SETTINGS, UTILIZATION_LABEL, MISSED_LABEL, TARGET_LABEL, fleet_curve
+from simulation import DISTRIBUTIONS, DEFAULT_DRAWS, PERCENTILES, HEADCOUNT_LABEL, COST_LABEL, run_monte_carlo
 
 # -------------------------------------------------------------------
 # 2. الدوال المساعدة 
 # -------------------------------------------------------------------
 
-def calculate_time_based_staff(total_events, time_per_event_min, service_days, staff_work_hours_day):
-    """تحسب الاحتياج بناءً على الوقت الإجمالي اللازم للخدمات مقارنة بالوقت الإجمالي المتاح من الموظفين."""
-    time_per_event_hrs = time_per_event_min / 60
-    total_hours_needed = total_events * time_per_event_hrs
-    total_staff_available_hours = service_days * staff_work_hours_day
-    basic_staff = math.ceil(total_hours_needed / total_staff_available_hours) if total_staff_available_hours > 0 else 0
-    return basic_staff
-
-def calculate_ratio_based_staff(num_units, ratio):
-    """تحسب الاحتياج بناءً على معيار النسبة (وحدة/موظف)."""
-    # math.ceil يضمن تقريب العدد لأعلى موظف صحيح
-    basic_staff = math.ceil(num_units / ratio)
-    return basic_staff
-
-# تم تعديل الدالة لحذف معايير النسبة وإلغاء التوسع في عدد المشرفين
-def distribute_staff(total_basic_staff, shifts, required_assistant_heads=0): 
-    """توزع القوى العاملة الأساسية على الهيكل القيادي الثابت."""
-    # في حالة Manual_HR، سيتم إرسال total_basic_staff = 0، لذا سيتم حساب القيادات فقط
-    service_provider = total_basic_staff
-    
-    if total_basic_staff == 0 and required_assistant_heads == 0:
-        head = 0
-        total_supervisors = 0
-        assistant_head = 0
-    else:
-        head = 1 # رئيس واحد لكل قسم
-        # مشرف فترة ثابت: 1 لكل وردية (SUPERVISORS_PER_SHIFT * shifts)
-        total_supervisors = SUPERVISORS_PER_SHIFT * shifts 
-        # مساعد رئيس بناءً على الإلزام لكل وردية
-        assistant_head = required_assistant_heads * shifts
-        
-    return {
-        "Head": head,
-        "Assistant_Head": assistant_head,
-        "Field_Supervisor": total_supervisors,
-        "Service_Provider": service_provider,
-    }
-
-def to_excel(df):
-    """تحويل DataFrame إلى ملف Excel في الذاكرة."""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=True, sheet_name='احتياج القوى العاملة')
-    processed_data = output.getvalue()
-    return processed_data
-
-# **تم تحديث الدالة لإنشاء جدول الميزانية التفصيلي حسب الإدارة**
-def generate_detailed_budget_excel(all_results, service_days, is_all_page=True, dept_name_single=None): 
-    """توليد بيانات الميزانية الإجمالية (تفاصيل الإدارات) أو الفردية."""
-    
-    detailed_budget_data = []
-    final_total_project_cost = 0 
-    
-    # قائمة الأدوار المرتبة كما في الثوابت
-    roles_order = list(DEFAULT_SALARY.keys())
-
-    if is_all_page:
-        # 1. تجهيز بيانات التفاصيل (الإدارة في الصفوف) للصفحة الموحدة
-        for entry in all_results:
-            dept_name = entry["الإدارة"]
-            
-            # نستخدم الأدوار المرتبة لضمان الترتيب في Excel
-            for role in roles_order:
-                # استخدام المفتاح المترجم والتحقق من وجوده
-                staff_count = entry.get(role, 0)
-                
-                if staff_count > 0:
-                    salary_or_reward = st.session_state.get(f'salary_{role}', DEFAULT_SALARY.get(role, 0))
-                    total_cost_per_role = staff_count * salary_or_reward
-                    final_total_project_cost += total_cost_per_role
-                    
-                    detailed_budget_data.append({
-                        "الإدارة": dept_name,
-                        "الرتبة الوظيفية": role,
-                        "العدد المطلوب": staff_count,
-                        "متوسط المكافأة (ريال)": salary_or_reward, 
-                        "التكلفة الإجمالية (ريال)": total_cost_per_role 
-                    })
-        
-        df_detailed_budget = pd.DataFrame(detailed_budget_data)
-        
-        # 2. تجهيز ملخص الإجمالي الكلي
-        total_staff_per_role = {}
-        for entry in detailed_budget_data:
-            role = entry["الرتبة الوظيفية"]
-            count = entry["العدد المطلوب"]
-            total_staff_per_role[role] = total_staff_per_role.get(role, 0) + count
-            
-        total_staff_count = sum(total_staff_per_role.values())
-        
-        # 3. كتابة الملف
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            # جدول التفاصيل
-            df_detailed_budget.to_excel(
-                writer, 
-                index=False, 
-                sheet_name='تفاصيل_ميزانية_الإدارات',
-                columns=["الإدارة", "الرتبة الوظيفية", "العدد المطلوب", "متوسط المكافأة (ريال)", "التكلفة الإجمالية (ريال)"]
-            ) 
-            
-            # جدول الملخص 
-            summary_data = {
-                "البيان": ["إجمالي تكلفة المكافآت (ريال)", "إجمالي الموظفين في الهيكل القيادي"],
-                "القيمة": [final_total_project_cost, total_staff_count]
-            }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, startrow=1, startcol=1, index=False, sheet_name='ملخص_الميزانية')
-            
-        return output.getvalue()
-    
-    else: # الصفحة الفردية
-        # 1. تجهيز بيانات التفاصيل (للإدارة الواحدة)
-        for role in roles_order:
-            staff_count = all_results.get(role, 0) # all_results is actually the translated_breakdown here
-            
-            if staff_count > 0:
-                salary_or_reward = st.session_state.get(f'salary_{role}', DEFAULT_SALARY.get(role, 0))
-                total_cost_per_role = staff_count * salary_or_reward
-                final_total_project_cost += total_cost_per_role
-                
-                detailed_budget_data.append({
-                    "الرتبة الوظيفية": role,
-                    "العدد المطلوب": staff_count,
-                    "متوسط المكافأة (ريال)": salary_or_reward, 
-                    "التكلفة الإجمالية (ريال)": total_cost_per_role 
-                })
-        
-        df_budget = pd.DataFrame(detailed_budget_data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_budget.to_excel(
-                writer, 
-                index=False, 
-                sheet_name=f'ميزانية_{dept_name_single}',
-                columns=["الرتبة الوظيفية", "العدد المطلوب", "متوسط المكافأة (ريال)", "التكلفة الإجمالية (ريال)"]
-            ) 
-        return output.getvalue()
-
-
-# تم تحديث الدالة to_excel_budget لتوجيه البيانات بشكل صحيح
-def to_excel_budget(data_for_budget, service_days, is_all_page=True, dept_name_single=None):
-    """نقطة دخول لتحويل بيانات الميزانية إلى Excel."""
-    return generate_detailed_budget_excel(data_for_budget, service_days, is_all_page, dept_name_single)
-
 def add_hospitality_center(is_default=False):
     """تضيف مركز ضيافة جديد (مع خيار لجعله الافتراضي)."""
     new_id = st.session_state.next_center_id
     # يتم سحب القيمة الافتراضية للحجاج من الإعدادات العامة
     default_hajjaj_count = st.session_state.get('num_hajjaj_present', 100000) 
     
-    name = 'مركز ضيافة 1 (افتراضي)' if is_default else f'مركز ضيافة #{new_id}'
+    name = DEFAULT_CENTER_NAME if is_default else f'مركز ضيافة #{new_id}'
     
-    new_center = {
-        'id': new_id,
-        'name': name,
-        'hajjaj_count': default_hajjaj_count,
-        'active': True
-    }
+    new_center = Center(new_id, name, default_hajjaj_count)
     st.session_state.dynamic_hospitality_centers.append(new_center)
     st.session_state.next_center_id += 1
 
@@ -252,6 +102,96 @@ def remove_hospitality_center(center_id_to_remove):
     if 'user_settings_all' in st.session_state and ratio_key in st.session_state['user_settings_all']:
         del st.session_state['user_settings_all'][ratio_key]
 
+def import_hospitality_centers(valid_centers, file_id, replace=False):
+    """استيراد مراكز ضيافة من ملف دفعة واحدة (عملية واحدة دون إعادة تشغيل لكل صف)."""
+    init_user_settings_all()
+    user_settings = st.session_state['user_settings_all']
+    
+    if replace:
+        for c in st.session_state.dynamic_hospitality_centers:
+            user_settings.pop(f"Hosp_Ratio_{c['id']}", None)
+        st.session_state.dynamic_hospitality_centers = []
+    
+    new_centers, new_ratios = build_centers(valid_centers, st.session_state.next_center_id)
+    st.session_state.dynamic_hospitality_centers.extend(new_centers)
+    user_settings.update(new_ratios)
+    st.session_state.next_center_id += len(new_centers)
+    st.session_state['centers_import_done'] = file_id
+
+def apply_centers_editor(page_ids, editor_key):
+    """تطبيق تعديلات جدول المراكز (الصفوف المعدلة فقط) ثم إعادة تهيئة المحرر."""
+    init_user_settings_all()
+    st.session_state.dynamic_hospitality_centers, st.session_state.next_center_id = apply_center_edits(
+        st.session_state.dynamic_hospitality_centers,
+        st.session_state['user_settings_all'],
+        page_ids,
+        st.session_state.get(editor_key, {}),
+        st.session_state.next_center_id,
+        default_count=st.session_state.get('num_hajjaj_present', 100000)
+    )
+    st.session_state['centers_editor_version'] += 1
+
+def batch_edit_centers(center_ids, field, value):
+    """تعديل جماعي لمراكز نتائج البحث الحالية."""
+    init_user_settings_all()
+    batch_update_centers(
+        st.session_state.dynamic_hospitality_centers, st.session_state['user_settings_all'], center_ids, field, value
+    )
+    st.session_state['centers_editor_version'] += 1
+
+def apply_manifest_flows(arrivals):
+    """اعتماد المتوسط اليومي من ملف الوصول كتدفق لإدارات الاستقبال الموجودة في الملف."""
+    init_user_settings_all()
+    user_settings = st.session_state['user_settings_all']
+    for dept, hourly in arrivals.items():
+        user_settings[dept]['manifest_flow'] = float(hourly.sum()) / (len(hourly) / 24)
+
+def clear_manifest_flows():
+    """إلغاء التدفق المعتمد من ملف الوصول والعودة للمعيار العام."""
+    init_user_settings_all()
+    for dept in RECEPTION_DEPARTMENTS:
+        st.session_state['user_settings_all'].get(dept, {}).pop('manifest_flow', None)
+
+def apply_bus_peaks(dept_name, peaks):
+    """اعتماد ذروات جدول الحافلات (موقع × وردية) لإدارة من نوع Bus_Ratio."""
+    init_user_settings_all()
+    st.session_state['user_settings_all'][dept_name]['bus_peaks'] = peaks
+
+def clear_bus_peaks(dept_name):
+    """العودة لعدد الحافلات المدخل يدوياً."""
+    init_user_settings_all()
+    st.session_state['user_settings_all'][dept_name].pop('bus_peaks', None)
+
+# بادئات مفاتيح حقول نموذج الاحتساب الموحد (تُحذف عند تحميل سيناريو حتى تُعرض قيمه بدلاً من القيم السابقة)
+ALL_FORM_WIDGET_PREFIXES = (
+    'all_queue_', 'all_asst_head_req_', 'all_crit_', 'all_cov_', 'all_ratio_', 'all_time_', 'all_mult_',
+    'all_bus_count_', 'all_bus_ratio_', 'all_manager_count_', 'all_admin_count_',
+)
+
+def restore_scenario(scenario_id):
+    """إعادة تحميل مدخلات سيناريو محفوظ (الإعدادات العامة والمكافآت والإدارات والمراكز) في الصفحة."""
+    inputs = load_inputs(scenario_id)
+    for key in [k for k in st.session_state if str(k).startswith(ALL_FORM_WIDGET_PREFIXES)]:
+        del st.session_state[key]
+    st.session_state.update(inputs['global_params'])
+    for role, salary in inputs['salaries'].items():
+        st.session_state[f'salary_{role}'] = salary
+    st.session_state['user_settings_all'] = SessionSettings(inputs['user_settings'])
+    st.session_state.dynamic_hospitality_centers = [Center(**c) for c in inputs['centers']]
+    st.session_state.next_center_id = max([c['id'] for c in inputs['centers']], default=0) + 1
+    st.session_state['centers_editor_version'] = st.session_state.get('centers_editor_version', 0) + 1
+    st.session_state['run_calculation_all'] = True
+
+def remove_scenario(scenario_id):
+    delete_scenario(scenario_id)
+
+
+def init_user_settings_all():
+    """تهيئة إعدادات الصفحة الموحدة (user_settings_all) بالقيم الافتراضية لجميع الأقسام."""
+    if 'user_settings_all' not in st.session_state:
+        # الإعدادات الافتراضية مشتركة بين الجلسات، والجلسة تحتفظ بتعديلاتها فقط
+        st.session_state['user_settings_all'] = SessionSettings()
+
 
 def switch_to_main():
     """التبديل إلى صفحة الاحتساب الفردي."""
@@ -268,6 +208,18 @@ def switch_to_vehicles():
     st.session_state['current_page'] = 'vehicles'
     st.session_state['run_calculation_vehicles'] = False
 
+def switch_to_sweep():
+    """التبديل إلى صفحة مقارنة السيناريوهات."""
+    st.session_state['current_page'] = 'sweep'
+
+def switch_to_simulation():
+    """التبديل إلى صفحة محاكاة عدم اليقين."""
+    st.session_state['current_page'] = 'simulation'
+
+def switch_to_timeline():
+    """التبديل إلى صفحة الاحتياج على مدار الساعة."""
+    st.session_state['current_page'] = 'timeline'
+
 def switch_to_landing():
     """التبديل إلى صفحة البداية."""
     st.session_state['current_page'] = 'landing'
@@ -312,6 +264,41 @@ def landing_page():
             type="secondary"
         )
 
+    col4, col5, col6 = st.columns(3)
+
+    # NEW: مقارنة السيناريوهات
+    with col4:
+        st.info("🧮 **مقارنة السيناريوهات**")
+        st.markdown("يسمح لك هذا الوضع بتقييم **عدة تركيبات من المعايير** دفعة واحدة ومقارنة الاحتياج والميزانية.")
+        st.button(
+            "⬅️ الانتقال إلى مقارنة السيناريوهات",
+            on_click=switch_to_sweep,
+            use_container_width=True,
+            type="secondary"
+        )
+
+    # NEW: محاكاة عدم اليقين
+    with col5:
+        st.success("🎲 **محاكاة عدم اليقين**")
+        st.markdown("يسمح لك هذا الوضع بمحاكاة **عدم اليقين في أعداد الحجاج** وعرض المئينات P50/P90/P99 للاحتياج والتكلفة.")
+        st.button(
+            "⬅️ الانتقال إلى محاكاة عدم اليقين",
+            on_click=switch_to_simulation,
+            use_container_width=True,
+            type="secondary"
+        )
+
+    # NEW: الاحتياج على مدار الساعة
+    with col6:
+        st.warning("🕒 **الاحتياج على مدار الساعة**")
+        st.markdown("يسمح لك هذا الوضع بحساب الاحتياج **لكل ساعة** من منحنيات التواجد والتدفق، وعرض الذروة واحتياج كل وردية.")
+        st.button(
+            "⬅️ الانتقال إلى الاحتياج بالساعة",
+            on_click=switch_to_timeline,
+            use_container_width=True,
+            type="secondary"
+        )
+
     st.markdown("---")
     st.subheader("إعدادات النظام العامة (في الشريط الجانبي)")
     st.info("يمكنك تعديل بيانات الحجاج ومدة الخدمة ومتوسط المكافآت من الشريط الجانبي الأيمن.")
@@ -335,7 +322,8 @@ def main_page_logic():
     shifts_count = st.session_state.get('shifts_count', 3)
     
     # تحديد القسم والإدارة الفرعية
-    department_categories = list(DEPARTMENTS.keys())
+    catalog = current_catalog()
+    department_categories = list(catalog.categories)
     
     selected_category = st.selectbox(
         "اختر القسم الرئيسي",
@@ -343,10 +331,9 @@ def main_page_logic():
         key='main_category_select'
     )
     
-    department_list = DEPARTMENTS.get(selected_category, [])
-    department_names = [d['name'] for d in department_list]
+    department_names = [d['name'] for d in catalog.categories.get(selected_category, ())]
     
-    if selected_category == "الضيافة":
+    if selected_category == HOSPITALITY_CATEGORY:
         st.error("الضيافة يتم احتسابها فقط ضمن نموذج الاحتساب الموحد نظراً لطبيعتها الديناميكية.")
         return
 
@@ -361,7 +348,7 @@ def main_page_logic():
     )
 
     # جلب الإعدادات الافتراضية
-    dept_info = next(d for d in department_list if d['name'] == selected_department_name)
+    dept_info = catalog.by_name[selected_department_name]
     dept_type = dept_info['type']
     
     # تهيئة إعدادات الحالة الخاصة بالصفحة الفردية
@@ -369,18 +356,8 @@ def main_page_logic():
         st.session_state['user_settings_main'] = {}
 
     if selected_department_name not in st.session_state['user_settings_main']:
-        st.session_state['user_settings_main'][selected_department_name] = {
-            'criterion': dept_info.get('default_criterion', 'Present'),
-            'coverage': dept_info.get('default_coverage', 100) / 100,
-            'ratio': dept_info.get('default_ratio', 1),
-            'time': dept_info.get('default_time', 1),
-            'bus_count': 100,
-            'events_multiplier': 2,
-            # (التعديل 2): القيمة الافتراضية لمساعد رئيس هي 0 للإدارات المساندة
-            'required_assistant_heads': 0 if selected_category == "الإدارات المساندة" else 0,
-            'manager_count': dept_info.get('default_manager_count', 1), 
-            'admin_count': dept_info.get('default_admin_count', 2), 
-        }
+        # (التعديل 2): القيمة الافتراضية لمساعد رئيس هي 0 (إلزامي للإدارات المساندة)
+        st.session_state['user_settings_main'][selected_department_name] = department_defaults(dept_info)
         
     settings = st.session_state['user_settings_main'][selected_department_name]
 
@@ -534,11 +511,8 @@ def main_page_logic():
             if 'مقدم خدمة' in translated_breakdown:
                 del translated_breakdown['مقدم خدمة']
         
-        # **حساب الميزانية للإدارة الفردية**
-        total_project_cost_main = 0
-        for role, staff_count in translated_breakdown.items():
-            salary_or_reward = st.session_state.get(f'salary_{role}', DEFAULT_SALARY.get(role, 0))
-            total_project_cost_main += staff_count * salary_or_reward
+        # **حساب الميزانية للإدارة الفردية** (متجه الأعداد × متجه المكافآت)
+        total_project_cost_main = plan_cost(translated_breakdown, read_salaries(st.session_state))
         
         st.subheader("2. نتائج الاحتياج الفردي")
         
@@ -573,33 +547,42 @@ def main_page_logic():
         st.info(f"مقدم الخدمة الأساسي (بدون قيادة): **{res_basic}**")
 
         # **تخزين البيانات في session_state لتجنب إعادة الاحتساب عند التحميل**
-        st.session_state['last_main_df'] = results_df.copy()
+        st.session_state['last_main_df'] = results_df
         st.session_state['last_main_budget_data'] = translated_breakdown
         st.session_state['last_main_dept_name'] = selected_department_name
 
     # **منطق التحميل - يستخدم البيانات المخزنة**
     if 'last_main_df' in st.session_state and 'last_main_budget_data' in st.session_state:
         
+        # البيانات تُلتقط الآن، وملف Excel لا يُولَّد إلا عند الضغط على زر التحميل
+        last_main_df = st.session_state['last_main_df']
+        last_main_budget_data = st.session_state['last_main_budget_data']
+        last_main_dept_name = st.session_state['last_main_dept_name']
+        salaries = read_salaries(st.session_state)
+        accrual = read_accrual_settings(st.session_state)
+        
         def download_main_manpower():
             # دالة مساعدة للحصول على بيانات القوى العاملة
-            df_to_excel = st.session_state['last_main_df'].copy()
+            df_to_excel = last_main_df.copy()
             df_to_excel.columns.name = "الإدارة"
-            return to_excel(df_to_excel)
+            return cached_manpower_excel(df_to_excel)
             
         def download_main_budget():
             # دالة مساعدة للحصول على بيانات الميزانية
-            return to_excel_budget(
-                st.session_state['last_main_budget_data'], 
+            return cached_budget_excel(
+                last_main_budget_data, 
                 service_days, 
                 is_all_page=False, 
-                dept_name_single=st.session_state['last_main_dept_name']
+                dept_name_single=last_main_dept_name,
+                salaries=salaries,
+                accrual=accrual
             )
 
         col_download1, col_download2 = st.columns(2)
         
         col_download1.download_button(
             label="⬇️ تحميل جدول الاحتياج (Excel)",
-            data=download_main_manpower(), # Call the helper function
+            data=download_main_manpower, # يتم التوليد عند الضغط فقط
             file_name=f"احتياج_القوى_العاملة_فردي_{st.session_state['last_main_dept_name']}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
@@ -607,7 +590,7 @@ def main_page_logic():
         
         col_download2.download_button(
             label="⬇️ تحميل تفاصيل الميزانية (Excel)",
-            data=download_main_budget(), # Call the helper function
+            data=download_main_budget, # يتم التوليد عند الضغط فقط
             file_name=f"ميزانية_فردي_{st.session_state['last_main_dept_name']}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
@@ -617,108 +600,252 @@ def main_page_logic():
 # -------------------------------------------------------------------
 # 5. منطق الصفحة الموحدة (All Page Logic) - (لم يتغير)
 # -------------------------------------------------------------------
-def all_page_logic():
-    st.markdown("---")
-    
-    # جلب الإعدادات العامة
-    hajjaj_present = st.session_state.get('num_hajjaj_present', 15000)
-    hajjaj_flow = st.session_state.get('num_hajjaj_flow', 6000)
-    service_days = st.session_state.get('service_days', 8)
-    staff_work_hours_day = st.session_state.get('staff_hours', 8)
-    reserve_factor = st.session_state.get('reserve_factor_input', 0) / 100
-    shifts_count = st.session_state.get('shifts_count', 3)
-    
-    hajjaj_data = {'Present': hajjaj_present, 'Flow': hajjaj_flow}
-    
-    if 'user_settings_all' not in st.session_state:
-        st.session_state['user_settings_all'] = {}
-        # تهيئة الإعدادات الافتراضية لجميع الأقسام
-        for dept_name, dept_info in ALL_DEPARTMENTS_FLAT.items():
-             if dept_info['category'] != "الضيافة":
-                # (التعديل 2): إلزامي أن يكون مساعد الرئيس 0 للإدارات المساندة عند التهيئة
-                required_assistant_heads = 0 if dept_info['category'] == "الإدارات المساندة" else 0
-                
-                st.session_state['user_settings_all'][dept_name] = {
-                    'criterion': dept_info.get('default_criterion', 'Present'),
-                    'coverage': dept_info.get('default_coverage', 100) / 100,
-                    'ratio': dept_info.get('default_ratio', 1),
-                    'time': dept_info.get('default_time', 1),
-                    'bus_count': 100,
-                    'events_multiplier': 2,
-                    'required_assistant_heads': required_assistant_heads,
-                    'manager_count': dept_info.get('default_manager_count', 1), 
-                    'admin_count': dept_info.get('default_admin_count', 2), 
-                }
-    
-    user_settings = st.session_state['user_settings_all']
-    
+def queue_model_widgets(settings, key_suffix):
+    """إعدادات نموذج الطوابير (Erlang-C) للإدارة داخل نموذج الصفحة الموحدة."""
+    with st.expander("⏱️ نموذج الطوابير (Erlang-C)"):
+        use_queue = st.checkbox(
+            "تحديد العدد حسب مستوى الخدمة بدلاً من المعيار",
+            value=settings.get('staffing_model') == QUEUE_TYPE,
+            key=f"all_queue_model_{key_suffix}"
+        )
+        requests_val = st.number_input(
+            "عدد الطلبات لكل حاج يومياً",
+            min_value=0.0, value=float(settings.get('queue_requests', DEFAULT_QUEUE_SETTINGS['queue_requests'])), step=0.1,
+            key=f"all_queue_requests_{key_suffix}"
+        )
+        handle_time_val = st.number_input(
+            "متوسط زمن الخدمة (دقيقة)",
+            min_value=0.1, value=float(settings.get('queue_handle_time', DEFAULT_QUEUE_SETTINGS['queue_handle_time'])), step=0.5,
+            key=f"all_queue_handle_{key_suffix}"
+        )
+        level_val = st.number_input(
+            "مستوى الخدمة المستهدف (%)",
+            min_value=1, max_value=99, value=int(round(settings.get('queue_service_level', DEFAULT_QUEUE_SETTINGS['queue_service_level']) * 100)), step=1,
+            key=f"all_queue_level_{key_suffix}"
+        )
+        wait_val = st.number_input(
+            "خلال زمن انتظار (دقيقة)",
+            min_value=0.0, value=float(settings.get('queue_target_wait', DEFAULT_QUEUE_SETTINGS['queue_target_wait'])), step=0.5,
+            key=f"all_queue_wait_{key_suffix}"
+        )
+    settings['staffing_model'] = QUEUE_TYPE if use_queue else None
+    settings['queue_requests'] = requests_val
+    settings['queue_handle_time'] = handle_time_val
+    settings['queue_service_level'] = level_val / 100
+    settings['queue_target_wait'] = wait_val
+
+def hospitality_centers_section(user_settings):
+    """قسم مراكز الضيافة: الإضافة والاستيراد وجدول التحرير. تعيد المراكز المفعلة."""
     st.subheader(" مراكز الضيافة")
     
     # --- إدارة مراكز الضيافة ---
     col_h1, col_h2 = st.columns([0.8, 0.2])
     col_h2.button("➕ إضافة مركز ضيافة", on_click=add_hospitality_center, use_container_width=True)
     
-    active_centers = [c for c in st.session_state.dynamic_hospitality_centers[:] if c['active']]
-    
-    if active_centers:
-        for center in active_centers:
-            center_id = center['id']
-            center_name_key = f"hosp_name_{center_id}"
+    # --- استيراد المراكز من ملف ---
+    with st.expander("📥 استيراد مراكز الضيافة من ملف (CSV / Excel)"):
+        st.caption("الأعمدة المطلوبة: اسم المركز، عدد الحجاج، والمعيار (حاج/موظف) اختياري بقيمة افتراضية 200.")
+        uploaded_file = st.file_uploader("ملف المراكز", type=['csv', 'xlsx', 'xls'], key='centers_import_file')
+        
+        if uploaded_file is not None:
+            # التحقق من الملف مرة واحدة فقط لكل ملف مرفوع
+            preview = st.session_state.get('centers_import_preview')
+            if preview is None or preview['file_id'] != uploaded_file.file_id:
+                try:
+                    valid_centers, rejected_rows = validate_centers(read_centers_file(uploaded_file, uploaded_file.name))
+                    preview = {'file_id': uploaded_file.file_id, 'valid': valid_centers, 'errors': rejected_rows}
+                except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                    st.error(f"⚠️ تعذر قراءة الملف: {e}")
+                    preview = None
+                st.session_state['centers_import_preview'] = preview
             
-            with st.container(border=True):
-                col_name, col_count, col_remove = st.columns([0.4, 0.4, 0.2])
-                
-                # إدخال اسم المركز
-                new_name = col_name.text_input(
-                    "اسم مركز الضيافة",
-                    value=center['name'],
-                    key=center_name_key
-                )
-                center['name'] = new_name
-                
-                # إدخال عدد الحجاج الكلي للمركز
-                new_count = col_count.number_input(
-                    "عدد الحجاج الكلي (للمركز)",
-                    min_value=1,
-                    value=center['hajjaj_count'],
-                    step=1000,
-                    key=f"hosp_count_{center_id}"
-                )
-                center['hajjaj_count'] = new_count
-                
-                col_remove.markdown("<br>", unsafe_allow_html=True) # تباعد
-                col_remove.button(
-                    "🗑️ إزالة", 
-                    on_click=remove_hospitality_center, 
-                    args=(center_id,), 
-                    key=f"hosp_remove_{center_id}"
-                )
+            if preview is not None:
+                if st.session_state.get('centers_import_done') == uploaded_file.file_id:
+                    st.success(f"✅ تم استيراد {len(preview['valid'])} مركز ضيافة.")
+                else:
+                    st.info(f"صالح للاستيراد: **{len(preview['valid'])}** مركز — مرفوض: **{len(preview['errors'])}** صف")
+                    if not preview['errors'].empty:
+                        st.dataframe(preview['errors'].head(1000), use_container_width=True, hide_index=True)
+                    replace_existing = st.checkbox("استبدال المراكز الحالية بدلاً من الإضافة إليها", key='centers_import_replace')
+                    st.button(
+                        "📥 استيراد المراكز الصالحة",
+                        on_click=import_hospitality_centers,
+                        args=(preview['valid'], preview['file_id'], replace_existing),
+                        disabled=preview['valid'].empty,
+                        type="primary"
+                    )
+    
+    # --- جدول المراكز (بحث + صفحات + تعديل جماعي) ---
+    # جدول واحد بدلاً من عناصر إدخال لكل مركز، ولا يُكتب إلى الحالة إلا ما تم تعديله
+    centers_table = centers_frame(st.session_state.dynamic_hospitality_centers, user_settings)
+    active_centers = [c for c in st.session_state.dynamic_hospitality_centers if c['active']]
+    
+    if not centers_table.empty:
+        col_search, col_size, col_page = st.columns([0.5, 0.25, 0.25])
+        search_query = col_search.text_input("🔍 بحث باسم المركز", key='centers_search')
+        page_size = col_size.selectbox("عدد الصفوف في الصفحة", CENTERS_PAGE_SIZES, index=1, key='centers_page_size')
+        
+        filtered_centers = filter_centers(centers_table, search_query)
+        n_pages = max(1, math.ceil(len(filtered_centers) / page_size))
+        if st.session_state.get('centers_page', 1) > n_pages:
+            st.session_state['centers_page'] = n_pages
+        page = col_page.number_input("الصفحة", min_value=1, max_value=n_pages, value=1, step=1, key='centers_page')
+        
+        page_frame = filtered_centers.iloc[(page - 1) * page_size: page * page_size]
+        editor_key = f"centers_editor_{st.session_state['centers_editor_version']}"
+        st.data_editor(
+            page_frame.reset_index(drop=True), # المعرفات تُمرر للدالة بترتيب الصفوف
+            key=editor_key,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'name': st.column_config.TextColumn(EDITOR_LABELS['name'], required=True),
+                'hajjaj_count': st.column_config.NumberColumn(EDITOR_LABELS['hajjaj_count'], min_value=1, step=1, format="%d"),
+                'ratio': st.column_config.NumberColumn(EDITOR_LABELS['ratio'], min_value=1, step=1, format="%d"),
+                'active': st.column_config.CheckboxColumn(EDITOR_LABELS['active'], default=True),
+            },
+            on_change=apply_centers_editor,
+            args=(list(page_frame.index), editor_key)
+        )
+        st.caption(
+            f"الصفحة {page} من {n_pages} — {len(filtered_centers):,} مركز مطابق من أصل {len(centers_table):,}"
+            f" | المراكز المفعلة: {len(active_centers):,} | إجمالي حجاجها: {sum(c['hajjaj_count'] for c in active_centers):,}"
+        )
+        
+        with st.expander(f"✏️ تعديل جماعي لنتائج البحث ({len(filtered_centers):,} مركز)"):
+            col_b1, col_b2, col_b3 = st.columns([0.4, 0.35, 0.25])
+            batch_field = col_b1.selectbox(
+                "الحقل", ['hajjaj_count', 'ratio'], format_func=EDITOR_LABELS.get, key='centers_batch_field'
+            )
+            batch_value = col_b2.number_input("القيمة الجديدة", min_value=1, value=DEFAULT_HOSPITALITY_RATIO, step=1, key='centers_batch_value')
+            col_b3.markdown("<br>", unsafe_allow_html=True) # تباعد
+            col_b3.button(
+                "تطبيق",
+                on_click=batch_edit_centers,
+                args=(list(filtered_centers.index), batch_field, batch_value),
+                disabled=filtered_centers.empty,
+                use_container_width=True
+            )
     else:
         st.info("لا توجد مراكز ضيافة مُضافة بعد.")
+    return active_centers
+
+def arrival_manifest_section(service_days):
+    """قسم ملف الوصول: تجميع الرحلات بالساعة على دفعات واعتماد المتوسط اليومي لإدارات الاستقبال."""
+    with st.expander("🛬 بيانات الوصول (رحلات / قطارات / منافذ برية)"):
+        st.caption(
+            "ملف CSV بصف لكل رحلة أو راكب: وقت الوصول (إلزامي)، عدد الركاب، والمنفذ (مطار / قطار / بري). "
+            "يُقرأ الملف على دفعات لذلك يمكن أن يحتوي ملايين الصفوف."
+        )
+        uploaded_file = st.file_uploader("ملف الوصول", type=['csv'], key='manifest_file')
+        col_m1, col_m2 = st.columns(2)
+        default_dept = col_m1.selectbox(
+            "الإدارة عند عدم وجود عمود المنفذ", RECEPTION_DEPARTMENTS, key='manifest_default_dept'
+        )
+        start_date = col_m2.date_input("بداية مدة الخدمة (فارغ = أول يوم في الملف)", value=None, key='manifest_start_date')
+        
+        if st.button("📊 تجميع الملف بالساعة", disabled=uploaded_file is None, key='manifest_aggregate'):
+            try:
+                with st.spinner("⏳ جاري قراءة ملف الوصول..."):
+                    st.session_state['manifest_arrivals'] = aggregate_manifest(
+                        uploaded_file, service_days, start_date=start_date, default_department=default_dept
+                    )
+            except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                st.error(f"⚠️ تعذر قراءة الملف: {e}")
+        
+        manifest = st.session_state.get('manifest_arrivals')
+        if manifest is not None:
+            st.info(
+                f"الصفوف: **{manifest['rows']:,}** — الصالحة: **{manifest['valid_rows']:,}** — "
+                f"منفذ غير معروف: **{manifest['unmatched_rows']:,}** — "
+                f"الركاب خارج مدة الخدمة: **{int(manifest['outside_window']):,}**"
+            )
+            if manifest['arrivals']:
+                st.dataframe(manifest_summary(manifest['arrivals'], manifest['start']), use_container_width=True)
+                chart = pd.DataFrame(manifest['arrivals'])
+                chart.index = manifest['start'] + pd.to_timedelta(chart.index, unit='h')
+                st.line_chart(chart)
+            col_a1, col_a2 = st.columns(2)
+            col_a1.button(
+                "✅ اعتماد المتوسط اليومي لإدارات الاستقبال",
+                on_click=apply_manifest_flows,
+                args=(manifest['arrivals'],),
+                disabled=not manifest['arrivals'],
+                use_container_width=True
+            )
+            col_a2.button("↩️ العودة للمعيار العام", on_click=clear_manifest_flows, use_container_width=True)
+
+def bus_schedule_section(shifts):
+    """قسم جدول الحافلات: أعلى تزامن لكل موقع ووردية (خط المسح) واعتماده لإدارات Bus_Ratio."""
+    bus_depts = current_catalog().of_types('Bus_Ratio')
+    with st.expander("🚌 جدول الحافلات (وقت الوصول والمغادرة لكل حافلة)"):
+        st.caption(
+            "ملف CSV / Excel بصف لكل رحلة: وقت الوصول، وقت المغادرة، والموقع (اختياري). "
+            "يُحسب أعلى عدد حافلات متزامنة في كل موقع وكل وردية، ويُحدد المرشدون منه بدلاً من العدد اليومي."
+        )
+        uploaded_file = st.file_uploader("جدول الحافلات", type=['csv', 'xlsx', 'xls'], key='bus_schedule_file')
+        
+        if uploaded_file is not None:
+            results = st.session_state.get('bus_schedule_results')
+            if results is None or results['file_id'] != uploaded_file.file_id or results['shifts'] != shifts:
+                try:
+                    with st.spinner("⏳ جاري تحليل جدول الحافلات..."):
+                        results = bus_concurrency(read_schedule_file(uploaded_file, uploaded_file.name), shifts)
+                    results.update(file_id=uploaded_file.file_id, shifts=shifts)
+                except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                    st.error(f"⚠️ تعذر قراءة الملف: {e}")
+                    results = None
+                st.session_state['bus_schedule_results'] = results
+            
+            if results is not None:
+                st.info(f"الرحلات الصالحة: **{results['trips']:,}** — المرفوضة (وقت غير صالح أو مغادرة قبل الوصول): **{results['invalid_rows']:,}**")
+                col_s1, col_s2 = st.columns(2)
+                col_s1.dataframe(results['by_location'], use_container_width=True)
+                col_s2.dataframe(results['by_shift'], use_container_width=True)
+                col_d1, col_d2, col_d3 = st.columns([0.4, 0.3, 0.3])
+                dept_name = col_d1.selectbox("الإدارة", bus_depts, key='bus_schedule_dept')
+                col_d2.button(
+                    "✅ اعتماد الذروات",
+                    on_click=apply_bus_peaks,
+                    args=(dept_name, results['peaks'].ravel().tolist()),
+                    disabled=results['trips'] == 0,
+                    use_container_width=True
+                )
+                col_d3.button("↩️ العدد اليدوي", on_click=clear_bus_peaks, args=(dept_name,), use_container_width=True)
+
+
+def all_page_logic():
+    st.markdown("---")
+    
+    # جلب الإعدادات العامة
+    global_params = read_global_params(st.session_state)
+    service_days = global_params['service_days']
+    reserve_factor = global_params['reserve_factor_input'] / 100
+    
+    init_user_settings_all()
+    user_settings = st.session_state['user_settings_all']
+    profiler = st.session_state['rerun_profiler']
+    catalog = current_catalog()
+    if catalog_error():
+        st.warning(f"⚠️ تعذر إعادة تحميل دليل الإدارات، ويُستخدم آخر إصدار صالح منه: {catalog_error()}")
+    
+    with profiler.span("all:centers_editor"):
+        active_centers = hospitality_centers_section(user_settings)
+    arrival_manifest_section(service_days)
+    bus_schedule_section(global_params['shifts_count'])
 
     st.markdown("---")
     
     # --- نموذج الاحتساب الموحد (لجمع مدخلات النسب والمعايير) ---
-    with st.form("all_dept_criteria_form"):
+    with profiler.span("all:criteria_form"), st.form("all_dept_criteria_form"):
         # --- 1. نسبة الضيافة (داخل النموذج) ---
         with st.container(border=True):
             st.markdown("#### معيار نسبة مقدمي الخدمة لمراكز الضيافة ")
-            active_centers = [c for c in st.session_state.dynamic_hospitality_centers[:] if c['active']]
             if not active_centers:
                 st.warning("يجب تفعيل مركز ضيافة واحد على الأقل لحساب النسبة.")
-            
-            for center in active_centers:
-                center_id = center['id']
-                ratio_key = f"Hosp_Ratio_{center_id}"
-                default_ratio = user_settings.get(ratio_key, 200)
-                
-                new_ratio = st.number_input(
-                    f"المعيار (حاج/موظف) لـ **{center['name']}**",
-                    min_value=1,
-                    value=default_ratio,
-                    key=f"hosp_ratio_{center_id}"
-                )
-                user_settings[ratio_key] = new_ratio
+            else:
+                st.caption(f"يتم تعديل معيار كل مركز من عمود «{EDITOR_LABELS['ratio']}» في جدول المراكز أعلاه.")
             st.markdown("---")
 
 
@@ -726,7 +853,7 @@ def all_page_logic():
         with st.container(border=True): # الإطار الثاني
             st.markdown("#### 🏷️ الوصول والمغادرة")
             st.markdown("---")
-            depts = DEPARTMENTS["الوصول والمغادرة"]
+            depts = catalog.categories.get("الوصول والمغادرة", ())
             cols = st.columns(3)
             col_index = 0
             
@@ -738,15 +865,7 @@ def all_page_logic():
                 
                 # تهيئة الإعدادات الافتراضية
                 if name not in user_settings:
-                    user_settings[name] = {
-                        'criterion': dept.get('default_criterion', 'Present'),
-                        'coverage': dept.get('default_coverage', 100) / 100,
-                        'ratio': dept.get('default_ratio', 1),
-                        'time': dept.get('default_time', 1),
-                        'bus_count': 100,
-                        'events_multiplier': 2,
-                        'required_assistant_heads': 0
-                    }
+                    user_settings[name] = department_defaults(dept)
                 
                 with col.container(border=True):
                     st.markdown(f"***_{name}_***")
@@ -785,6 +904,8 @@ def all_page_logic():
                     elif dept_type == 'Bus_Ratio':
                         bus_count_val = st.number_input("عدد الحافلات المتوقع", min_value=1, value=user_settings[name]['bus_count'], key=f"all_bus_count_{name}_{i}")
                         bus_ratio_val = st.number_input("المعيار (حافلة/موظف)", min_value=1, value=user_settings[name]['ratio'], key=f"all_bus_ratio_{name}_{i}")
+                        if user_settings[name].get('bus_peaks'):
+                            st.caption(f"🚌 من جدول الحافلات: مجموع ذروات المواقع والورديات {sum(user_settings[name]['bus_peaks']):,} حافلة (بدلاً من العدد المتوقع)")
                         
                     # تحديث الإعدادات
                     user_settings[name]['required_assistant_heads'] = asst_head_req_val
@@ -799,13 +920,19 @@ def all_page_logic():
                     elif dept_type == 'Bus_Ratio':
                         user_settings[name]['bus_count'] = bus_count_val
                         user_settings[name]['ratio'] = bus_ratio_val
+                    
+                    if dept_type in QUEUE_ELIGIBLE_TYPES:
+                        queue_model_widgets(user_settings[name], f"{name}_{i}")
+                    
+                    if 'manifest_flow' in user_settings[name]:
+                        st.caption(f"🛬 التدفق من ملف الوصول: {user_settings[name]['manifest_flow']:,.0f} حاج/يوم (يُطبق عند معيار التدفق)")
 
 
         # --- 3. قسم الدعم والمساندة ---
         with st.container(border=True):
             st.markdown("#### 🛠️ الدعم والمساندة")
             st.markdown("---")
-            depts = DEPARTMENTS["الدعم والمساندة"]
+            depts = catalog.categories.get("الدعم والمساندة", ())
             cols = st.columns(3)
             col_index = 0
             suffix_support = "_support"
@@ -818,15 +945,7 @@ def all_page_logic():
                 
                 # تهيئة الإعدادات الافتراضية
                 if name not in user_settings:
-                    user_settings[name] = {
-                        'criterion': dept.get('default_criterion', 'Present'),
-                        'coverage': dept.get('default_coverage', 100) / 100,
-                        'ratio': dept.get('default_ratio', 1),
-                        'time': dept.get('default_time', 1),
-                        'bus_count': 100,
-                        'events_multiplier': 2,
-                        'required_assistant_heads': 0
-                    }
+                    user_settings[name] = department_defaults(dept)
                 
                 with col.container(border=True):
                     st.markdown(f"***_{name}_***")
@@ -873,13 +992,16 @@ def all_page_logic():
                     elif dept_type == 'Time':
                         user_settings[name]['time'] = time_val
                         user_settings[name]['events_multiplier'] = events_mult_val
+                    
+                    if dept_type in QUEUE_ELIGIBLE_TYPES:
+                        queue_model_widgets(user_settings[name], f"{name}_{i}{suffix_support}")
 
 
         # --- 4. قسم الإدارات المساندة (Auxiliary) ---
         with st.container(border=True):
             st.markdown("#### 📊 الإدارات المساندة")
             st.markdown("---")
-            depts = DEPARTMENTS["الإدارات المساندة"]
+            depts = catalog.categories.get("الإدارات المساندة", ())
             cols = st.columns(3)
             col_index = 0
             suffix_aux = "_aux"
@@ -892,14 +1014,8 @@ def all_page_logic():
                 
                 # تهيئة الإعدادات الافتراضية (بما فيها Manual_HR)
                 if name not in user_settings:
-                    # هذه التهيئة أصبحت الآن لـ Manual_HR فقط
-                    user_settings[name] = {
-                        'required_assistant_heads': 0, 
-                        'manager_count': dept.get('default_manager_count', 1), 
-                        'admin_count': dept.get('default_admin_count', 2), 
-                        # إضافة قيم وهمية لتجنب أخطاء المفاتيح غير المستخدمة
-                        'criterion': 'Present', 'coverage': 1, 'ratio': 1, 'time': 1, 'bus_count': 100, 'events_multiplier': 2
-                    }
+                    # مفاتيح Manual_HR فقط (المدير والإداري ومساعد الرئيس)
+                    user_settings[name] = department_defaults(dept)
                 
                 with col.container(border=True):
                     st.markdown(f"***_{name}_***")
@@ -939,158 +1055,34 @@ def all_page_logic():
         st.session_state['run_calculation_all'] = False
         st.success("✅ جاري حساب الاحتياج الموحد...")
         
-        all_results = []
-        total_staff_needed = 0 # الإجمالي مع الاحتياط
-        # تهيئة إجمالي الموظفين لكل دور بناءً على الأدوار في DEFAULT_SALARY
-        total_staff_per_role = {role: 0 for role in DEFAULT_SALARY.keys()} 
-        
-        # 1. عملية الحساب لمراكز الضيافة الديناميكية
-        active_centers = [c for c in st.session_state.dynamic_hospitality_centers[:] if c['active']]
-        for center in active_centers:
-            center_id = center['id']
-            dept_name = center['name']
-            
-            # جلب النسبة من الإعدادات المحفوظة
-            ratio_key = f"Hosp_Ratio_{center_id}"
-            ratio = st.session_state['user_settings_all'].get(ratio_key, 200)
-            num_units_to_serve = center['hajjaj_count'] # عدد الحجاج الكلي
-
-            # تطبيق المعادلة الجديدة للضيافة (المتوسط اليومي)
-            daily_average_hajjaj = num_units_to_serve / service_days
-            res_basic = calculate_ratio_based_staff(daily_average_hajjaj, ratio)
-            
-            res_basic = max(1, res_basic) # التأكد من أن العدد لا يقل عن 1 إذا كان العدد الكلي للحجاج > 0
-            
-            # استدعاء دالة التوزيع الجديدة (مساعد رئيس ثابت 1 لكل وردية للضيافة)
-            staff_breakdown = distribute_staff(
-                res_basic,
-                shifts_count,
-                required_assistant_heads=1,
+        # 1. الحساب الموحد لجميع الإدارات ومراكز الضيافة دفعة واحدة (محرك التخطيط)
+        # الخطط المتطابقة تُقدَّم من الذاكرة المشتركة بين الجلسات دون إعادة الحساب،
+        # وغيرها يُحسب تزايدياً (الصفوف المتأثرة بالتعديل فقط) عبر خطة الجلسة
+        if 'all_incremental_plan' not in st.session_state:
+            st.session_state['all_incremental_plan'] = IncrementalPlan()
+        planner = st.session_state['all_incremental_plan']
+        with profiler.span("all:computation"):
+            baseline() # السيناريو الافتراضي المشترك (يُحسب مرة واحدة لكل عملية خادم)
+            plan = cached_unified_plan(
+                global_params,
+                st.session_state['user_settings_all'],
+                st.session_state.dynamic_hospitality_centers,
+                salaries=read_salaries(st.session_state),
+                planner=planner,
             )
-            
-            total_staff_in_hierarchy = sum(staff_breakdown.values())
-            total_needed_with_reserve = math.ceil(total_staff_in_hierarchy * (1 + reserve_factor))
-
-            translated_breakdown = {TRANSLATION_MAP.get(k, k): v for k, v in staff_breakdown.items()}
-
-            # تجميع إجمالي الموظفين لكل دور (للميزانية)
-            for role, count in translated_breakdown.items():
-                if role in total_staff_per_role:
-                    total_staff_per_role[role] += count
-
-            result_entry = {"الإدارة": dept_name, "القسم": "الضيافة"}
-            result_entry.update(translated_breakdown)
-            result_entry["المجموع الإجمالي (بالاحتياط)"] = total_needed_with_reserve
-            all_results.append(result_entry)
-            total_staff_needed += total_needed_with_reserve
-
-
-        # 2. عملية الحساب لباقي الإدارات
-        for category_name, depts in DEPARTMENTS.items():
-            if category_name == "الضيافة": continue
-            
-            for dept in depts:
-                dept_name = dept['name']
-                dept_info = ALL_DEPARTMENTS_FLAT[dept_name]
-                settings = st.session_state['user_settings_all'][dept_name]
-                
-                dept_type = dept_info['type']
-                res_basic = 0
-                
-                # حساب مقدم الخدمة الأساسي
-                if dept_type == 'Ratio':
-                    ratio = settings['ratio']
-                    criterion = settings['criterion']
-                    coverage = settings['coverage']
-                    num_hajjaj_for_dept = hajjaj_data[criterion]
-                    actual_hajjaj_in_center = num_hajjaj_for_dept * coverage
-                    res_basic = calculate_ratio_based_staff(actual_hajjaj_in_center, ratio)
-                    
-                elif dept_type == 'Bus_Ratio':
-                    num_units = settings['bus_count']
-                    bus_ratio = settings['ratio']
-                    res_basic = calculate_ratio_based_staff(num_units, bus_ratio)
-                    
-                elif dept_type == 'Time':
-                    time_min = settings['time']
-                    criterion = settings['criterion']
-                    coverage = settings['coverage']
-                    multiplier = settings['events_multiplier']
-                    num_hajjaj_for_dept = hajjaj_data[criterion]
-                    actual_hajjaj_in_center = num_hajjaj_for_dept * coverage
-                    res_basic = calculate_time_based_staff(actual_hajjaj_in_center * multiplier, time_min, service_days, staff_work_hours_day)
-                
-                # Manual_HR (يتم تطبيقه الآن على الإدارات المساندة)
-                elif dept_type == 'Manual_HR':
-                    res_basic = 0 # لا يتم حساب مقدم خدمة هنا
-
-                required_assistant_heads = settings['required_assistant_heads']
-                
-                # توزيع الأدوار
-                staff_breakdown = distribute_staff(
-                    res_basic,
-                    shifts_count,
-                    required_assistant_heads=required_assistant_heads
-                )
-                
-                # إضافة الأدوار اليدوية واستبدال مقدم الخدمة (إذا كان Manual_HR)
-                if dept_type == 'Manual_HR':
-                    staff_breakdown["Service_Provider"] = 0 # إلغاء مقدم الخدمة
-                    staff_breakdown["مدير"] = settings['manager_count']
-                    staff_breakdown["اداري"] = settings['admin_count']
-                
-                total_staff_in_hierarchy = sum(staff_breakdown.values())
-                total_needed_with_reserve = math.ceil(total_staff_in_hierarchy * (1 + reserve_factor))
-
-                translated_breakdown = {TRANSLATION_MAP.get(k, k): v for k, v in staff_breakdown.items()}
-                
-                # ضمان وجود الأدوار الجديدة في النتائج المترجمة
-                if dept_type == 'Manual_HR':
-                    translated_breakdown['مدير'] = staff_breakdown['مدير']
-                    translated_breakdown['اداري'] = staff_breakdown['اداري']
-                    if 'مقدم خدمة' in translated_breakdown:
-                        del translated_breakdown['مقدم خدمة']
-
-                # تجميع إجمالي الموظفين لكل دور (للميزانية)
-                for role, count in translated_breakdown.items():
-                    if role in total_staff_per_role:
-                        total_staff_per_role[role] += count
-
-                result_entry = {"الإدارة": dept_name, "القسم": dept_info['category']}
-                result_entry.update(translated_breakdown)
-                result_entry["المجموع الإجمالي (بالاحتياط)"] = total_needed_with_reserve
-                all_results.append(result_entry)
-                total_staff_needed += total_needed_with_reserve
-                
+        df = plan['df']
+        total_staff_needed = plan['total_staff_needed'] # الإجمالي مع الاحتياط
+        total_project_cost = plan['total_project_cost'] # بدون احتياط
         
         st.subheader("نتائج الاحتياج الموحد لجميع الإدارات")
 
-        # 4. عرض النتائج في جدول
-        column_order = [ 
-            "القسم", "رئيس", "مساعد رئيس", "مشرف فترة", 
-            "مدير", "اداري", "مقدم خدمة", "المجموع الإجمالي (بالاحتياط)" 
-        ]
-        
-        df = pd.DataFrame(all_results)
-        df = df.set_index("الإدارة")
-        
-        # اختيار الأعمدة مع حذف الأعمدة غير الموجودة (مثل مقدم خدمة لـ HR)
-        df = df[[col for col in column_order if col in df.columns]] 
-        
-        st.dataframe(df, use_container_width=True)
-        
-        # 5. تخزين الإجماليات وحساب الميزانية الإجمالية
-        total_project_cost = 0
-        # نستخدم total_staff_per_role الذي تم تجميعه بالفعل (بدون احتياط)
-        for role, staff_count in total_staff_per_role.items():
-            salary_or_reward = st.session_state.get(f'salary_{role}', DEFAULT_SALARY.get(role, 0))
-            total_project_cost += staff_count * salary_or_reward
+        # 2. عرض النتائج في جدول
+        with profiler.span("all:dataframe"):
+            st.dataframe(df, use_container_width=True)
             
-        # **تخزين البيانات في session_state لتجنب إعادة الاحتساب عند التحميل**
-        st.session_state['last_all_manpower_df'] = df.copy() # جدول القوى العاملة
-        st.session_state['last_all_results_data'] = all_results # قائمة النتائج التفصيلية للميزانية
-        st.session_state['total_budget_needed'] = total_staff_needed # الإجمالي مع الاحتياط
-        st.session_state['total_budget_value'] = total_project_cost # قيمة الميزانية الكلية (تكلفة هيكل القوى العاملة الأساسي)
+        # **تخزين الخطة في session_state لتجنب إعادة الاحتساب عند التحميل**
+        # (مرجع لنفس الخطة المشتركة في الذاكرة دون نسخ؛ الميزانية التفصيلية تُشتق من الجدول عند التحميل فقط)
+        st.session_state['last_all_plan'] = plan
 
         st.markdown("---")
         st.subheader("الإجماليات الكلية")
@@ -1105,26 +1097,40 @@ def all_page_logic():
             value=f"{total_project_cost:,} ريال"
         )
         
+        cache_stats = PLAN_CACHE.stats()
+        st.caption(
+            f"ذاكرة النتائج المشتركة: {cache_stats['hits']} إصابة / {cache_stats['misses']} إخفاق "
+            f"({cache_stats['size']} من {cache_stats['maxsize']} خطة مخزنة + {cache_stats['pinned']} مثبتة) | إصدار البيانات المشتركة {shared_version()}"
+        )
+        st.caption(f"آخر حساب تزايدي: أُعيد حساب {planner.last_stats['recomputed']:,} من {planner.last_stats['rows']:,} صف")
+        
         st.markdown("---")
         
     # **منطق التحميل - يستخدم البيانات المخزنة**
-    if 'last_all_manpower_df' in st.session_state and 'last_all_results_data' in st.session_state:
+    if 'last_all_plan' in st.session_state:
+        
+        # البيانات تُلتقط الآن، وملف Excel لا يُولَّد إلا عند الضغط على زر التحميل
+        last_all_manpower_df = st.session_state['last_all_plan']['df']
+        salaries = read_salaries(st.session_state)
+        accrual = read_accrual_settings(st.session_state)
         
         def download_all_manpower():
             # دالة مساعدة للحصول على بيانات القوى العاملة
-            df_to_excel = st.session_state['last_all_manpower_df'].reset_index().rename(columns={"الإدارة": "الإدارة"})
-            return to_excel(df_to_excel)
+            with profiler.span("export:manpower_excel"):
+                df_to_excel = last_all_manpower_df.reset_index()
+                return cached_manpower_excel(df_to_excel)
             
         def download_all_budget():
             # دالة مساعدة للحصول على بيانات الميزانية التفصيلية
-            return to_excel_budget(st.session_state['last_all_results_data'], service_days, is_all_page=True)
+            with profiler.span("export:budget_excel"):
+                return cached_plan_budget_excel(last_all_manpower_df, service_days, salaries=salaries, accrual=accrual)
 
 
         col_download1, col_download2 = st.columns(2)
 
         col_download1.download_button(
             label="⬇️ تحميل جدول الاحتياج الموحد (Excel)",
-            data=download_all_manpower(), # Call helper
+            data=download_all_manpower, # يتم التوليد عند الضغط فقط
             file_name=f"احتياج_القوى_العاملة_الموحد.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
@@ -1132,12 +1138,172 @@ def all_page_logic():
         
         col_download2.download_button(
             label="⬇️ تحميل تفاصيل الميزانية الكلية (Excel)",
-            data=download_all_budget(), # Call helper
+            data=download_all_budget, # يتم التوليد عند الضغط فقط
             file_name=f"ميزانية_المشروع_الكلية.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
         )
 
+        salary_profiles_section(last_all_manpower_df, salaries)
+        cash_flow_section(last_all_manpower_df, service_days, salaries, accrual)
+
+    scenario_store_section(global_params)
+
+def plan_budget(df):
+    """مصفوفة أعداد الخطة الأخيرة (تُبنى مرة واحدة لكل جدول نتائج وتُعاد لكل إعادة تسعير)."""
+    cached = st.session_state.get('last_all_budget')
+    if cached is None or cached[0] is not df:
+        cached = (df, Budget.from_frame(df))
+        st.session_state['last_all_budget'] = cached
+    return cached[1]
+
+def cash_flow_section(df, service_days, salaries, accrual):
+    """التدفق النقدي اليومي والتكلفة التراكمية لنافذة أيام (التدريب والخدمة وما بعد الموسم بمعدلاتها)."""
+    with st.expander("📅 التدفق النقدي اليومي", expanded=False):
+        col_c1, col_c2, col_c3 = st.columns(3)
+        start_date = col_c1.date_input("أول أيام الخدمة (اختياري)", value=None, key='cash_flow_start_date')
+        schedule = AccrualSchedule(service_days, salaries, accrual, start_date=start_date)
+        first_day = col_c2.number_input(
+            "بداية النافذة (اليوم)",
+            min_value=int(schedule.days[0]), max_value=int(schedule.days[-1]),
+            value=int(schedule.days[0]), step=1, key='cash_flow_first_day'
+        )
+        length = col_c3.number_input(
+            "طول النافذة (يوم)", min_value=1, value=DEFAULT_WINDOW_DAYS, step=1, key='cash_flow_window_days'
+        )
+
+        budget = plan_budget(df)
+        flow = cash_flow(budget, schedule, first_day, length)
+        season = cash_flow(budget, schedule)
+        col_m1, col_m2, col_m3 = st.columns(3)
+        col_m1.metric("تكلفة الموسم كاملاً (ريال)", f"{season[CUMULATIVE_COST_COLUMN].iloc[-1]:,.0f}")
+        col_m2.metric("تكلفة النافذة (ريال)", f"{flow[DAILY_COST_COLUMN].sum():,.0f}")
+        col_m3.metric("أيام الموسم", f"{len(schedule)} يوم")
+        st.caption(
+            f"التدريب {accrual['training_days']} يوم بمعدل {accrual['training_rate']}% وما بعد الموسم "
+            f"{accrual['post_days']} يوم بمعدل {accrual['post_rate']}% من المعدل اليومي للخدمة (المكافأة ÷ مدة الخدمة)."
+        )
+
+        st.line_chart(flow[[CUMULATIVE_COST_COLUMN]])
+        st.dataframe(flow.round(0), use_container_width=True)
+        st.markdown("**التكلفة اليومية لكل إدارة في النافذة (ريال)**")
+        st.dataframe(department_daily_costs(budget, schedule, first_day, length).round(0), use_container_width=True)
+
+def salary_profiles_section(df, salaries):
+    """مقارنة ملفات مكافآت بديلة على نفس الاحتياج: تسعير جميع الملفات دفعة واحدة دون إعادة حساب الخطة."""
+    with st.expander("💰 مقارنة ملفات المكافآت", expanded=False):
+        st.caption(
+            "كل صف ملف مكافآت بديل (مثل نوع عقد آخر)، ويُقارن بالمكافآت الحالية في الشريط الجانبي. "
+            "الأدوار الفارغة تأخذ المكافأة الافتراضية. اختيار قسم يجعل الصف مكافآت خاصة بإدارات ذلك القسم "
+            "داخل الملف بنفس الاسم (أدواره الفارغة تأخذ مكافآت الملف العام، أو المكافآت الحالية إن لم يكن له صف عام)."
+        )
+        if 'salary_profiles_base' not in st.session_state:
+            st.session_state['salary_profiles_base'] = pd.DataFrame([
+                {PROFILE_COLUMN: "زيادة 10%", "القسم": None, **{role: round(value * 1.1) for role, value in DEFAULT_SALARY.items()}},
+                {PROFILE_COLUMN: "عقد الضيافة", "القسم": HOSPITALITY_CATEGORY, "مقدم خدمة": 7500},
+            ], columns=[PROFILE_COLUMN, "القسم", *DEFAULT_SALARY])
+        category_options = list(dict.fromkeys([*current_catalog().categories, HOSPITALITY_CATEGORY]))
+        edited = st.data_editor(
+            st.session_state['salary_profiles_base'],
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={
+                "القسم": st.column_config.SelectboxColumn("القسم", options=category_options, help="فارغ = جميع الأقسام"),
+                **{
+                    role: st.column_config.NumberColumn(role, min_value=0, step=500, format="%d")
+                    for role in DEFAULT_SALARY
+                },
+            },
+            key='salary_profiles_editor',
+            use_container_width=True
+        )
+        current_name = "المكافآت الحالية"
+        general, by_category = {}, {}
+        for row in edited.to_dict('records'):
+            name = str(row.get(PROFILE_COLUMN) or '').strip()
+            if not name or name == current_name:
+                continue
+            values = {role: int(row[role]) for role in DEFAULT_SALARY if pd.notna(row.get(role))}
+            category = row.get("القسم")
+            if isinstance(category, str) and category:
+                by_category.setdefault(name, {}).setdefault(category, values)
+            else:
+                general.setdefault(name, values)
+        profiles = {current_name: salaries}
+        for name in dict.fromkeys([*general, *by_category]):
+            profiles[name] = dict(general.get(name, salaries))
+            if name in by_category:
+                profiles[name][CATEGORY_SALARIES_KEY] = by_category[name]
+
+        budget = plan_budget(df)
+        st.dataframe(budget.compare_profiles(profiles), use_container_width=True)
+        st.markdown("**التكلفة لكل قسم وملف مكافآت (ريال)**")
+        by_category = budget.profile_costs(profiles).groupby(budget.categories, sort=False).sum()
+        by_category.index.name = "القسم"
+        st.dataframe(by_category, use_container_width=True)
+
+def scenario_store_section(global_params):
+    """حفظ السيناريوهات في قاعدة SQLite محلية، والبحث فيها، ومقارنة سيناريوهين لكل إدارة ودور."""
+    with st.expander("💾 السيناريوهات المحفوظة", expanded=False):
+        with st.form("scenario_save_form"):
+            col_n1, col_n2 = st.columns([1, 2])
+            name = col_n1.text_input("اسم السيناريو", key='scenario_name')
+            notes = col_n2.text_input("ملاحظات", key='scenario_notes')
+            replace = st.checkbox("استبدال السيناريو المحفوظ بنفس الاسم", key='scenario_replace')
+            save_button = st.form_submit_button("💾 حفظ المدخلات الحالية ونتائجها")
+        if save_button:
+            salaries = read_salaries(st.session_state)
+            # النتائج تُحسب من المدخلات الحالية نفسها (من الذاكرة المشتركة غالباً) حتى يتطابق المحفوظ مع مدخلاته
+            plan = cached_unified_plan(
+                global_params,
+                st.session_state['user_settings_all'],
+                st.session_state.dynamic_hospitality_centers,
+                salaries=salaries,
+            )
+            inputs = {
+                'global_params': global_params,
+                'salaries': salaries,
+                'user_settings': st.session_state['user_settings_all'],
+                'centers': st.session_state.dynamic_hospitality_centers,
+            }
+            try:
+                save_scenario(name, plan, inputs, salaries=salaries, notes=notes, replace=replace)
+                st.success(f"تم حفظ السيناريو «{name.strip()}» ({plan['total_staff_needed']} موظف).")
+            except ValueError as e:
+                st.error(str(e))
+
+        search = st.text_input("🔍 بحث بالاسم أو الملاحظات", key='scenario_search')
+        saved = list_scenarios(search)
+        if saved.empty:
+            st.info("لا توجد سيناريوهات محفوظة.")
+            return
+        st.dataframe(saved, use_container_width=True, hide_index=True)
+
+        labels = saved["السيناريو"].to_dict()
+        ids = list(labels)
+        col_a, col_b = st.columns(2)
+        first = col_a.selectbox("السيناريو الأول", ids, format_func=labels.get, key='scenario_first')
+        second = col_b.selectbox("السيناريو الثاني", ids, index=min(1, len(ids) - 1), format_func=labels.get, key='scenario_second')
+
+        col_r1, col_r2 = st.columns(2)
+        col_r1.button("↩️ تحميل مدخلات السيناريو الأول", on_click=restore_scenario, args=(first,), use_container_width=True, key='scenario_restore')
+        col_r2.button("🗑️ حذف السيناريو الأول", on_click=remove_scenario, args=(first,), use_container_width=True, key='scenario_delete')
+
+        if first != second:
+            diff = diff_scenarios(first, second)
+            only_changes = st.checkbox("عرض الفروقات فقط", value=True, key='scenario_only_changes')
+            # صف المجموع الإجمالي (بالاحتياط) لا تكلفة له، فالتكلفة تُجمع من الأدوار فقط
+            totals = diff.xs(TOTAL_COLUMN, level="الرتبة الوظيفية")
+            role_rows = diff.drop(index=TOTAL_COLUMN, level="الرتبة الوظيفية")
+            col_t1, col_t2 = st.columns(2)
+            col_t1.metric(
+                "فرق إجمالي الموظفين (بالاحتياط)",
+                f"{int(totals['فرق العدد'].sum()):+,}"
+            )
+            col_t2.metric("فرق الميزانية (ريال)", f"{int(role_rows['فرق التكلفة (ريال)'].sum()):+,}")
+            shown = role_rows[role_rows["فرق العدد"] != 0] if only_changes else role_rows
+            st.dataframe(shown, use_container_width=True)
+
 # -------------------------------------------------------------------
 # 6. منطق صفحة احتساب المركبات (NEW VEHICLE PAGE LOGIC)
 # -------------------------------------------------------------------
@@ -1275,46 +1441,425 @@ def vehicle_page_logic():
         
         st.dataframe(df_results, use_container_width=True)
         
-        st.session_state['last_vehicle_df'] = df_results.copy()
+        st.session_state['last_vehicle_df'] = df_results
         
     # **منطق التحميل**
     if 'last_vehicle_df' in st.session_state:
         
+        last_vehicle_df = st.session_state['last_vehicle_df']
+        
         def download_vehicle_excel():
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_to_excel = st.session_state['last_vehicle_df'].copy()
-                df_to_excel.to_excel(writer, sheet_name='احتياج المركبات')
-            processed_data = output.getvalue()
-            return processed_data
+            return cached_vehicle_excel(last_vehicle_df)
             
         st.download_button(
             label="⬇️ تحميل نتائج احتساب المركبات (Excel)",
-            data=download_vehicle_excel(),
+            data=download_vehicle_excel, # يتم التوليد عند الضغط فقط
             file_name="احتساب_أسطول_المركبات.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
         )
+    
+    st.markdown("---")
+    fleet_simulation_section(settings)
+    st.markdown("---")
+    vehicle_routing_section(settings)
+
+
+def vehicle_routing_section(settings):
+    """المسارات الفعلية من إحداثيات المواقع بدلاً من متوسط وقت رحلة واحد لكل موقع."""
+    st.subheader("🗺️ المسارات من إحداثيات المواقع")
+    st.caption(
+        "ملف CSV / Excel بالأعمدة: الاسم، خط العرض، خط الطول، والنوع (موقع / مستودع). "
+        "تُحسب أزمنة الرحلات مرة واحدة لكل مجموعة مواقع وتُحفظ، ثم تُبنى مسارات الوردية (التوفير + 2-opt)."
+    )
+    uploaded_file = st.file_uploader("ملف المواقع", type=['csv', 'xlsx', 'xls'], key='routing_sites_file')
+    if uploaded_file is None:
+        return
+    
+    loaded = st.session_state.get('routing_sites')
+    if loaded is None or loaded['file_id'] != uploaded_file.file_id:
+        try:
+            loaded = {'file_id': uploaded_file.file_id, 'sites': read_sites_file(uploaded_file, uploaded_file.name)}
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            st.error(f"⚠️ تعذر قراءة الملف: {e}")
+            loaded = None
+        st.session_state['routing_sites'] = loaded
+        st.session_state.pop('routing_params', None)
+    if loaded is None:
+        return
+    sites = loaded['sites']
+    st.info(f"المواقع: **{int((~sites['depot']).sum()):,}** — المستودعات: **{int(sites['depot'].sum()):,}**")
+    
+    with st.form("vehicle_routing_form"):
+        col_g1, col_g2 = st.columns(2)
+        speed_kmh = col_g1.number_input(
+            "متوسط سرعة المركبة (كم/ساعة)", min_value=1.0, value=DEFAULT_ROUTING_SETTINGS['speed_kmh'], step=5.0, key='routing_speed'
+        )
+        road_factor = col_g2.number_input(
+            "معامل الطريق (الطريق الفعلي ÷ المسافة المستقيمة)", min_value=1.0, value=DEFAULT_ROUTING_SETTINGS['road_factor'], step=0.1, key='routing_road_factor'
+        )
+        if st.form_submit_button("🗺️ بناء المسارات", type="primary"):
+            st.session_state['routing_params'] = {'speed_kmh': speed_kmh, 'road_factor': road_factor}
+    
+    if 'routing_params' in st.session_state:
+        # المسافات والمسارات من الذاكرة المؤقتة؛ تغيير الزيارات اليومية يعيد توزيع الرحلات فقط
+        try:
+            with st.spinner("⏳ جاري بناء المسارات..."):
+                routes = build_routes(
+                    sites, settings['service_time_hr'], settings['vehicle_shift_hr'], **st.session_state['routing_params']
+                )
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+            return
+        vehicles = vehicles_for_routes(routes["زمن المسار (ساعة)"], settings['visits_per_site_day'], settings['vehicle_shift_hr'])
+        vehicles_final = math.ceil(vehicles * (1 + settings['reserve_factor_vehicles'] / 100))
+        col_r1, col_r2, col_r3 = st.columns(3)
+        col_r1.metric("**عدد المسارات في الوردية**", f"{len(routes):,}")
+        col_r2.metric("**المركبات المطلوبة من المسارات**", f"{vehicles:,} مركبة")
+        col_r3.metric("**مع الاحتياط**", f"{vehicles_final:,} مركبة")
+        st.caption(f"كل مسار يُنفذ {settings['visits_per_site_day']} مرة يومياً؛ الرحلات موزعة على مركبات بساعات عمل {settings['vehicle_shift_hr']} ساعة.")
+        st.dataframe(routes, use_container_width=True)
+
+
+def fleet_simulation_section(settings):
+    """وضع المحاكاة: التحقق من حجم الأسطول بمحاكاة أحداث يوم العمل بدلاً من افتراض جدول مثالي."""
+    st.subheader("🎲 التحقق بالمحاكاة (أزمنة عشوائية ونوافذ زمنية للزيارات)")
+    st.caption(
+        "المعادلة أعلاه تفترض أن الزيارات مرتبة دون فراغات. المحاكاة توزع زيارات كل موقع على الوردية، "
+        "وتعطي كل زيارة نافذة زمنية، وتسحب أزمنة الخدمة والرحلة عشوائياً لآلاف الأيام لكل حجم أسطول."
+    )
+    with st.form("vehicle_simulation_form"):
+        col_f1, col_f2, col_f3 = st.columns(3)
+        fleet_settings = {
+            'window_hr': col_f1.number_input(
+                "النافذة الزمنية للزيارة (ساعة)", min_value=0.0, value=DEFAULT_FLEET_SETTINGS['window_hr'], step=0.25, key='fleet_window_hr'
+            ),
+            'service_cv': col_f2.number_input(
+                "تذبذب وقت الخدمة (معامل الاختلاف)", min_value=0.0, max_value=2.0, value=DEFAULT_FLEET_SETTINGS['service_cv'], step=0.05, key='fleet_service_cv'
+            ),
+            'travel_cv': col_f3.number_input(
+                "تذبذب وقت الرحلة (معامل الاختلاف)", min_value=0.0, max_value=2.0, value=DEFAULT_FLEET_SETTINGS['travel_cv'], step=0.05, key='fleet_travel_cv'
+            ),
+            'replications': col_f1.number_input(
+                "عدد الأيام المحاكاة", min_value=100, max_value=100_000, value=DEFAULT_FLEET_SETTINGS['replications'], step=100, key='fleet_replications'
+            ),
+            'max_fleet': col_f2.number_input(
+                "الحد الأعلى لعدد المركبات", min_value=1, max_value=1_000, value=DEFAULT_FLEET_SETTINGS['max_fleet'], step=10, key='fleet_max_fleet'
+            ),
+            'max_missed_pct': col_f3.number_input(
+                "نسبة الزيارات الفائتة المسموحة (%)", min_value=0.0, max_value=100.0, value=DEFAULT_FLEET_SETTINGS['max_missed_pct'], step=0.5, key='fleet_max_missed_pct'
+            ),
+        }
+        fleet_settings['reliability'] = st.slider(
+            "نسبة الأيام التي يجب أن تحقق الهدف (%)", min_value=50, max_value=100,
+            value=int(DEFAULT_FLEET_SETTINGS['reliability'] * 100), step=1, key='fleet_reliability'
+        ) / 100
+        simulate_button = st.form_submit_button("🎲 تشغيل محاكاة الأسطول", type="primary")
+    
+    if simulate_button:
+        try:
+            with st.spinner("⏳ جاري محاكاة أيام العمل لكل حجم أسطول..."):
+                result = fleet_curve(settings, fleet_settings)
+            st.session_state['last_fleet_simulation'] = {**result, 'reserve': settings['reserve_factor_vehicles'] / 100}
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+    
+    if 'last_fleet_simulation' in st.session_state:
+        result = st.session_state['last_fleet_simulation']
+        curve = result['curve']
+        min_fleet = result['min_fleet']
+        col_r1, col_r2, col_r3 = st.columns(3)
+        if min_fleet is None:
+            st.warning("⚠️ لم يحقق أي حجم أسطول حتى الحد الأعلى الهدف المطلوب؛ ارفع الحد الأعلى أو خفف الهدف.")
+        else:
+            col_r1.metric("**أقل أسطول يحقق الهدف**", f"{min_fleet} مركبة")
+            col_r2.metric("**مع الاحتياط**", f"{math.ceil(min_fleet * (1 + result['reserve']))} مركبة")
+            col_r3.metric("**نسبة الاستخدام عند هذا الحجم**", f"{curve.loc[min_fleet, UTILIZATION_LABEL]:.0%}")
+        st.caption(f"{result['replications']:,} يوم محاكى — {result['visits_per_day']:,} زيارة يومياً")
+        st.line_chart(curve[[TARGET_LABEL, UTILIZATION_LABEL]])
+        st.dataframe(curve.style.format({UTILIZATION_LABEL: "{:.1%}", MISSED_LABEL: "{:.2f}", TARGET_LABEL: "{:.1%}"}), use_container_width=True)
 
 # -------------------------------------------------------------------
-# 7. واجهة الشريط الجانبي (Sidebar UI)
+# 7. منطق صفحة مقارنة السيناريوهات (Scenario Sweep)
+# -------------------------------------------------------------------
+def sweep_page_logic():
+    st.title("🧮 مقارنة السيناريوهات")
+    st.markdown("---")
+    
+    st.info("ℹ️ أدخل عدة قيم مفصولة بفواصل (مثال: 100000, 150000) أو مدى بصيغة بداية:نهاية:خطوة (مثال: 100000:200000:25000). يتم تقييم جميع التركيبات دفعة واحدة.")
+    
+    # جلب الإعدادات العامة وإعدادات الإدارات الحالية (نفس إعدادات الصفحة الموحدة)
+    base_params = read_global_params(st.session_state)
+    init_user_settings_all()
+    user_settings = st.session_state['user_settings_all']
+    active_centers = [c for c in st.session_state.dynamic_hospitality_centers if c['active']]
+    
+    # الإدارات القابلة لمقارنة معيار النسبة (خارج النموذج ليظهر حقل كل إدارة فور اختيارها)
+    ratio_options = [c['name'] for c in active_centers] + [
+        *current_catalog().of_types('Ratio', 'Bus_Ratio')
+    ]
+    selected_ratio_depts = st.multiselect(
+        "الإدارات المراد مقارنة معيار النسبة لها (اختياري)",
+        options=list(dict.fromkeys(ratio_options)),
+        key='sweep_ratio_depts'
+    )
+    
+    with st.form("sweep_criteria_form"):
+        st.subheader("مديات المعايير العامة")
+        cols = st.columns(3)
+        param_texts = {}
+        for i, (key, label) in enumerate(SWEEP_PARAM_LABELS.items()):
+            param_texts[key] = cols[i % 3].text_input(label, value=str(base_params[key]), key=f"sweep_{key}")
+        
+        ratio_texts = {}
+        if selected_ratio_depts:
+            st.markdown("---")
+            st.subheader("مديات معيار النسبة (وحدة/موظف)")
+            cols = st.columns(3)
+            for i, name in enumerate(selected_ratio_depts):
+                center_ids = [c['id'] for c in active_centers if c['name'] == name]
+                if center_ids:
+                    current_ratio = user_settings.get(f"Hosp_Ratio_{center_ids[0]}", 200)
+                else:
+                    current_ratio = user_settings[name]['ratio']
+                ratio_texts[name] = cols[i % 3].text_input(name, value=str(current_ratio), key=f"sweep_ratio_{name}")
+        
+        calculate_button = st.form_submit_button("🔄 تقييم جميع السيناريوهات", type="primary")
+    
+    if calculate_button:
+        try:
+            param_ranges = {key: parse_values(text) for key, text in param_texts.items()}
+            ratio_ranges = {name: parse_values(text) for name, text in ratio_texts.items()}
+            st.session_state['last_sweep_results'] = run_sweep(
+                base_params,
+                user_settings,
+                st.session_state.dynamic_hospitality_centers,
+                param_ranges=param_ranges,
+                ratio_ranges=ratio_ranges,
+                salaries=read_salaries(st.session_state),
+            )
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+    
+    if 'last_sweep_results' in st.session_state:
+        results = st.session_state['last_sweep_results']
+        scenarios = results['scenarios']
+        
+        st.subheader("ملخص السيناريوهات")
+        st.metric(label="**عدد السيناريوهات التي تم تقييمها**", value=f"{len(scenarios):,}")
+        st.dataframe(results['summary'], use_container_width=True)
+        
+        st.subheader("جميع السيناريوهات")
+        st.dataframe(scenarios, use_container_width=True)
+        
+        with st.expander("الجدول التفصيلي (سيناريو × إدارة × رتبة وظيفية)"):
+            st.dataframe(results['long'].head(10000), use_container_width=True, hide_index=True)
+        
+        col_download1, col_download2 = st.columns(2)
+        col_download1.download_button(
+            label="⬇️ تحميل جدول السيناريوهات (CSV)",
+            data=scenarios.to_csv().encode('utf-8-sig'),
+            file_name="مقارنة_السيناريوهات.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+        col_download2.download_button(
+            label="⬇️ تحميل الجدول التفصيلي (CSV)",
+            data=results['long'].to_csv(index=False).encode('utf-8-sig'),
+            file_name="مقارنة_السيناريوهات_تفصيلي.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+
+# -------------------------------------------------------------------
+# 8. منطق صفحة محاكاة عدم اليقين (Monte Carlo)
+# -------------------------------------------------------------------
+def simulation_page_logic():
+    st.title("🎲 محاكاة عدم اليقين في أعداد الحجاج")
+    st.markdown("---")
+    
+    st.info("ℹ️ يتم سحب أعداد الحجاج من التوزيعات المحددة حول التقديرات الحالية (الشريط الجانبي ومراكز الضيافة)، ثم يُحسب الاحتياج والتكلفة لكل سحبة باستخدام إعدادات الصفحة الموحدة.")
+    
+    global_params = read_global_params(st.session_state)
+    init_user_settings_all()
+    
+    distribution_keys = list(DISTRIBUTIONS.keys())
+    inputs = {
+        'num_hajjaj_present': "عدد الحجاج المتواجدين",
+        'num_hajjaj_flow': "عدد الحجاج التدفق اليومي",
+        'hajjaj_count': "عدد حجاج كل مركز ضيافة",
+    }
+    
+    with st.form("simulation_criteria_form"):
+        st.subheader("توزيعات المدخلات")
+        specs = {}
+        cols = st.columns(3)
+        for col, (key, label) in zip(cols, inputs.items()):
+            with col.container(border=True):
+                st.markdown(f"***_{label}_***")
+                kind = st.selectbox(
+                    "التوزيع",
+                    options=distribution_keys,
+                    index=distribution_keys.index('normal'),
+                    format_func=lambda k: DISTRIBUTIONS[k],
+                    key=f"sim_kind_{key}"
+                )
+                spread = st.number_input("الانتشار (%)", min_value=0, max_value=100, value=10, step=1, key=f"sim_spread_{key}")
+                specs[key] = {'kind': kind, 'spread': spread / 100}
+        
+        st.markdown("---")
+        col_s1, col_s2, col_s3 = st.columns(3)
+        draws = col_s1.number_input("عدد السحبات", min_value=1000, max_value=5_000_000, value=DEFAULT_DRAWS, step=10000, key="sim_draws")
+        workers = col_s2.number_input("عدد العمليات المتوازية", min_value=1, max_value=64, value=os.cpu_count() or 1, step=1, key="sim_workers")
+        seed = col_s3.number_input("البذرة العشوائية (لتكرار النتائج)", min_value=0, value=2024, step=1, key="sim_seed")
+        
+        calculate_button = st.form_submit_button("🔄 تشغيل المحاكاة", type="primary")
+    
+    if calculate_button:
+        with st.spinner("⏳ جاري تشغيل المحاكاة..."):
+            st.session_state['last_simulation_results'] = run_monte_carlo(
+                global_params,
+                st.session_state['user_settings_all'],
+                st.session_state.dynamic_hospitality_centers,
+                specs,
+                draws=int(draws),
+                salaries=read_salaries(st.session_state),
+                workers=int(workers),
+                seed=int(seed),
+            )
+    
+    if 'last_simulation_results' in st.session_state:
+        results = st.session_state['last_simulation_results']
+        totals = results['totals'].iloc[0]
+        
+        st.subheader(f"نتائج المحاكاة ({results['draws']:,} سحبة)")
+        for col, p in zip(st.columns(len(PERCENTILES)), PERCENTILES):
+            col.metric(
+                label=f"**إجمالي الموظفين P{p} (مع الاحتياط)**",
+                value=f"{int(totals[f'{HEADCOUNT_LABEL} P{p}'])} موظف",
+                delta=f"{int(totals[f'{COST_LABEL} P{p}']):,} ريال",
+                delta_color="off"
+            )
+        
+        st.subheader("حسب الإدارة")
+        st.dataframe(results['by_department'], use_container_width=True)
+        st.subheader("حسب الرتبة الوظيفية (بدون احتياط)")
+        st.dataframe(results['by_role'], use_container_width=True)
+
+# -------------------------------------------------------------------
+# 9. منطق صفحة الاحتياج على مدار الساعة (Hourly Timeline)
+# -------------------------------------------------------------------
+def timeline_page_logic():
+    st.title("🕒 الاحتياج على مدار الساعة")
+    st.markdown("---")
+    
+    st.info("ℹ️ يتم حساب عدد مقدمي الخدمة لكل ساعة ولكل إدارة باستخدام إعدادات الصفحة الموحدة ومراكز الضيافة. المنحنى الفارغ يعني قيمة ثابتة من الشريط الجانبي.")
+    
+    global_params = read_global_params(st.session_state)
+    service_days = global_params['service_days']
+    init_user_settings_all()
+    
+    profile_keys = list(INTRADAY_PROFILES.keys())
+    curves = {
+        'present': "منحنى الحجاج المتواجدين",
+        'flow': "منحنى التدفق (الوصول)",
+    }
+    
+    with st.form("timeline_criteria_form"):
+        st.subheader("منحنيات الطلب")
+        st.caption(
+            f"أدخل قيمة لكل يوم ({service_days} قيمة) أو لكل ساعة ({service_days * 24} قيمة) مفصولة بفواصل. "
+            "القيم اليومية تُوزَّع على ساعات اليوم حسب شكل التوزيع المختار."
+        )
+        inputs = {}
+        for col, (key, label) in zip(st.columns(2), curves.items()):
+            with col.container(border=True):
+                st.markdown(f"***_{label}_***")
+                text = st.text_area("القيم", value="", key=f"timeline_curve_{key}", height=100)
+                profile = st.selectbox(
+                    "شكل التوزيع خلال اليوم",
+                    options=profile_keys,
+                    index=profile_keys.index('two_peaks'),
+                    format_func=lambda k: INTRADAY_PROFILE_LABELS[k],
+                    key=f"timeline_profile_{key}"
+                )
+                inputs[key] = (text, profile)
+        
+        manifest = st.session_state.get('manifest_arrivals')
+        use_manifest = st.checkbox(
+            "استخدام منحنيات الوصول بالساعة من ملف الوصول لإدارات الاستقبال",
+            value=bool(manifest and manifest['arrivals']),
+            disabled=not (manifest and manifest['arrivals']),
+            key="timeline_use_manifest"
+        )
+        
+        calculate_button = st.form_submit_button("🔄 احتساب الاحتياج بالساعة", type="primary")
+    
+    if calculate_button:
+        try:
+            parsed = {key: (parse_values(text, cast=float, unique=False) or None) for key, (text, _) in inputs.items()}
+            with st.spinner("⏳ جاري حساب الاحتياج بالساعة..."):
+                st.session_state['last_timeline_results'] = demand_timeline(
+                    global_params,
+                    st.session_state['user_settings_all'],
+                    st.session_state.dynamic_hospitality_centers,
+                    present_curve=parsed['present'],
+                    flow_curve=parsed['flow'],
+                    present_profile=inputs['present'][1],
+                    flow_profile=inputs['flow'][1],
+                    dept_flow_curves=manifest['arrivals'] if use_manifest else None,
+                )
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+    
+    if 'last_timeline_results' in st.session_state:
+        results = st.session_state['last_timeline_results']
+        peak_table = results['peak']
+        hourly_total = results['staff'].sum(axis=1)
+        
+        col_t1, col_t2, col_t3 = st.columns(3)
+        col_t1.metric("**إجمالي مقدمي الخدمة (المتوسط)**", f"{int(peak_table['الاحتياج المتوسط'].sum()):,}")
+        col_t2.metric("**أعلى احتياج متزامن (ساعة)**", f"{int(hourly_total.max()):,}")
+        col_t3.metric("**مجموع ذروات الإدارات**", f"{int(peak_table['احتياج الذروة'].sum()):,}")
+        
+        st.subheader("مقدمو الخدمة المطلوبون لكل ساعة")
+        departments = results['departments']
+        default_depts = [d for d in ["استقبال المطار", "استقبال القطار", "استقبال الهجرة"] if d in departments]
+        selected = st.multiselect("الإدارات", options=departments, default=default_depts, key="timeline_depts")
+        if selected:
+            positions = [departments.index(d) for d in selected]
+            chart = pd.DataFrame(results['staff'][:, positions], columns=selected)
+            chart.index.name = "الساعة"
+            st.line_chart(chart)
+        
+        st.subheader("الذروة مقارنة بالمتوسط")
+        st.dataframe(peak_table, use_container_width=True)
+        st.subheader("احتياج كل وردية (أعلى ساعة في الوردية عبر جميع الأيام)")
+        st.dataframe(results['per_shift'], use_container_width=True)
+        st.subheader("الهيكل الكامل عند ذروة كل إدارة (مع القيادات والاحتياط)")
+        st.dataframe(results['peak_plan'], use_container_width=True)
+        
+        peak_plan = results['peak_plan']
+        def download_peak_plan():
+            return cached_manpower_excel(peak_plan.reset_index())
+        st.download_button(
+            label="⬇️ تحميل خطة الذروة (Excel)",
+            data=download_peak_plan, # يتم التوليد عند الضغط فقط
+            file_name="خطة_الذروة.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+
+# -------------------------------------------------------------------
+# 10. واجهة الشريط الجانبي (Sidebar UI)
 # -------------------------------------------------------------------
 def sidebar_ui():
     """تجهيز وعرض الشريط الجانبي."""
     
     # 1. تهيئة القيم الافتراضية لأول مرة (لم تتغير)
-    if 'num_hajjaj_present' not in st.session_state:
-        st.session_state['num_hajjaj_present'] = 100000
-    if 'num_hajjaj_flow' not in st.session_state:
-        st.session_state['num_hajjaj_flow'] = 25000
-    if 'service_days' not in st.session_state:
-        st.session_state['service_days'] = 8
-    if 'staff_hours' not in st.session_state:
-        st.session_state['staff_hours'] = 8
-    if 'shifts_count' not in st.session_state:
-        st.session_state['shifts_count'] = 3
-    if 'reserve_factor_input' not in st.session_state:
-        st.session_state['reserve_factor_input'] = 10 # 10%
+    for key, default_value in SIDEBAR_DEFAULT_PARAMS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default_value
 
     # تهيئة قيم المكافآت الافتراضية
     for role, default_salary in DEFAULT_SALARY.items():
@@ -1322,6 +1867,11 @@ def sidebar_ui():
         if key not in st.session_state:
             st.session_state[key] = default_salary
 
+    # تهيئة إعدادات الاستحقاق اليومي (أيام التدريب وما بعد الموسم ومعدلاتها)
+    for key, default_value in DEFAULT_ACCRUAL_SETTINGS.items():
+        if f'accrual_{key}' not in st.session_state:
+            st.session_state[f'accrual_{key}'] = default_value
+
     # 2. عرض الشريط الجانبي
     with st.sidebar:
         
@@ -1385,9 +1935,49 @@ def sidebar_ui():
                     step=100,
                     key=key
                 )
+
+            st.markdown("---")
+            st.subheader("الاستحقاق اليومي")
+            col_a1, col_a2 = st.columns(2)
+            col_a1.number_input(
+                "أيام التدريب قبل الانتشار", min_value=0, value=st.session_state['accrual_training_days'], step=1, key='accrual_training_days'
+            )
+            col_a2.number_input(
+                "معدل التدريب (%)", min_value=0, value=st.session_state['accrual_training_rate'], step=5, key='accrual_training_rate'
+            )
+            col_a1.number_input(
+                "أيام ما بعد الموسم", min_value=0, value=st.session_state['accrual_post_days'], step=1, key='accrual_post_days'
+            )
+            col_a2.number_input(
+                "معدل ما بعد الموسم (%)", min_value=0, value=st.session_state['accrual_post_rate'], step=5, key='accrual_post_rate'
+            )
         
+        st.toggle("⏱️ قياس زمن مراحل التشغيل", key='profiling_enabled')
+        
+def profiling_panel(profiler):
+    """عرض زمن مراحل آخر تشغيل والإحصاءات المتحركة (p50/p95)."""
+    with st.expander("⏱️ زمن مراحل التشغيل", expanded=False):
+        last_rerun = profiler.last_rerun()
+        if last_rerun is not None:
+            st.caption(f"آخر تشغيل ({last_rerun['page']}): " + " | ".join(
+                f"{name}: {seconds * 1000:.1f}ms" for name, seconds in last_rerun['spans'].items()
+            ))
+        st.dataframe(profiler.summary(), use_container_width=True)
+        
+        col_p1, col_p2 = st.columns(2)
+        col_p1.download_button(
+            label="⬇️ تحميل السجل (JSON Lines)",
+            data=profiler.to_jsonl(),
+            file_name="rerun_profile.jsonl",
+            mime="application/jsonl",
+            use_container_width=True
+        )
+        col_p2.button("🧹 مسح السجل", on_click=profiler.clear, use_container_width=True)
+        if profiler.log_path:
+            st.caption(f"يتم حفظ السجل أيضاً في: {profiler.log_path}")
+
 # -------------------------------------------------------------------
-# 8. الدالة الرئيسية (Main Function)
+# 11. الدالة الرئيسية (Main Function)
 # -------------------------------------------------------------------
 def main():
     # 6. إعدادات الصفحة و التوجيه نحو اليمين (RTL)
@@ -1426,6 +2016,9 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
+    # تجهيز السيناريو الافتراضي في الخلفية (مرة واحدة لكل عملية خادم؛ serve.py يبدأه قبل أول جلسة)
+    warm_up()
+
     # 7. تهيئة الحالة الافتراضية (Session State)
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = 'landing' # تغيير الصفحة الافتراضية
@@ -1434,21 +2027,45 @@ def main():
     # إضافة مركز الضيافة الافتراضي
     if 'dynamic_hospitality_centers' not in st.session_state:
         st.session_state['dynamic_hospitality_centers'] = []
+    if 'centers_editor_version' not in st.session_state:
+        st.session_state['centers_editor_version'] = 0
     if not st.session_state['dynamic_hospitality_centers']:
         add_hospitality_center(is_default=True)
 
+    # قياس زمن المراحل (اختياري: مفتاح في الشريط الجانبي أو PROFILE_RERUNS=1)
+    if 'profiling_enabled' not in st.session_state:
+        st.session_state['profiling_enabled'] = PROFILE_ENABLED_DEFAULT
+    if 'rerun_profiler' not in st.session_state:
+        st.session_state['rerun_profiler'] = RerunProfiler()
+    profiler = st.session_state['rerun_profiler']
+    profiler.enabled = st.session_state['profiling_enabled']
+    current_page = st.session_state['current_page']
+    profiler.start_rerun(current_page)
+
     # 8. إعداد الشريط الجانبي
-    sidebar_ui()
+    with profiler.span("sidebar_ui"):
+        sidebar_ui()
         
     # 9. عرض الصفحة المختارة
-    if st.session_state['current_page'] == 'landing':
-        landing_page()
-    elif st.session_state['current_page'] == 'main':
-        main_page_logic()
-    elif st.session_state['current_page'] == 'all':
-        all_page_logic()
-    elif st.session_state['current_page'] == 'vehicles':
-        vehicle_page_logic()
+    with profiler.span(f"page:{current_page}"):
+        if current_page == 'landing':
+            landing_page()
+        elif current_page == 'main':
+            main_page_logic()
+        elif current_page == 'all':
+            all_page_logic()
+        elif current_page == 'vehicles':
+            vehicle_page_logic()
+        elif current_page == 'sweep':
+            sweep_page_logic()
+        elif current_page == 'simulation':
+            simulation_page_logic()
+        elif current_page == 'timeline':
+            timeline_page_logic()
+
+    profiler.finish_rerun()
+    if profiler.enabled:
+        profiling_panel(profiler)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""
+تشغيل السيناريوهات دفعة واحدة من سطر الأوامر (Headless Batch Runner)
+يقرأ ملفات السيناريو (JSON/YAML) ويولد ملفي القوى العاملة والميزانية كما في الصفحة الموحدة،
+دون استيراد Streamlit، مع إمكانية التوزيع على عدة عمليات.
+
+مثال:
+    python batch.py scenarios/*.json --out reports --workers 4
+
+صيغة ملف السيناريو (جميع المفاتيح اختيارية):
+    {
+      "global_params": {"num_hajjaj_present": 15000, "service_days": 8, ...},
+      "departments": {"إرشاد الحافلات": {"ratio": 20, "criterion": "Flow"}, ...},
+      "centers": [{"name": "مخيم 1", "hajjaj_count": 3000, "ratio": 150, "active": true}, ...],
+      "salaries": {"مقدم خدمة": 9000, ..., "by_category": {"الضيافة": {"مقدم خدمة": 7500}}},
+      "accrual": {"training_days": 3, "training_rate": 50, "post_days": 2, "post_rate": 25}
+    }
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+from engine import (
+    DEFAULT_CENTER_NAME,
+    DEFAULT_GLOBAL_PARAMS,
+    DEFAULT_HOSPITALITY_RATIO,
+    DEFAULT_QUEUE_SETTINGS,
+    DEFAULT_SALARY,
+    DEPARTMENT_SETTING_KEYS,
+    GLOBAL_PARAM_BOUNDS,
+    QUEUE_ELIGIBLE_TYPES,
+    QUEUE_TYPE,
+    SALARY_BOUNDS,
+    Center,
+    compute_unified_plan,
+    default_inputs,
+)
+from budget import CATEGORY_SALARIES_KEY, Budget
+from catalog import CRITERIA, HOSPITALITY_CATEGORY, current_catalog
+from exports import stream_budget_excel, stream_frame_excel
+
+SCENARIO_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+# الإعدادات الرقمية للإدارات والمراكز (بنفس حدود نماذج الواجهة): (النوع، أقل قيمة، أعلى قيمة)
+# الأعداد الصحيحة تُخزن في أعمدة int64 فلا تُقبل لها قيم كسرية
+NUMERIC_SETTINGS = {
+    'coverage': (float, 0, 1),
+    'ratio': (int, 1, None),
+    'time': (float, 0.5, None),
+    'events_multiplier': (int, 1, None),
+    'bus_count': (int, 1, None),
+    'required_assistant_heads': (int, 0, None),
+    'manager_count': (int, 0, None),
+    'admin_count': (int, 0, None),
+    'queue_requests': (float, 0, None),
+    'queue_handle_time': (float, 0.1, None),
+    'queue_service_level': (float, 0.01, 0.99),
+    'queue_target_wait': (float, 0, None),
+    'manifest_flow': (float, 0, None),
+    'bus_peaks': (float, 0, None), # لكل ذروة في القائمة
+    'hajjaj_count': (int, 0, None),
+}
+
+def read_scenario_file(path):
+    """قراءة ملف سيناريو JSON أو YAML إلى قاموس."""
+    with open(path, encoding='utf-8') as f:
+        if str(path).lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ValueError("قراءة ملفات YAML تتطلب تثبيت الحزمة PyYAML.") from e
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"ملف السيناريو يجب أن يحتوي قاموساً: {path}")
+    return data
+
+def setting_number(key, value, where, bounds=None):
+    """تحويل إعداد رقمي إلى نوعه في NUMERIC_SETTINGS (أو bounds) والتحقق من حدوده. يرفع ValueError."""
+    kind, low, high = bounds or NUMERIC_SETTINGS[key]
+    try:
+        number = float(value) if not isinstance(value, bool) else math.nan
+    except (TypeError, ValueError):
+        number = math.nan
+    bounds = f"{low} إلى {high}" if high is not None else f"{low} على الأقل"
+    if not math.isfinite(number) or number < low or (high is not None and number > high):
+        raise ValueError(f"قيمة {key} في «{where}» يجب أن تكون رقماً من {bounds}: {value!r}")
+    if kind is int:
+        if not number.is_integer():
+            raise ValueError(f"قيمة {key} في «{where}» يجب أن تكون عدداً صحيحاً: {value!r}")
+        return int(number)
+    return number
+
+def department_settings(dept_name, settings):
+    """
+    التحقق من إعدادات إدارة في السيناريو: المفاتيح المسموحة لنوعها فقط (مع نموذج الطوابير وذروات الحافلات
+    وتدفق ملف الوصول حيث تنطبق)، وتحويل القيم الرقمية إلى أنواعها.
+    """
+    if not isinstance(settings, dict):
+        raise ValueError(f"إعدادات «{dept_name}» يجب أن تكون قاموساً.")
+    dept_type = current_catalog().by_name[dept_name]['type']
+    allowed = set(DEPARTMENT_SETTING_KEYS[dept_type])
+    if dept_type in QUEUE_ELIGIBLE_TYPES:
+        allowed.update(('staffing_model', *DEFAULT_QUEUE_SETTINGS))
+    if 'bus_count' in allowed:
+        allowed.add('bus_peaks')
+    if 'criterion' in allowed:
+        allowed.add('manifest_flow')
+    unknown = set(settings) - allowed
+    if unknown:
+        raise ValueError(
+            f"إعدادات غير معروفة لـ«{dept_name}» ({dept_type}): {', '.join(sorted(unknown))} "
+            f"(المسموح: {', '.join(sorted(allowed))})"
+        )
+
+    result = {}
+    for key, value in settings.items():
+        if key == 'bus_peaks':
+            if not isinstance(value, list):
+                raise ValueError(f"ذروات الحافلات لـ«{dept_name}» يجب أن تكون قائمة أرقام.")
+            result[key] = [setting_number(key, peak, dept_name) for peak in value]
+        elif key in NUMERIC_SETTINGS:
+            result[key] = setting_number(key, value, dept_name)
+        elif key == 'criterion':
+            if value not in CRITERIA:
+                raise ValueError(f"معيار «{dept_name}» غير معروف: {value!r} (المسموح: {', '.join(CRITERIA)})")
+            result[key] = value
+        elif key == 'staffing_model':
+            if value not in (None, QUEUE_TYPE):
+                raise ValueError(f"نموذج «{dept_name}» غير معروف: {value!r} (المسموح: {QUEUE_TYPE} أو null)")
+            result[key] = value
+    return result
+
+def scenario_inputs(scenario):
+    """
+    تحويل السيناريو إلى مدخلات المحرك (global_params, user_settings, centers, salaries)
+    بدمج القيم المحددة فوق القيم الافتراضية للشريط الجانبي والصفحة الموحدة.
+    """
+    global_params, user_settings, _, salaries = default_inputs()
+    global_params.update(scenario.get('global_params') or {})
+    unknown = set(global_params) - set(DEFAULT_GLOBAL_PARAMS)
+    if unknown:
+        raise ValueError(f"معايير غير معروفة: {', '.join(sorted(unknown))}")
+    for key, value in global_params.items():
+        global_params[key] = setting_number(key, value, "global_params", GLOBAL_PARAM_BOUNDS[key])
+
+    for dept_name, settings in (scenario.get('departments') or {}).items():
+        if dept_name not in user_settings:
+            raise ValueError(f"إدارة غير معروفة: {dept_name}")
+        user_settings[dept_name].update(department_settings(dept_name, settings))
+
+    centers = []
+    for center_id, center in enumerate(scenario.get('centers') or [], start=1):
+        name = str(center.get('name', f'مركز ضيافة #{center_id}'))
+        centers.append(Center(
+            center_id,
+            name,
+            setting_number('hajjaj_count', center['hajjaj_count'], name),
+            bool(center.get('active', True)),
+        ))
+        user_settings[f"Hosp_Ratio_{center_id}"] = setting_number('ratio', center.get('ratio', DEFAULT_HOSPITALITY_RATIO), name)
+    if not centers:
+        # نفس المركز الافتراضي الذي تضيفه الواجهة
+        centers.append(Center(1, DEFAULT_CENTER_NAME, global_params['num_hajjaj_present']))
+
+    salaries.update(scenario.get('salaries') or {})
+    unknown = set(salaries) - set(DEFAULT_SALARY) - {CATEGORY_SALARIES_KEY}
+    if unknown:
+        raise ValueError(f"أدوار غير معروفة في المكافآت: {', '.join(sorted(unknown))}")
+    for role in DEFAULT_SALARY:
+        salaries[role] = setting_number(role, salaries[role], "salaries", SALARY_BOUNDS)
+    # مكافآت خاصة بالأقسام (by_category): {القسم: {الدور: المكافأة}}
+    categories = {*current_catalog().categories, HOSPITALITY_CATEGORY}
+    by_category = salaries.pop(CATEGORY_SALARIES_KEY, None)
+    if by_category is not None:
+        if not isinstance(by_category, dict):
+            raise ValueError(f"{CATEGORY_SALARIES_KEY} في المكافآت يجب أن يكون قاموساً من الأقسام ومكافآتها.")
+        salaries[CATEGORY_SALARIES_KEY] = {}
+        for category, overrides in by_category.items():
+            if category not in categories:
+                raise ValueError(f"قسم غير معروف في المكافآت: {category}")
+            if not isinstance(overrides, dict):
+                raise ValueError(f"مكافآت {category} يجب أن تكون قاموساً من الأدوار ومكافآتها.")
+            unknown = set(overrides) - set(DEFAULT_SALARY)
+            if unknown:
+                raise ValueError(f"أدوار غير معروفة في مكافآت {category}: {', '.join(sorted(unknown))}")
+            salaries[CATEGORY_SALARIES_KEY][category] = {
+                role: setting_number(role, value, f"salaries.{CATEGORY_SALARIES_KEY}.{category}", SALARY_BOUNDS)
+                for role, value in overrides.items()
+            }
+    return global_params, user_settings, centers, salaries
+
+def run_scenario(path, out_dir):
+    """حساب سيناريو واحد وكتابة ملفي Excel. تعيد ملخص التشغيل."""
+    started = time.perf_counter()
+    scenario = read_scenario_file(path)
+    global_params, user_settings, centers, salaries = scenario_inputs(scenario)
+    plan = compute_unified_plan(global_params, user_settings, centers, salaries=salaries)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    manpower_path = os.path.join(out_dir, f"{stem}_manpower.xlsx")
+    budget_path = os.path.join(out_dir, f"{stem}_budget.xlsx")
+    budget = Budget.from_frame(plan['df'])
+    stream_frame_excel(plan['df'].reset_index(), path=manpower_path)
+    stream_budget_excel(
+        budget, global_params['service_days'], salaries=salaries, path=budget_path,
+        accrual=scenario.get('accrual'),
+    )
+
+    return {
+        'scenario': path,
+        'manpower': manpower_path,
+        'budget': budget_path,
+        'total_staff_needed': plan['total_staff_needed'],
+        'total_project_cost': budget.total_cost(salaries), # يشمل مكافآت الأقسام (تكلفة الخطة بالملف العام فقط)
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def collect_scenarios(paths):
+    """توسيع المجلدات إلى ملفات السيناريو بداخلها (بترتيب ثابت)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(SCENARIO_EXTENSIONS)
+            ))
+        else:
+            files.append(path)
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="توليد تقارير القوى العاملة والميزانية لعدة سيناريوهات دون واجهة.")
+    parser.add_argument('scenarios', nargs='+', help="ملفات السيناريو (JSON/YAML) أو مجلدات تحتويها")
+    parser.add_argument('-o', '--out', default='reports', help="مجلد ملفات Excel الناتجة (الافتراضي: reports)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="عدد العمليات المتوازية (الافتراضي: 1)")
+    args = parser.parse_args(argv)
+
+    files = collect_scenarios(args.scenarios)
+    if not files:
+        parser.error("لم يتم العثور على ملفات سيناريو.")
+    os.makedirs(args.out, exist_ok=True)
+
+    failures = 0
+    def report(path, result=None, error=None):
+        nonlocal failures
+        if error is not None:
+            failures += 1
+            print(f"FAILED\t{path}\t{error}", file=sys.stderr)
+        else:
+            print(
+                f"OK\t{path}\t{result['total_staff_needed']} موظف\t{result['total_project_cost']:,} ريال\t{result['seconds']}s",
+                flush=True
+            )
+
+    if args.workers <= 1 or len(files) == 1:
+        for path in files:
+            try:
+                report(path, run_scenario(path, args.out))
+            except Exception as e: # يستمر التشغيل لباقي السيناريوهات
+                report(path, error=e)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(run_scenario, path, args.out): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    report(futures[future], future.result())
+                except Exception as e:
+                    report(futures[future], error=e)
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
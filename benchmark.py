@@ -0,0 +1,214 @@
+"""
+قياس الأداء (Benchmark Suite)
+يقيس زمن التنفيذ وذروة الذاكرة لدوال الحساب والخطة الموحدة وملفات التصدير بأحجام مختلفة من مراكز الضيافة،
+وزمن إعادة التشغيل لصفحات التطبيق عبر AppTest، ويحفظ النتائج في ملف سجل (JSON Lines) لمقارنة التشغيلات.
+
+مثال:
+    python benchmark.py                        # جميع الأحجام والصفحات
+    python benchmark.py --sizes 10 1000 --skip-pages
+    python benchmark.py --compare              # مقارنة بآخر تشغيل في السجل
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from engine import (
+    DEFAULT_SALARY,
+    SIDEBAR_DEFAULT_PARAMS,
+    Center,
+    calculate_ratio_based_staff,
+    calculate_time_based_staff,
+    compute_unified_plan,
+    default_department_settings,
+    distribute_staff,
+    plan_records,
+)
+from budget import Budget
+from exports import generate_detailed_budget_excel, stream_budget_excel, stream_frame_excel, to_excel
+
+DEFAULT_SIZES = [10, 1_000, 10_000, 100_000]
+DEFAULT_PAGES = ['landing', 'main', 'all', 'vehicles']
+DEFAULT_HISTORY = 'benchmarks_history.jsonl'
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+def make_inputs(n_centers, seed=0):
+    """مدخلات ثابتة قابلة للتكرار: الإعدادات الافتراضية مع n مركز ضيافة عشوائي."""
+    rng = np.random.default_rng(seed)
+    user_settings = default_department_settings()
+    counts = rng.integers(500, 50_000, n_centers)
+    ratios = rng.integers(50, 400, n_centers)
+    centers = [
+        Center(i, f'مركز ضيافة #{i}', int(count))
+        for i, count in enumerate(counts, start=1)
+    ]
+    user_settings.update({f"Hosp_Ratio_{i}": int(ratio) for i, ratio in enumerate(ratios, start=1)})
+    return dict(SIDEBAR_DEFAULT_PARAMS), user_settings, centers, dict(DEFAULT_SALARY)
+
+def measure(func, repeat):
+    """أفضل زمن من عدة تكرارات، ثم تشغيل منفصل لقياس ذروة الذاكرة (tracemalloc يبطئ التنفيذ)."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'wall_s': min(times), 'median_s': statistics.median(times), 'peak_mb': peak / 2**20}
+
+def engine_cases(n_centers):
+    """حالات القياس لحجم واحد: (الاسم، الدالة)."""
+    global_params, user_settings, centers, salaries = make_inputs(n_centers)
+    plan = compute_unified_plan(global_params, user_settings, centers, salaries=salaries)
+    manpower_df = plan['df'].reset_index()
+    records = plan_records(plan['df'])
+    budget = Budget.from_frame(plan['df'])
+    # ملفات مكافآت بديلة (زيادة 0% إلى 19%) تُسعّر دفعة واحدة
+    profiles = {f"+{p}%": {role: salary * (100 + p) // 100 for role, salary in salaries.items()} for p in range(20)}
+    units = [c['hajjaj_count'] for c in centers]
+    service_days = global_params['service_days']
+
+    # الدوال المفردة تُستدعى مرة لكل مركز كما في الحساب الأصلي
+    def ratio_calls():
+        for count in units:
+            calculate_ratio_based_staff(count / service_days, 200)
+    def time_calls():
+        for count in units:
+            calculate_time_based_staff(count * 2, 3.5, service_days, global_params['staff_hours'])
+    def distribute_calls():
+        for count in units:
+            distribute_staff(count // 200, global_params['shifts_count'], 1)
+
+    return [
+        ('calculate_ratio_based_staff', ratio_calls),
+        ('calculate_time_based_staff', time_calls),
+        ('distribute_staff', distribute_calls),
+        ('compute_unified_plan', lambda: compute_unified_plan(global_params, user_settings, centers, salaries=salaries)),
+        ('to_excel', lambda: to_excel(manpower_df)),
+        ('stream_frame_excel', lambda: stream_frame_excel(manpower_df)),
+        ('generate_detailed_budget_excel', lambda: generate_detailed_budget_excel(records, service_days, salaries=salaries)),
+        ('stream_budget_excel', lambda: stream_budget_excel(records, service_days, salaries=salaries)),
+        ('budget_from_frame', lambda: Budget.from_frame(plan['df'])),
+        ('budget_department_costs', lambda: budget.department_costs(salaries)),
+        ('budget_profile_costs', lambda: budget.profile_costs(profiles)),
+    ]
+
+def run_engine_benchmarks(sizes, repeat, only=None):
+    results = []
+    for n_centers in sizes:
+        for name, func in engine_cases(n_centers):
+            if only and name not in only:
+                continue
+            stats = measure(func, repeat)
+            results.append({'benchmark': name, 'size': n_centers, **stats})
+            print(f"{name:<32}{n_centers:>9,}{stats['wall_s']:>12.6f}s{stats['peak_mb']:>11.1f} MB", flush=True)
+    return results
+
+def run_page_benchmarks(pages, reruns):
+    """زمن إعادة التشغيل لكل صفحة عبر AppTest (بدون متصفح)."""
+    from streamlit.testing.v1 import AppTest # يُستورد فقط عند قياس الصفحات
+
+    results = []
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(APP_PATH)) # التطبيق يقرأ logo.png بمسار نسبي
+    try:
+        for page in pages:
+            at = AppTest.from_file(APP_PATH, default_timeout=600)
+            at.run()
+            at.session_state['current_page'] = page
+            at.run() # التشغيل الأول للصفحة (تهيئة)
+            times = []
+            for _ in range(reruns):
+                started = time.perf_counter()
+                at.run()
+                times.append(time.perf_counter() - started)
+            stats = {
+                'wall_s': min(times),
+                'median_s': statistics.median(times),
+                'p95_s': float(np.percentile(times, 95)),
+                'errors': len(at.exception),
+            }
+            results.append({'benchmark': f'page:{page}', 'size': None, **stats})
+            print(f"{'page:' + page:<32}{'':>9}{stats['median_s']:>12.4f}s  (p95 {stats['p95_s']:.4f}s)", flush=True)
+    finally:
+        os.chdir(cwd)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(APP_PATH), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare_runs(previous, current):
+    """جدول المقارنة بين تشغيلين (نسبة التغير في الزمن والذاكرة)."""
+    def frame(run):
+        return pd.DataFrame(run['results']).set_index(['benchmark', 'size'], drop=True)
+    merged = frame(previous).join(frame(current), lsuffix='_before', rsuffix='_after', how='inner')
+    merged['wall_change_%'] = (merged['wall_s_after'] / merged['wall_s_before'] - 1) * 100
+    columns = ['wall_s_before', 'wall_s_after', 'wall_change_%']
+    if 'peak_mb_before' in merged:
+        columns += ['peak_mb_before', 'peak_mb_after']
+    return merged[columns]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء محرك التخطيط وملفات التصدير وصفحات التطبيق.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="أعداد مراكز الضيافة")
+    parser.add_argument('--repeat', type=int, default=3, help="عدد تكرارات كل قياس (يُؤخذ الأفضل)")
+    parser.add_argument('--only', nargs='+', help="قياس دوال محددة فقط بالاسم")
+    parser.add_argument('--pages', nargs='+', default=DEFAULT_PAGES, help="الصفحات المراد قياسها")
+    parser.add_argument('--reruns', type=int, default=5, help="عدد مرات إعادة تشغيل كل صفحة")
+    parser.add_argument('--skip-pages', action='store_true', help="تخطي قياس الصفحات (لا يتطلب Streamlit)")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="ملف سجل النتائج (JSON Lines)")
+    parser.add_argument('--compare', action='store_true', help="مقارنة النتائج بآخر تشغيل في السجل")
+    args = parser.parse_args(argv)
+
+    print(f"{'benchmark':<32}{'centers':>9}{'time':>13}{'peak':>14}")
+    results = run_engine_benchmarks(args.sizes, args.repeat, args.only)
+    if not args.skip_pages:
+        results += run_page_benchmarks(args.pages, args.reruns)
+
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+    history = load_history(args.history)
+    if args.compare and history:
+        print()
+        print(compare_runs(history[-1], run).round(4).to_string())
+    with open(args.history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+    print(f"\nتم حفظ النتائج في {args.history}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+محرك الميزانية (Budget Engine)
+أعداد الموظفين مصفوفة (إدارة × دور) والمكافآت متجه بترتيب الأدوار، فالتكلفة ضرب مصفوفة في متجه:
+تغيير المكافآت وحده يعيد التكلفة فوراً دون إعادة حساب الاحتياج، وتُقارن عدة ملفات مكافآت دفعة واحدة.
+يمكن أن يحتوي قاموس المكافآت ملفات خاصة ببعض الأقسام (by_category) تُطبق على إداراتها فقط.
+"""
+import numpy as np
+import pandas as pd
+
+from engine import DEFAULT_SALARY, salary_vector
+
+BUDGET_ROLES = list(DEFAULT_SALARY)
+PROFILE_COLUMN = "ملف المكافآت"
+PROFILE_COST_COLUMN = "التكلفة الإجمالية (ريال)"
+PROFILE_DIFF_COLUMN = "الفرق عن الأول (ريال)"
+CATEGORY_SALARIES_KEY = 'by_category' # مكافآت خاصة بالأقسام داخل قاموس المكافآت: {القسم: {الدور: المكافأة}}
+
+def category_salaries(salaries):
+    """ملفات المكافآت الخاصة بالأقسام في قاموس المكافآت (قاموس فارغ إن لم توجد)."""
+    return (salaries or {}).get(CATEGORY_SALARIES_KEY) or {}
+
+def salary_matrix(profiles):
+    """مصفوفة المكافآت (ملف × دور) من قاموس {اسم الملف: المكافآت} (الأدوار غير المحددة بقيمتها الافتراضية)."""
+    if not profiles:
+        return np.zeros((0, len(BUDGET_ROLES)), dtype=np.int64)
+    return np.vstack([salary_vector(salaries) for salaries in profiles.values()])
+
+class Budget:
+    """
+    أعداد الموظفين لكل (إدارة، دور) بدون احتياط، مستقلة عن المكافآت؛ كل دالة تكلفة تأخذ المكافآت كمدخل
+    فيمكن الاحتفاظ بالكائن وإعادة التسعير لأي عدد من ملفات المكافآت.
+    """
+    __slots__ = ('departments', 'categories', 'counts')
+
+    def __init__(self, departments, categories, counts):
+        self.departments = np.asarray(departments, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.counts = np.asarray(counts, dtype=np.int64).reshape(len(self.departments), len(BUDGET_ROLES))
+
+    @classmethod
+    def from_frame(cls, df):
+        """من جدول نتائج الخطة الموحدة (الأدوار غير المنطبقة الفارغة تُعد صفراً)."""
+        counts = df.reindex(columns=BUDGET_ROLES).fillna(0).to_numpy(dtype=np.int64)
+        return cls(df.index.to_numpy(dtype=object), df["القسم"].to_numpy(dtype=object), counts)
+
+    @classmethod
+    def from_records(cls, records):
+        """من قائمة قواميس النتائج (صيغة all_results / plan_records أو توزيع إدارة واحدة)."""
+        records = list(records)
+        counts = [[entry.get(role, 0) for role in BUDGET_ROLES] for entry in records]
+        return cls(
+            [entry.get("الإدارة", '') for entry in records],
+            [entry.get("القسم", '') for entry in records],
+            counts,
+        )
+
+    def role_totals(self):
+        """إجمالي الموظفين لكل دور."""
+        return self.counts.sum(axis=0)
+
+    def row_salaries(self, salaries=None, rows=slice(None)):
+        """
+        مكافآت صفوف الإدارات (إدارة × دور): الملف العام لجميع الإدارات، وملف القسم في salaries['by_category']
+        لإدارات ذلك القسم (أدواره غير المحددة تأخذ قيمة الملف العام).
+        """
+        by_category = category_salaries(salaries)
+        vector = salary_vector(salaries)
+        categories = self.categories[rows]
+        if not by_category:
+            return np.broadcast_to(vector, (len(categories), len(vector)))
+        base = {role: value for role, value in (salaries or {}).items() if role != CATEGORY_SALARIES_KEY}
+        matrix = np.vstack([vector] + [salary_vector({**base, **override}) for override in by_category.values()])
+        profile_index = pd.Index(list(by_category)).get_indexer(categories) + 1 # -1 (بدون ملف خاص) ← 0 الملف العام
+        return matrix[profile_index]
+
+    def role_costs(self, salaries=None):
+        """تكلفة كل دور لجميع الإدارات."""
+        if not category_salaries(salaries):
+            return self.role_totals() * salary_vector(salaries)
+        return np.einsum('dr,dr->r', self.counts, self.row_salaries(salaries))
+
+    def department_costs(self, salaries=None):
+        """تكلفة كل إدارة (مصفوفة الأعداد × متجه المكافآت، أو × مكافآت كل صف عند وجود ملفات للأقسام)."""
+        if not category_salaries(salaries):
+            return self.counts @ salary_vector(salaries)
+        return np.einsum('dr,dr->d', self.counts, self.row_salaries(salaries))
+
+    def total_cost(self, salaries=None):
+        return self.role_costs(salaries).sum().item()
+
+    def effective_salaries(self, salaries=None):
+        """
+        متوسط المكافأة الفعلي لكل دور (تكلفة الدور ÷ عدده) لتوزيع التكلفة على الأيام؛
+        بدون ملفات للأقسام هو الملف نفسه.
+        """
+        if not category_salaries(salaries):
+            return salaries
+        totals = self.role_totals()
+        average = np.divide(self.role_costs(salaries), totals, out=salary_vector(salaries).astype(np.float64), where=totals > 0)
+        return dict(zip(BUDGET_ROLES, average.tolist()))
+
+    def profile_costs(self, profiles):
+        """
+        تكلفة كل إدارة لكل ملف مكافآت (إدارة × ملف): ضرب مصفوفتين واحد للملفات العامة،
+        وعمود لكل ملف يحتوي مكافآت خاصة بالأقسام.
+        """
+        if any(category_salaries(salaries) for salaries in profiles.values()):
+            values = np.column_stack([self.department_costs(salaries) for salaries in profiles.values()]) if profiles \
+                else np.zeros((len(self.departments), 0))
+        else:
+            values = self.counts @ salary_matrix(profiles).T
+        return pd.DataFrame(
+            values,
+            index=pd.Index(self.departments, name="الإدارة"),
+            columns=list(profiles),
+        )
+
+    def compare_profiles(self, profiles):
+        """إجمالي التكلفة لكل ملف مكافآت والفرق عن الملف الأول."""
+        if any(category_salaries(salaries) for salaries in profiles.values()):
+            totals = np.array([self.total_cost(salaries) for salaries in profiles.values()])
+        else:
+            totals = self.role_totals() @ salary_matrix(profiles).T
+        return pd.DataFrame(
+            {
+                PROFILE_COST_COLUMN: totals,
+                PROFILE_DIFF_COLUMN: totals - (totals[0] if len(totals) else 0),
+            },
+            index=pd.Index(list(profiles), name=PROFILE_COLUMN),
+        )
+
+    def detail(self, salaries=None):
+        """
+        أعمدة الميزانية التفصيلية للأعداد الموجبة بترتيب الإدارات ثم الأدوار:
+        (الإدارة، الرتبة، العدد، المكافأة، التكلفة).
+        """
+        rows, cols = np.nonzero(self.counts > 0)
+        counts = self.counts[rows, cols]
+        salary = self.row_salaries(salaries)[rows, cols]
+        return (
+            self.departments[rows],
+            np.asarray(BUDGET_ROLES, dtype=object)[cols],
+            counts,
+            salary,
+            counts * salary,
+        )
@@ -0,0 +1,133 @@
+"""
+جداول الحافلات (Bus Schedules)
+حساب أعلى عدد حافلات متزامنة لكل موقع ولكل وردية من أوقات الوصول والمغادرة بخوارزمية خط المسح
+(Sweep Line): ترتيب أحداث الوصول (+1) والمغادرة (-1) مرة واحدة ثم مجموع تراكمي، بتعقيد O(n log n)
+ودون تقسيم اليوم إلى دقائق، لذلك يناسب جداول الموسم بمئات الآلاف من الرحلات.
+"""
+import numpy as np
+import pandas as pd
+
+ALL_LOCATIONS = "جميع المواقع" # الموقع عند عدم وجود عمود الموقع في الملف
+
+# المسميات المقبولة لكل عمود (عربي/إنجليزي)
+SCHEDULE_COLUMN_ALIASES = {
+    'arrival': ["arrival", "arrival_time", "start", "وقت الوصول", "الوصول"],
+    'departure': ["departure", "departure_time", "end", "وقت المغادرة", "المغادرة"],
+    'location': ["location", "site", "station", "الموقع", "المحطة", "المنفذ"],
+}
+
+NS_PER_HOUR = 3_600 * 10**9
+
+def read_schedule_file(file, file_name):
+    """قراءة جدول الحافلات (CSV أو Excel) بالأعمدة المطلوبة فقط."""
+    if str(file_name).lower().endswith(('.xlsx', '.xls')):
+        try:
+            df = pd.read_excel(file)
+        except ImportError as e:
+            raise ValueError("قراءة ملفات Excel تتطلب تثبيت الحزمة openpyxl.") from e
+    else:
+        df = pd.read_csv(file, encoding='utf-8-sig')
+    mapping = _match_schedule_columns(df.columns)
+    return pd.DataFrame({field: df[col] for field, col in mapping.items()})
+
+def _match_schedule_columns(columns):
+    normalized = {str(col).strip().lower(): col for col in columns}
+    mapping = {}
+    for field, aliases in SCHEDULE_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in normalized:
+                mapping[field] = normalized[alias.lower()]
+                break
+    missing = [field for field in ('arrival', 'departure') if field not in mapping]
+    if missing:
+        raise ValueError(f"عمود مطلوب غير موجود في الملف: {' / '.join(SCHEDULE_COLUMN_ALIASES[missing[0]][:4])}")
+    return mapping
+
+def sweep_peaks(group, starts, ends, n_groups):
+    """
+    أعلى تزامن لكل مجموعة ووقته من فترات [start, end).
+    المغادرة في نفس لحظة وصول حافلة أخرى لا تُعد تداخلاً (أحداث -1 تُرتب قبل +1).
+    """
+    n = len(starts)
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(n, dtype=np.int64), -np.ones(n, dtype=np.int64)])
+    groups = np.concatenate([group, group])
+    order = np.lexsort((deltas, times, groups))
+    # مجموع أحداث كل مجموعة صفر، لذلك المجموع التراكمي الواحد صحيح لكل مجموعة
+    level = np.cumsum(deltas[order])
+    peaks = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(peaks, groups[order], level)
+    # وقت أول وصول للذروة في كل مجموعة
+    at_peak = level == peaks[groups[order]]
+    first = np.full(n_groups, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, groups[order][at_peak], times[order][at_peak])
+    return peaks, first
+
+def shift_peaks(group, starts, ends, n_groups, shifts):
+    """
+    أعلى تزامن لكل (مجموعة، وردية) عبر جميع الأيام؛ الوردية = 24 / عدد الورديات ساعة تبدأ من منتصف الليل.
+    تُضاف أحداث صفرية عند بدايات الورديات حتى تُحسب الحافلات المتواجدة منذ الوردية السابقة.
+    """
+    n = len(starts)
+    peaks = np.zeros((n_groups, shifts), dtype=np.int64)
+    if n == 0:
+        return peaks
+    shift_ns = 24 * NS_PER_HOUR // shifts
+    first_boundary = (starts.min() // shift_ns) * shift_ns
+    boundaries = np.arange(first_boundary, ends.max(), shift_ns, dtype=np.int64)
+    # حدود الورديات لكل مجموعة (مجموعات × حدود، عددها صغير مقارنة بالرحلات)
+    boundary_groups = np.repeat(np.arange(n_groups), len(boundaries))
+    boundary_times = np.tile(boundaries, n_groups)
+
+    times = np.concatenate([starts, ends, boundary_times])
+    deltas = np.concatenate([
+        np.ones(n, dtype=np.int64), -np.ones(n, dtype=np.int64), np.zeros(len(boundary_times), dtype=np.int64)
+    ])
+    groups = np.concatenate([group, group, boundary_groups])
+    order = np.lexsort((deltas, times, groups))
+    times, deltas, groups = times[order], deltas[order], groups[order]
+    level = np.cumsum(deltas)
+
+    # أحداث المغادرة تخفض المستوى فقط، فالذروة تكفي فيها أحداث الوصول وبدايات الورديات
+    considered = deltas >= 0
+    shift_of_event = (times[considered] // shift_ns) % shifts
+    np.maximum.at(peaks, (groups[considered], shift_of_event), level[considered])
+    return peaks
+
+def bus_concurrency(schedule, shifts):
+    """
+    تحليل جدول الحافلات: أعلى تزامن لكل موقع ووقته، وأعلى تزامن لكل موقع في كل وردية.
+    schedule: جدول بالأعمدة arrival و departure و location (اختياري).
+    """
+    shifts = int(shifts)
+    if shifts < 1:
+        raise ValueError("عدد الورديات يجب أن يكون 1 على الأقل.")
+    arrival = pd.to_datetime(schedule['arrival'], errors='coerce')
+    departure = pd.to_datetime(schedule['departure'], errors='coerce')
+    if 'location' in schedule:
+        location = schedule['location'].astype('string').str.strip().fillna(ALL_LOCATIONS)
+    else:
+        location = pd.Series(ALL_LOCATIONS, index=schedule.index, dtype='string')
+
+    valid = (arrival.notna() & departure.notna() & (departure > arrival)).to_numpy()
+    starts = arrival.to_numpy(dtype='datetime64[ns]').astype(np.int64)[valid]
+    ends = departure.to_numpy(dtype='datetime64[ns]').astype(np.int64)[valid]
+    codes, locations = pd.factorize(location[valid], sort=True)
+    n_locations = len(locations)
+
+    peaks, peak_time = sweep_peaks(codes, starts, ends, n_locations)
+    per_shift = shift_peaks(codes, starts, ends, n_locations, shifts)
+    index = pd.Index(list(locations), name="الموقع")
+    by_location = pd.DataFrame({
+        "عدد الرحلات": np.bincount(codes, minlength=n_locations),
+        "أعلى تزامن": peaks,
+        "وقت الذروة": pd.to_datetime(peak_time),
+    }, index=index)
+    by_shift = pd.DataFrame(per_shift, index=index, columns=[f"الوردية {s + 1}" for s in range(shifts)])
+    return {
+        'by_location': by_location,
+        'by_shift': by_shift,
+        'peaks': per_shift,
+        'trips': int(valid.sum()),
+        'invalid_rows': int((~valid).sum()),
+    }
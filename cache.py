@@ -0,0 +1,166 @@
+"""
+ذاكرة النتائج المشتركة (Result Cache)
+ذاكرة LRU محدودة الحجم ومشتركة بين جميع الجلسات في عملية الخادم، مفتاحها بصمة ثابتة للمدخلات.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import pandas as pd
+
+from catalog import current_catalog
+from engine import (
+    DEFAULT_GLOBAL_PARAMS,
+    DEFAULT_HOSPITALITY_RATIO,
+    DEFAULT_SALARY,
+    Center,
+    compute_unified_plan,
+    department_defaults,
+    plan_cost,
+)
+
+PLAN_CACHE_SIZE = int(os.environ.get('PLAN_CACHE_SIZE', 128))
+EXPORT_CACHE_SIZE = int(os.environ.get('EXPORT_CACHE_SIZE', 64))
+
+
+class LRUCache:
+    """
+    ذاكرة LRU آمنة مع الخيوط (threads) مع عدادات الإصابة والإخفاق.
+    القيم المثبتة (pin) لا تُخرج ولا تُحسب ضمن الحجم (مثل نتائج السيناريو الافتراضي).
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False) # إخراج الأقدم استخداماً
+
+    def pin(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._pinned[key] = value
+
+    def unpin(self, key):
+        with self._lock:
+            self._pinned.pop(key, None)
+
+    def get_or_compute(self, key, compute):
+        """إرجاع القيمة المخزنة أو حسابها وتخزينها (الحساب يتم خارج القفل)."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize,
+                'pinned': len(self._pinned),
+            }
+
+
+def _normalize(value):
+    """توحيد القيم قبل البصمة (100 و 100.0 نفس المفتاح، والقواميس مرتبة)."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if hasattr(value, 'item'): # أعداد NumPy
+        return _normalize(value.item())
+    if isinstance(value, Mapping): # القواميس وإعدادات الجلسة المبنية على القيم المشتركة
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, Center):
+        return _normalize(value.as_dict())
+    return str(value)
+
+def stable_hash(value):
+    """بصمة ثابتة (SHA-256) لأي بنية من القواميس والقوائم والأعداد والنصوص."""
+    payload = json.dumps(_normalize(value), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def frame_hash(df):
+    """بصمة محتوى DataFrame (القيم والفهرس وأسماء الأعمدة وأنواعها)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(stable_hash([
+        [str(c) for c in df.columns], [str(t) for t in df.dtypes], df.columns.name, df.index.name
+    ]).encode('utf-8'))
+    return digest.hexdigest()
+
+def plan_cache_key(global_params, user_settings, centers):
+    """
+    مفتاح الخطة: بنية دليل الإدارات + الإعدادات العامة + إعدادات الإدارات + المراكز النشطة (مع نسبها).
+    القيم الافتراضية في الدليل تدخل عبر إعدادات الإدارات الفعلية، فتعديل قيمة إدارة واحدة في الدليل
+    لا يلغي الخطط المخزنة التي لا تستخدمها.
+    المكافآت ليست جزءاً من المفتاح: الاحتياج لا يعتمد عليها، والتكلفة يُعاد حسابها عند القراءة.
+    """
+    catalog = current_catalog()
+    active_centers = [
+        (c['name'], c['hajjaj_count'], user_settings.get(f"Hosp_Ratio_{c['id']}", DEFAULT_HOSPITALITY_RATIO))
+        for c in centers if c['active']
+    ]
+    dept_settings = {k: v for k, v in user_settings.items() if not str(k).startswith('Hosp_Ratio_')}
+    for _, dept in catalog.departments():
+        # الإدارة بدون إعدادات تُحسب بقيمها الافتراضية من الدليل (كما في build_department_table)
+        if not dept_settings.get(dept['name']):
+            dept_settings[dept['name']] = department_defaults(dept)
+    return stable_hash({
+        'catalog': catalog.structure_version,
+        'params': {key: global_params.get(key, default) for key, default in DEFAULT_GLOBAL_PARAMS.items()},
+        'settings': dept_settings,
+        'centers': active_centers,
+    })
+
+
+# ذاكرة الخطط الموحدة وملفات التصدير (نسخة واحدة لكل عملية خادم)
+PLAN_CACHE = LRUCache(maxsize=PLAN_CACHE_SIZE)
+EXPORT_CACHE = LRUCache(maxsize=EXPORT_CACHE_SIZE)
+
+def cached_unified_plan(global_params, user_settings, centers, salaries=None, planner=None):
+    """
+    نفس compute_unified_plan مع التخزين في الذاكرة المشتركة.
+    عند تمرير planner (IncrementalPlan الخاص بالجلسة) تُحسب الخطط غير المخزنة تزايدياً.
+    تغيير المكافآت وحده لا يعيد حساب الاحتياج: الخطة المخزنة تُسعّر من جديد (متجه الأدوار × متجه المكافآت).
+    النتيجة تشارك جدول الخطة المخزنة مع الجلسات الأخرى، لذا يجب عدم تعديله (استخدم نسخة عند الحاجة).
+    """
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    key = plan_cache_key(global_params, user_settings, centers)
+    compute = planner.update if planner is not None else compute_unified_plan
+    plan = PLAN_CACHE.get_or_compute(
+        key, lambda: compute(global_params, user_settings, centers, salaries=salaries)
+    )
+    return {**plan, 'total_project_cost': plan_cost(plan['total_staff_per_role'], salaries)}
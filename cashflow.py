@@ -0,0 +1,119 @@
+"""
+استحقاق التكلفة اليومي (Time-Phased Cost Accrual)
+توزيع المكافآت على أيام الموسم: تدريب قبل الانتشار، ثم مدة الخدمة (service_days)، ثم أيام ما بعد الموسم.
+المعدل اليومي للخدمة = المكافأة ÷ مدة الخدمة، ولكل مرحلة أخرى نسبة منه (لجميع الأدوار أو لكل دور).
+التكلفة اليومية لكل إدارة ودور تُحسب بضرب مصفوفة الأعداد في مصفوفة المعدلات (يوم × دور)،
+وتغيير نافذة الأيام يقتطع أعمدة المصفوفة فقط دون إعادة حساب الخطة أو الجدول.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from budget import BUDGET_ROLES
+from engine import salary_vector
+
+PHASE_LABELS = {
+    'training': "تدريب قبل الانتشار",
+    'service': "موسم الخدمة",
+    'post': "ما بعد الموسم",
+}
+# أيام التدريب وما بعد الموسم، ومعدلها اليومي (٪ من المعدل اليومي للخدمة)
+# (بدون أيام إضافية افتراضياً حتى يطابق التدفق النقدي الميزانية الثابتة)
+DEFAULT_ACCRUAL_SETTINGS = {
+    'training_days': 0,
+    'training_rate': 50,
+    'post_days': 0,
+    'post_rate': 25,
+}
+DEFAULT_WINDOW_DAYS = 30
+
+DAY_COLUMN = "اليوم"
+DATE_COLUMN = "التاريخ"
+PHASE_COLUMN = "المرحلة"
+DAILY_COST_COLUMN = "التكلفة اليومية (ريال)"
+CUMULATIVE_COST_COLUMN = "التكلفة التراكمية (ريال)"
+
+def read_accrual_settings(state):
+    """جلب إعدادات الاستحقاق من session_state (مفاتيح accrual_*) أو أي قاموس."""
+    return {key: state.get(f'accrual_{key}', default) for key, default in DEFAULT_ACCRUAL_SETTINGS.items()}
+
+def _rate_vector(rate):
+    """نسبة المعدل لكل دور: رقم واحد لجميع الأدوار أو قاموس {الدور: النسبة} (الأدوار غير المذكورة 100%)."""
+    if isinstance(rate, Mapping):
+        return np.array([rate.get(role, 100) for role in BUDGET_ROLES], dtype=np.float64) / 100
+    return np.full(len(BUDGET_ROLES), rate / 100)
+
+class AccrualSchedule:
+    """
+    أيام الموسم ومعدل استحقاق كل دور في كل يوم (ريال لكل موظف): المصفوفة rates (يوم × دور).
+    اليوم 1 أول أيام الخدمة، وأيام التدريب قبله (صفر وما دونه).
+    مجموع أيام الخدمة لكل دور = مكافأته، فبدون تدريب أو أيام بعد الموسم تساوي التكلفةُ الميزانيةَ الثابتة.
+    """
+
+    def __init__(self, service_days, salaries=None, settings=None, start_date=None):
+        settings = {**DEFAULT_ACCRUAL_SETTINGS, **(settings or {})}
+        training_days, post_days = int(settings['training_days']), int(settings['post_days'])
+        if service_days < 1:
+            raise ValueError("مدة الخدمة يجب أن تكون يوماً واحداً على الأقل.")
+        if training_days < 0 or post_days < 0:
+            raise ValueError("أيام التدريب وما بعد الموسم لا يمكن أن تكون سالبة.")
+
+        factors = np.vstack([
+            _rate_vector(settings['training_rate']),
+            np.ones(len(BUDGET_ROLES)),
+            _rate_vector(settings['post_rate']),
+        ])
+        self.phase = np.repeat(np.arange(len(PHASE_LABELS)), [training_days, service_days, post_days])
+        self.rates = factors[self.phase] * (salary_vector(salaries) / service_days)
+        self.days = np.arange(1 - training_days, service_days + post_days + 1)
+        self.dates = None
+        if start_date is not None:
+            self.dates = pd.Timestamp(start_date).normalize() + pd.to_timedelta(self.days - 1, unit='D')
+
+    def __len__(self):
+        return len(self.days)
+
+    def window(self, first_day=None, length=None):
+        """شريحة أيام النافذة في المصفوفات (من اليوم first_day وبطول length، مقيدة بحدود الموسم)."""
+        start = 0 if first_day is None else int(np.clip(first_day - self.days[0], 0, len(self)))
+        stop = len(self) if length is None else min(len(self), start + max(0, int(length)))
+        return slice(start, stop)
+
+def daily_role_costs(budget, schedule):
+    """التكلفة اليومية لكل دور طوال الموسم (يوم × دور)."""
+    return schedule.rates * budget.role_totals()
+
+def phase_costs(budget, schedule):
+    """إجمالي التكلفة لكل مرحلة (تدريب، خدمة، ما بعد الموسم) طوال الموسم."""
+    daily = daily_role_costs(budget, schedule).sum(axis=1)
+    totals = np.bincount(schedule.phase, weights=daily, minlength=len(PHASE_LABELS))
+    return dict(zip(PHASE_LABELS, totals.tolist()))
+
+def cash_flow(budget, schedule, first_day=None, length=None):
+    """
+    جدول التدفق النقدي اليومي للنافذة: المرحلة، تكلفة كل دور، التكلفة اليومية، والتراكمية
+    (التراكمية تبدأ من أول أيام الموسم حتى لو بدأت النافذة بعده).
+    """
+    window = schedule.window(first_day, length)
+    role_costs = daily_role_costs(budget, schedule)
+    daily = role_costs.sum(axis=1)
+    phase_names = np.asarray(list(PHASE_LABELS.values()), dtype=object)
+
+    columns = {}
+    if schedule.dates is not None:
+        columns[DATE_COLUMN] = schedule.dates[window]
+    columns[PHASE_COLUMN] = phase_names[schedule.phase[window]]
+    columns.update({role: role_costs[window, i] for i, role in enumerate(BUDGET_ROLES)})
+    columns[DAILY_COST_COLUMN] = daily[window]
+    columns[CUMULATIVE_COST_COLUMN] = np.cumsum(daily)[window]
+    return pd.DataFrame(columns, index=pd.Index(schedule.days[window], name=DAY_COLUMN))
+
+def department_daily_costs(budget, schedule, first_day=None, length=None):
+    """التكلفة اليومية لكل إدارة في النافذة (إدارة × يوم): ضرب مصفوفة الأعداد في معدلات أيام النافذة فقط."""
+    window = schedule.window(first_day, length)
+    return pd.DataFrame(
+        budget.counts @ schedule.rates[window].T,
+        index=pd.Index(budget.departments, name="الإدارة"),
+        columns=pd.Index(schedule.days[window], name=DAY_COLUMN),
+    )
@@ -0,0 +1,152 @@
+"""
+دليل الإدارات (Department Catalog)
+يُقرأ دليل الإدارات من ملف JSON/YAML خارجي ويُتحقق منه مرة واحدة عند التحميل، ثم يُفهرس بالاسم والقسم والنوع.
+يُعاد تحميل الملف تلقائياً عند تغير وقت تعديله دون إعادة تشغيل الخادم، ويبقى الدليل السابق إذا كان الملف الجديد غير صالح.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+CATALOG_PATH = os.environ.get('DEPARTMENTS_CATALOG') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'departments.json')
+RELOAD_CHECK_SECONDS = 1.0 # أقل فاصل بين فحصين لوقت تعديل الملف
+
+HOSPITALITY_CATEGORY = "الضيافة" # قسم مراكز الضيافة الديناميكية (لا إدارات ثابتة فيه)
+DEPARTMENT_TYPES = ('Ratio', 'Time', 'Bus_Ratio', 'Manual_HR')
+CRITERIA = ('Present', 'Flow')
+
+# الحقول الرقمية الاختيارية لكل إدارة: (أقل قيمة، أعلى قيمة)
+NUMERIC_FIELDS = {
+    'default_ratio': (1, None),
+    'default_coverage': (0, 100),
+    'default_time': (0.5, None),
+    'default_manager_count': (0, None),
+    'default_admin_count': (0, None),
+}
+
+def _read_file(path):
+    with open(path, encoding='utf-8') as f:
+        if str(path).lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ValueError("قراءة ملفات YAML تتطلب تثبيت الحزمة PyYAML.") from e
+            try:
+                return yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(str(e)) from e
+        return json.load(f)
+
+def _digest(value):
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+def validate_catalog(data):
+    """التحقق من الدليل: قاموس (قسم → قائمة إدارات) بأسماء فريدة وأنواع ومعايير معروفة. يرفع ValueError بأول خطأ."""
+    if not isinstance(data, dict) or not data:
+        raise ValueError("دليل الإدارات يجب أن يكون قاموساً من الأقسام وإداراتها.")
+    seen = set()
+    for category, depts in data.items():
+        if not isinstance(depts, list):
+            raise ValueError(f"إدارات القسم «{category}» يجب أن تكون قائمة.")
+        if category == HOSPITALITY_CATEGORY and depts:
+            raise ValueError(f"قسم «{HOSPITALITY_CATEGORY}» يُدار من جدول المراكز ولا يحتوي إدارات ثابتة.")
+        for dept in depts:
+            name = dept.get('name') if isinstance(dept, dict) else None
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError(f"إدارة بدون اسم في القسم «{category}».")
+            if name in seen:
+                raise ValueError(f"اسم الإدارة مكرر: «{name}».")
+            seen.add(name)
+            if dept.get('type') not in DEPARTMENT_TYPES:
+                raise ValueError(f"نوع الإدارة «{name}» غير معروف: {dept.get('type')} (المسموح: {', '.join(DEPARTMENT_TYPES)}).")
+            if dept.get('default_criterion', 'Present') not in CRITERIA:
+                raise ValueError(f"معيار الإدارة «{name}» غير معروف: {dept.get('default_criterion')}.")
+            for field, (low, high) in NUMERIC_FIELDS.items():
+                if field not in dept:
+                    continue
+                value = dept[field]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value < low or (high is not None and value > high):
+                    bounds = f"{low} إلى {high}" if high is not None else f"{low} على الأقل"
+                    raise ValueError(f"قيمة {field} للإدارة «{name}» يجب أن تكون رقماً من {bounds}.")
+    return data
+
+class DepartmentCatalog:
+    """
+    دليل إدارات غير قابل للتعديل مع فهارس للبحث المباشر:
+    categories (قسم → إداراته بالترتيب)، by_name (اسم → الإدارة مع قسمها)، by_type (نوع → أسماء الإدارات).
+    structure_version تتغير فقط بتغير الإدارات أو أقسامها أو أنواعها (وليس القيم الافتراضية)، وهي مفتاح الدليل في الخطط المخزنة.
+    """
+
+    def __init__(self, data, path=None, mtime=None):
+        validate_catalog(data)
+        categories, by_name, by_type = {}, {}, {dept_type: [] for dept_type in DEPARTMENT_TYPES}
+        for category, depts in data.items():
+            frozen = []
+            for dept in depts:
+                entry = MappingProxyType({**dept, 'category': category})
+                frozen.append(entry)
+                by_name[dept['name']] = entry
+                by_type[dept['type']].append(dept['name'])
+            categories[category] = tuple(frozen)
+        self.categories = MappingProxyType(categories)
+        self.by_name = MappingProxyType(by_name)
+        self.by_type = MappingProxyType({dept_type: tuple(names) for dept_type, names in by_type.items()})
+        self.path = path
+        self.mtime = mtime
+        self.version = _digest(data)
+        self.structure_version = _digest([
+            [category, [[dept['name'], dept['type']] for dept in depts]] for category, depts in data.items()
+        ])
+
+    def of_types(self, *types):
+        """أسماء الإدارات من الأنواع المحددة بترتيب الدليل."""
+        return [name for name, dept in self.by_name.items() if dept['type'] in types]
+
+    def departments(self):
+        """جميع الإدارات الثابتة (عدا مراكز الضيافة) بترتيب الأقسام: (القسم، الإدارة)."""
+        for category, depts in self.categories.items():
+            if category == HOSPITALITY_CATEGORY:
+                continue
+            for dept in depts:
+                yield category, dept
+
+def load_catalog(path=CATALOG_PATH):
+    """قراءة الدليل من ملف والتحقق منه."""
+    mtime = os.stat(path).st_mtime_ns
+    return DepartmentCatalog(_read_file(path), path=path, mtime=mtime)
+
+_current = None
+_last_check = 0.0
+_last_error = None
+_lock = threading.Lock()
+
+def current_catalog(path=CATALOG_PATH):
+    """
+    الدليل الحالي (نسخة واحدة لكل عملية). يُفحص وقت تعديل الملف مرة كل RELOAD_CHECK_SECONDS على الأكثر،
+    ويُعاد تحميله عند تغيره؛ إذا كان الملف الجديد غير صالح يبقى الدليل السابق ويُحفظ الخطأ (catalog_error).
+    """
+    global _current, _last_check, _last_error
+    now = time.monotonic()
+    if _current is not None and _current.path == path and now - _last_check < RELOAD_CHECK_SECONDS:
+        return _current
+    with _lock:
+        if _current is not None and _current.path == path and now - _last_check < RELOAD_CHECK_SECONDS:
+            return _current
+        _last_check = now
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if _current is None or _current.path != path or mtime != _current.mtime:
+                _current = load_catalog(path)
+                _last_error = None
+        except (OSError, ValueError) as e:
+            if _current is None:
+                raise
+            _last_error = f"{os.path.basename(path)}: {e}"
+        return _current
+
+def catalog_error():
+    """آخر خطأ في إعادة تحميل الدليل (None إذا كان الملف الحالي صالحاً)."""
+    return _last_error
@@ -0,0 +1,175 @@
+"""
+استيراد مراكز الضيافة وتحريرها دفعة واحدة (Bulk Import / Grid Editor)
+قراءة ملف CSV/Excel بأسماء المراكز وأعداد الحجاج والمعيار والتحقق منه في تمريرة متجهة واحدة،
+وتطبيق تعديلات جدول المراكز (الصفوف المعدلة فقط) على قائمة المراكز وإعداداتها.
+"""
+import numpy as np
+import pandas as pd
+
+from engine import DEFAULT_HOSPITALITY_RATIO, Center
+
+# المسميات المقبولة لكل عمود (عربي/إنجليزي)
+COLUMN_ALIASES = {
+    'name': ["name", "center", "center_name", "الاسم", "المركز", "اسم المركز", "اسم مركز الضيافة"],
+    'hajjaj_count': ["hajjaj_count", "pilgrims", "count", "عدد الحجاج", "عدد الحجاج الكلي", "الحجاج"],
+    'ratio': ["ratio", "المعيار", "النسبة", "المعيار (حاج/موظف)"],
+}
+
+ROW_COLUMN = "رقم الصف"
+ERROR_COLUMN = "سبب الرفض"
+
+def read_centers_file(file, file_name):
+    """قراءة ملف المراكز (CSV أو Excel) إلى DataFrame."""
+    if str(file_name).lower().endswith(('.xlsx', '.xls')):
+        try:
+            return pd.read_excel(file)
+        except ImportError as e:
+            raise ValueError("قراءة ملفات Excel تتطلب تثبيت الحزمة openpyxl.") from e
+    return pd.read_csv(file, encoding='utf-8-sig')
+
+def _match_columns(df):
+    """ربط أعمدة الملف بالأعمدة المطلوبة حسب المسميات المقبولة."""
+    normalized = {str(col).strip().lower(): col for col in df.columns}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in normalized:
+                mapping[field] = normalized[alias.lower()]
+                break
+    missing = [field for field in ('name', 'hajjaj_count') if field not in mapping]
+    if missing:
+        expected = " / ".join(COLUMN_ALIASES[missing[0]][:4])
+        raise ValueError(f"عمود مطلوب غير موجود في الملف: {expected}")
+    return mapping
+
+def validate_centers(df):
+    """
+    التحقق من بيانات المراكز دفعة واحدة.
+    تعيد (المراكز الصالحة بالأعمدة name و hajjaj_count و ratio، والصفوف المرفوضة مع سبب الرفض).
+    """
+    mapping = _match_columns(df)
+    names = df[mapping['name']].astype('string').str.strip()
+    counts = pd.to_numeric(df[mapping['hajjaj_count']], errors='coerce')
+    if 'ratio' in mapping:
+        ratios = pd.to_numeric(df[mapping['ratio']], errors='coerce')
+        ratios = ratios.where(df[mapping['ratio']].notna(), DEFAULT_HOSPITALITY_RATIO)
+    else:
+        ratios = pd.Series(DEFAULT_HOSPITALITY_RATIO, index=df.index)
+
+    # أسباب الرفض (أول سبب ينطبق على الصف)
+    checks = [
+        (names.isna() | (names == ""), "اسم المركز فارغ"),
+        (counts.isna(), "عدد الحجاج غير رقمي"),
+        (counts < 1, "عدد الحجاج يجب أن يكون 1 على الأقل"),
+        (counts.mod(1) != 0, "عدد الحجاج يجب أن يكون عدداً صحيحاً"),
+        (ratios.isna(), "المعيار غير رقمي"),
+        (ratios < 1, "المعيار يجب أن يكون 1 على الأقل"),
+        (ratios.mod(1) != 0, "المعيار يجب أن يكون عدداً صحيحاً"),
+    ]
+    reasons = np.select(
+        [mask.fillna(False).to_numpy(dtype=bool) for mask, _ in checks],
+        [reason for _, reason in checks],
+        default=""
+    )
+    rejected = reasons != ""
+
+    valid = pd.DataFrame({
+        'name': names[~rejected].astype(object),
+        'hajjaj_count': counts[~rejected].astype(np.int64),
+        'ratio': ratios[~rejected].astype(np.int64),
+    }).reset_index(drop=True)
+    errors = pd.DataFrame({
+        ROW_COLUMN: np.flatnonzero(rejected) + 2, # +2: صف العناوين والترقيم من 1 كما في الملف
+        ERROR_COLUMN: reasons[rejected],
+    })
+    return valid, errors
+
+def build_centers(valid, start_id):
+    """تحويل المراكز الصالحة إلى قائمة مراكز ديناميكية وقاموس معايير Hosp_Ratio_{id}."""
+    ids = range(start_id, start_id + len(valid))
+    centers = [
+        Center(center_id, name, int(count))
+        for center_id, name, count in zip(ids, valid['name'], valid['hajjaj_count'])
+    ]
+    ratios = {f"Hosp_Ratio_{center_id}": int(ratio) for center_id, ratio in zip(ids, valid['ratio'])}
+    return centers, ratios
+
+
+# -------------------------------------------------------------------
+# جدول تحرير المراكز (Grid Editor)
+# -------------------------------------------------------------------
+
+CENTERS_PAGE_SIZES = [25, 50, 100, 200] # خيارات عدد الصفوف في صفحة الجدول
+
+EDITOR_LABELS = {
+    'name': "اسم مركز الضيافة",
+    'hajjaj_count': "عدد الحجاج الكلي (للمركز)",
+    'ratio': "المعيار (حاج/موظف)",
+    'active': "مفعل",
+}
+
+def centers_frame(centers, user_settings):
+    """جدول المراكز (فهرسه معرف المركز) مع معيار كل مركز من الإعدادات."""
+    ids = [c['id'] for c in centers]
+    return pd.DataFrame({
+        'name': [c['name'] for c in centers],
+        'hajjaj_count': [c['hajjaj_count'] for c in centers],
+        'ratio': [user_settings.get(f"Hosp_Ratio_{center_id}", DEFAULT_HOSPITALITY_RATIO) for center_id in ids],
+        'active': [c['active'] for c in centers],
+    }, index=pd.Index(ids, name='id'))
+
+def filter_centers(frame, query):
+    """تصفية المراكز بجزء من الاسم (بدون تمييز حالة الأحرف)."""
+    query = str(query or "").strip()
+    if not query:
+        return frame
+    return frame[frame['name'].astype(str).str.contains(query, case=False, regex=False)]
+
+def _set_center_field(center, user_settings, field, value):
+    """تعديل حقل واحد لمركز (المعيار يُحفظ في الإعدادات تحت Hosp_Ratio_{id})."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return # الخلايا الممسوحة لا تغيّر القيمة الحالية
+    if field == 'ratio':
+        user_settings[f"Hosp_Ratio_{center['id']}"] = max(1, int(value))
+    elif field == 'hajjaj_count':
+        center['hajjaj_count'] = max(1, int(value))
+    elif field == 'name':
+        center['name'] = str(value)
+    elif field == 'active':
+        center['active'] = bool(value)
+
+def apply_center_edits(centers, user_settings, page_ids, edits, next_id, default_count):
+    """
+    تطبيق تعديلات محرر الجدول على المراكز: الصفوف المعدلة والمحذوفة والمضافة فقط.
+    page_ids: معرفات المراكز بترتيب ظهورها في الصفحة المعروضة.
+    تعيد (قائمة المراكز، المعرف التالي).
+    """
+    by_id = {c['id']: c for c in centers}
+    for position, changes in edits.get('edited_rows', {}).items():
+        center = by_id[page_ids[int(position)]]
+        for field, value in changes.items():
+            _set_center_field(center, user_settings, field, value)
+
+    deleted = {page_ids[int(position)] for position in edits.get('deleted_rows', [])}
+    if deleted:
+        centers = [c for c in centers if c['id'] not in deleted]
+        for center_id in deleted:
+            user_settings.pop(f"Hosp_Ratio_{center_id}", None)
+
+    for row in edits.get('added_rows', []):
+        center = Center(next_id, f'مركز ضيافة #{next_id}', default_count)
+        for field, value in row.items():
+            _set_center_field(center, user_settings, field, value)
+        centers.append(center)
+        next_id += 1
+    return centers, next_id
+
+def batch_update_centers(centers, user_settings, center_ids, field, value):
+    """تعديل جماعي لحقل واحد (عدد الحجاج أو المعيار) لمجموعة مراكز."""
+    if field == 'ratio':
+        user_settings.update({f"Hosp_Ratio_{center_id}": int(value) for center_id in center_ids})
+        return
+    selected = set(center_ids)
+    for center in centers:
+        if center['id'] in selected:
+            _set_center_field(center, user_settings, field, value)
@@ -0,0 +1,535 @@
+"""
+محرك تخطيط القوى العاملة (Headless Planning Engine)
+يحسب احتياج جميع الإدارات ومراكز الضيافة دفعة واحدة باستخدام NumPy،
+ولا يعتمد على Streamlit حتى يمكن استدعاؤه من الواجهة أو من أي سكربت.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+from catalog import HOSPITALITY_CATEGORY, current_catalog
+from queueing import required_agents
+
+# -------------------------------------------------------------------
+# 1. الثوابت العامة (Constants)
+# -------------------------------------------------------------------
+
+TOTAL_WORK_HOURS = 24
+SUPERVISORS_PER_SHIFT = 1 # مشرف فترة ثابت 1 لكل وردية
+ASSISTANT_HEADS_PER_SHIFT = 1
+DEFAULT_HEAD_ASSISTANT_RATIO = 1
+
+# تم تحديث: إضافة أدوار (مدير) و (اداري)
+DEFAULT_SALARY = {
+    "رئيس": 37000,
+    "مساعد رئيس": 30000,
+    "مشرف فترة": 25000, # تم التعديل
+    "مقدم خدمة": 8500,
+    "مدير": 20000,       # دور جديد
+    "اداري": 12000,      # دور جديد
+}
+
+TRANSLATION_MAP = {
+    "Head": "رئيس",
+    "Assistant_Head": "مساعد رئيس",
+    "Field_Supervisor": "مشرف فترة",
+    "Service_Provider": "مقدم خدمة",
+}
+
+HOSPITALITY_TYPE = "Hospitality" # نوع داخلي لمراكز الضيافة الديناميكية
+DEFAULT_HOSPITALITY_RATIO = 200
+TOTAL_COLUMN = "المجموع الإجمالي (بالاحتياط)"
+
+# ترتيب أعمدة جدول النتائج الموحد
+RESULT_COLUMN_ORDER = [
+    "القسم", "رئيس", "مساعد رئيس", "مشرف فترة",
+    "مدير", "اداري", "مقدم خدمة", TOTAL_COLUMN
+]
+
+# القيم الافتراضية للإعدادات العامة (نفس مفاتيح session_state)
+DEFAULT_GLOBAL_PARAMS = {
+    'num_hajjaj_present': 15000,
+    'num_hajjaj_flow': 6000,
+    'service_days': 8,
+    'staff_hours': 8,
+    'reserve_factor_input': 0,
+    'shifts_count': 3,
+}
+# حدود الإعدادات العامة (الحد الأدنى نفسه في الشريط الجانبي): (النوع، أقل قيمة، أعلى قيمة)
+GLOBAL_PARAM_BOUNDS = {
+    'num_hajjaj_present': (int, 1, None),
+    'num_hajjaj_flow': (int, 1, None),
+    'service_days': (int, 1, None),
+    'staff_hours': (int, 1, None),
+    'reserve_factor_input': (int, 0, 100),
+    'shifts_count': (int, 1, None),
+}
+SALARY_BOUNDS = (int, 1, None) # مكافأة كل دور
+
+# نموذج الطوابير (Erlang-C): يمكن تفعيله بدلاً من نوع الإدارة الأصلي عبر 'staffing_model'
+QUEUE_TYPE = "Queue"
+QUEUE_ELIGIBLE_TYPES = ('Ratio', 'Time')
+MINUTES_PER_DAY = TOTAL_WORK_HOURS * 60
+DEFAULT_QUEUE_SETTINGS = {
+    'queue_requests': 1.0, # عدد الطلبات لكل حاج يومياً
+    'queue_handle_time': 5.0, # متوسط زمن خدمة الطلب (دقيقة)
+    'queue_service_level': 0.9, # نسبة الطلبات المخدومة خلال زمن الانتظار المستهدف
+    'queue_target_wait': 2.0, # زمن الانتظار المستهدف (دقيقة)
+}
+
+# القيم التي يبدأ بها الشريط الجانبي عند أول تشغيل للجلسة
+SIDEBAR_DEFAULT_PARAMS = {
+    'num_hajjaj_present': 100000,
+    'num_hajjaj_flow': 25000,
+    'service_days': 8,
+    'staff_hours': 8,
+    'reserve_factor_input': 10, # 10%
+    'shifts_count': 3,
+}
+DEFAULT_CENTER_NAME = 'مركز ضيافة 1 (افتراضي)' # المركز الذي تضيفه الواجهة عند أول تشغيل
+
+# -------------------------------------------------------------------
+# 2. الدوال المساعدة
+# -------------------------------------------------------------------
+
+def calculate_time_based_staff(total_events, time_per_event_min, service_days, staff_work_hours_day):
+    """تحسب الاحتياج بناءً على الوقت الإجمالي اللازم للخدمات مقارنة بالوقت الإجمالي المتاح من الموظفين."""
+    time_per_event_hrs = time_per_event_min / 60
+    total_hours_needed = total_events * time_per_event_hrs
+    total_staff_available_hours = service_days * staff_work_hours_day
+    basic_staff = math.ceil(total_hours_needed / total_staff_available_hours) if total_staff_available_hours > 0 else 0
+    return basic_staff
+
+def calculate_ratio_based_staff(num_units, ratio):
+    """تحسب الاحتياج بناءً على معيار النسبة (وحدة/موظف)."""
+    # math.ceil يضمن تقريب العدد لأعلى موظف صحيح
+    basic_staff = math.ceil(num_units / ratio)
+    return basic_staff
+
+# تم تعديل الدالة لحذف معايير النسبة وإلغاء التوسع في عدد المشرفين
+def distribute_staff(total_basic_staff, shifts, required_assistant_heads=0):
+    """توزع القوى العاملة الأساسية على الهيكل القيادي الثابت."""
+    # في حالة Manual_HR، سيتم إرسال total_basic_staff = 0، لذا سيتم حساب القيادات فقط
+    service_provider = total_basic_staff
+
+    if total_basic_staff == 0 and required_assistant_heads == 0:
+        head = 0
+        total_supervisors = 0
+        assistant_head = 0
+    else:
+        head = 1 # رئيس واحد لكل قسم
+        # مشرف فترة ثابت: 1 لكل وردية (SUPERVISORS_PER_SHIFT * shifts)
+        total_supervisors = SUPERVISORS_PER_SHIFT * shifts
+        # مساعد رئيس بناءً على الإلزام لكل وردية
+        assistant_head = required_assistant_heads * shifts
+
+    return {
+        "Head": head,
+        "Assistant_Head": assistant_head,
+        "Field_Supervisor": total_supervisors,
+        "Service_Provider": service_provider,
+    }
+
+def peak_bus_units(peaks, ratio):
+    """
+    عدد الحافلات المكافئ لذروات جدول الحافلات (موقع × وردية) بحيث يعطي معيار Bus_Ratio
+    نفس عدد المرشدين المحسوب لكل موقع ووردية على حدة (كل ذروة تُقرب لأعلى إلى مضاعف المعيار).
+    """
+    return int(np.ceil(np.asarray(peaks, dtype=np.float64) / ratio).sum()) * ratio
+
+def read_global_params(state):
+    """جلب الإعدادات العامة من session_state (أو أي قاموس) مع القيم الافتراضية."""
+    return {key: state.get(key, default) for key, default in DEFAULT_GLOBAL_PARAMS.items()}
+
+def read_salaries(state):
+    """جلب متوسط المكافآت لكل دور من session_state (أو أي قاموس)."""
+    return {role: state.get(f'salary_{role}', DEFAULT_SALARY.get(role, 0)) for role in DEFAULT_SALARY}
+
+def salary_vector(salaries=None):
+    """متجه المكافآت بترتيب أدوار DEFAULT_SALARY (الأدوار غير المحددة بقيمتها الافتراضية)."""
+    salaries = salaries or {}
+    return np.array([salaries.get(role, default) for role, default in DEFAULT_SALARY.items()])
+
+def plan_cost(role_counts, salaries=None):
+    """التكلفة = متجه أعداد الأدوار × متجه المكافآت (الأدوار بدون مكافأة لا تدخل في التكلفة)."""
+    counts = np.array([role_counts.get(role, 0) for role in DEFAULT_SALARY])
+    return (counts @ salary_vector(salaries)).item()
+
+# مفاتيح الإعدادات المستخدمة لكل نوع إدارة (لا تُخزن مفاتيح لا يقرؤها الحساب أو النموذج)
+DEPARTMENT_SETTING_KEYS = {
+    'Ratio': ('criterion', 'coverage', 'ratio', 'required_assistant_heads'),
+    'Time': ('criterion', 'coverage', 'time', 'events_multiplier', 'required_assistant_heads'),
+    'Bus_Ratio': ('criterion', 'ratio', 'bus_count', 'required_assistant_heads'),
+    'Manual_HR': ('required_assistant_heads', 'manager_count', 'admin_count'),
+}
+
+def department_defaults(dept_info):
+    """الإعدادات الافتراضية لإدارة واحدة (المفاتيح الخاصة بنوعها فقط)."""
+    defaults = {
+        'criterion': dept_info.get('default_criterion', 'Present'),
+        'coverage': dept_info.get('default_coverage', 100) / 100,
+        'ratio': dept_info.get('default_ratio', 1),
+        'time': dept_info.get('default_time', 1),
+        'bus_count': 100,
+        'events_multiplier': 2,
+        'required_assistant_heads': 0, # مساعد الرئيس 0 عند التهيئة (إلزامي للإدارات المساندة)
+        'manager_count': dept_info.get('default_manager_count', 1),
+        'admin_count': dept_info.get('default_admin_count', 2),
+    }
+    settings = {key: defaults[key] for key in DEPARTMENT_SETTING_KEYS[dept_info['type']]}
+    if dept_info['type'] in QUEUE_ELIGIBLE_TYPES:
+        # نفس القيم التي يكتبها نموذج الطوابير في الصفحة الموحدة عند عدم تعديله
+        settings.update({'staffing_model': None, **DEFAULT_QUEUE_SETTINGS})
+    return settings
+
+def default_department_settings(catalog=None):
+    """الإعدادات الافتراضية لجميع الإدارات (عدا مراكز الضيافة) كما تُهيأ في الصفحة الموحدة."""
+    catalog = catalog or current_catalog()
+    return {dept['name']: department_defaults(dept) for _, dept in catalog.departments()}
+
+class Center:
+    """
+    مركز ضيافة بحقول ثابتة (__slots__) بدلاً من قاموس لكل مركز لتقليل ذاكرة الجلسات ذات آلاف المراكز.
+    يدعم الوصول بالمفتاح (center['name']) مثل القاموس.
+    """
+    __slots__ = ('id', 'name', 'hajjaj_count', 'active')
+
+    def __init__(self, id, name, hajjaj_count, active=True):
+        self.id = id
+        self.name = name
+        self.hajjaj_count = hajjaj_count
+        self.active = active
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __repr__(self):
+        return f"Center({self.as_dict()})"
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+def default_inputs(catalog=None):
+    """
+    مدخلات السيناريو الافتراضي كما تُهيأ الواجهة عند فتحها لأول مرة:
+    (global_params, user_settings, centers, salaries) بمركز ضيافة افتراضي واحد.
+    """
+    global_params = dict(SIDEBAR_DEFAULT_PARAMS)
+    centers = [Center(1, DEFAULT_CENTER_NAME, global_params['num_hajjaj_present'])]
+    return global_params, default_department_settings(catalog), centers, dict(DEFAULT_SALARY)
+
+# -------------------------------------------------------------------
+# 3. الحساب المتجه لجميع الإدارات (Vectorized Engine)
+# -------------------------------------------------------------------
+
+def build_department_table(user_settings, centers, catalog=None):
+    """تجهيز جدول الإدارات: مراكز الضيافة النشطة أولاً ثم باقي الإدارات بترتيب دليل الإدارات."""
+    active_centers = [c for c in centers if c['active']]
+    n_centers = len(active_centers)
+
+    # أعمدة مراكز الضيافة (تُبنى كمصفوفات مباشرة بدلاً من قائمة قواميس)
+    hosp_ratios = np.fromiter(
+        (user_settings.get(f"Hosp_Ratio_{c['id']}", DEFAULT_HOSPITALITY_RATIO) for c in active_centers),
+        dtype=np.int64, count=n_centers
+    )
+    hosp_units = np.fromiter((c['hajjaj_count'] for c in active_centers), dtype=np.int64, count=n_centers)
+
+    # صفوف الإدارات الثابتة (عددها صغير ومحدود)
+    fixed_rows = []
+    for category_name, dept in (catalog or current_catalog()).departments():
+        # إدارة أضيفت للدليل بعد تهيئة الجلسة تُحسب بقيمها الافتراضية
+        settings = user_settings.get(dept['name']) or department_defaults(dept)
+        dept_type = dept['type']
+        if settings.get('staffing_model') == QUEUE_TYPE and dept_type in QUEUE_ELIGIBLE_TYPES:
+            dept_type = QUEUE_TYPE
+        bus_count = settings.get('bus_count', 100)
+        if settings.get('bus_peaks'): # ذروات جدول الحافلات بدلاً من العدد اليومي
+            bus_count = peak_bus_units(settings['bus_peaks'], settings.get('ratio', 1))
+        fixed_rows.append((
+            dept['name'], category_name, dept_type,
+            settings.get('criterion', 'Present') == 'Present',
+            settings.get('coverage', 1),
+            settings.get('ratio', 1),
+            settings.get('time', 1),
+            settings.get('events_multiplier', 2),
+            bus_count,
+            settings.get('required_assistant_heads', 0),
+            settings.get('manager_count', 0),
+            settings.get('admin_count', 0),
+            *(settings.get(key, default) for key, default in DEFAULT_QUEUE_SETTINGS.items()),
+            settings.get('manifest_flow', np.nan),
+        ))
+    n_queue = len(DEFAULT_QUEUE_SETTINGS)
+    fixed = list(zip(*fixed_rows)) if fixed_rows else [()] * (13 + n_queue)
+
+    def column(values_hosp, values_fixed, dtype):
+        return np.concatenate([np.asarray(values_hosp, dtype=dtype), np.asarray(values_fixed, dtype=dtype)])
+
+    return pd.DataFrame({
+        "الإدارة": [c['name'] for c in active_centers] + list(fixed[0]),
+        "القسم": [HOSPITALITY_CATEGORY] * n_centers + list(fixed[1]),
+        'type': [HOSPITALITY_TYPE] * n_centers + list(fixed[2]),
+        'present': column(np.ones(n_centers, dtype=bool), fixed[3], bool),
+        'coverage': column(np.ones(n_centers), fixed[4], np.float64),
+        'ratio': column(hosp_ratios, fixed[5], np.int64),
+        'time': column(np.ones(n_centers), fixed[6], np.float64),
+        'events_multiplier': column(np.ones(n_centers, dtype=np.int64), fixed[7], np.int64),
+        'bus_count': column(np.zeros(n_centers, dtype=np.int64), fixed[8], np.int64),
+        'units': column(hosp_units, np.zeros(len(fixed_rows), dtype=np.int64), np.int64),
+        # مساعد رئيس ثابت 1 لكل وردية للضيافة
+        'required_assistant_heads': column(np.ones(n_centers, dtype=np.int64), fixed[9], np.int64),
+        'manager_count': column(np.zeros(n_centers, dtype=np.int64), fixed[10], np.int64),
+        'admin_count': column(np.zeros(n_centers, dtype=np.int64), fixed[11], np.int64),
+        **{
+            key: column(np.full(n_centers, default, dtype=np.float64), fixed[12 + i], np.float64)
+            for i, (key, default) in enumerate(DEFAULT_QUEUE_SETTINGS.items())
+        },
+        # التدفق اليومي من ملف الوصول (NaN = المعيار العام num_hajjaj_flow)
+        'flow_override': column(np.full(n_centers, np.nan), fixed[12 + n_queue], np.float64),
+    })
+
+def compute_role_arrays(table, params, overrides=None):
+    """
+    تحسب أعداد كل دور لجميع صفوف جدول الإدارات في تمريرة واحدة.
+    تقبل params قيماً مفردة أو مصفوفات قابلة للبث (broadcasting) لحساب عدة سيناريوهات معاً،
+    وتسمح overrides باستبدال أي عمود من جدول الإدارات بمصفوفة (سيناريو × إدارة).
+    """
+    overrides = overrides or {}
+
+    def column(name):
+        return np.asarray(overrides[name]) if name in overrides else table[name].to_numpy()
+
+    dept_type = table['type'].to_numpy()
+    present_mask = column('present')
+    coverage = column('coverage')
+    ratio = column('ratio')
+    time_min = column('time')
+    multiplier = column('events_multiplier')
+    bus_count = column('bus_count')
+    units = column('units')
+    required_assistant_heads = column('required_assistant_heads')
+
+    hajjaj_present = np.asarray(params['num_hajjaj_present'])
+    hajjaj_flow = np.asarray(params['num_hajjaj_flow'])
+    # التدفق من ملف الوصول يحل محل المعيار العام للإدارات التي رُفع لها ملف
+    flow_override = column('flow_override')
+    hajjaj_flow = np.where(np.isnan(flow_override), hajjaj_flow, flow_override)
+    service_days = np.asarray(params['service_days'])
+    staff_hours = np.asarray(params['staff_hours'])
+    shifts = np.asarray(params['shifts_count'])
+    reserve_factor = np.asarray(params['reserve_factor_input']) / 100
+
+    # نفس ترتيب العمليات في الدوال المفردة لضمان تطابق النتائج
+    with np.errstate(divide='ignore', invalid='ignore'):
+        actual_hajjaj = np.where(present_mask, hajjaj_present, hajjaj_flow) * coverage
+        ratio_staff = np.ceil(actual_hajjaj / ratio)
+        bus_staff = np.ceil(bus_count / ratio)
+        available_hours = service_days * staff_hours
+        time_staff = np.where(
+            available_hours > 0,
+            np.ceil(actual_hajjaj * multiplier * (time_min / 60) / available_hours),
+            0
+        )
+        # الضيافة: المتوسط اليومي للحجاج مع حد أدنى موظف واحد
+        hosp_staff = np.maximum(1, np.ceil(units / service_days / ratio))
+
+        # الطوابير: نقاط الخدمة المتزامنة (Erlang-C) على مدار اليوم موزعة على ساعات عمل الموظف
+        queue_mask = dept_type == QUEUE_TYPE
+        queue_staff = 0
+        if queue_mask.any():
+            arrivals = actual_hajjaj * column('queue_requests') / MINUTES_PER_DAY # طلب لكل دقيقة
+            agents = required_agents(
+                arrivals[..., queue_mask],
+                column('queue_handle_time')[..., queue_mask],
+                column('queue_service_level')[..., queue_mask],
+                column('queue_target_wait')[..., queue_mask],
+            )
+            queue_staff = np.zeros(np.broadcast(actual_hajjaj, staff_hours).shape)
+            queue_staff[..., queue_mask] = np.where(staff_hours > 0, np.ceil(agents * TOTAL_WORK_HOURS / staff_hours), 0)
+
+    basic = np.select(
+        [dept_type == 'Ratio', dept_type == 'Bus_Ratio', dept_type == 'Time', dept_type == HOSPITALITY_TYPE, dept_type == QUEUE_TYPE],
+        [ratio_staff, bus_staff, time_staff, hosp_staff, queue_staff],
+        default=0
+    ).astype(np.int64)
+
+    # الهيكل القيادي (مكافئ لـ distribute_staff)
+    has_leadership = (basic != 0) | (required_assistant_heads != 0)
+    manual = dept_type == 'Manual_HR'
+    roles = {
+        "رئيس": has_leadership.astype(np.int64),
+        "مساعد رئيس": np.where(has_leadership, required_assistant_heads * shifts, 0),
+        "مشرف فترة": np.where(has_leadership, SUPERVISORS_PER_SHIFT * shifts, 0),
+        "مقدم خدمة": np.where(manual, 0, basic),
+        "مدير": np.where(manual, column('manager_count'), 0),
+        "اداري": np.where(manual, column('admin_count'), 0),
+    }
+    total_staff_in_hierarchy = sum(roles.values())
+    roles[TOTAL_COLUMN] = np.ceil(total_staff_in_hierarchy * (1 + reserve_factor)).astype(np.int64)
+    return roles
+
+def plan_frame(table, roles):
+    """بناء جدول النتائج الموحد (الإدارة في الصفوف) بنفس أعمدة وترتيب الصفحة الموحدة."""
+    manual = (table['type'] == 'Manual_HR').to_numpy()
+    # الأدوار غير المنطبقة تظهر فارغة: مقدم خدمة لـ Manual_HR، ومدير/اداري لغيرها
+    applies = {"مقدم خدمة": ~manual, "مدير": manual, "اداري": manual}
+
+    columns = {"القسم": table["القسم"].to_numpy()}
+    for role, values in roles.items():
+        mask = applies.get(role)
+        if mask is None or mask.all():
+            columns[role] = values
+        elif mask.any():
+            columns[role] = np.where(mask, values, np.nan)
+
+    df = pd.DataFrame(columns, index=pd.Index(table["الإدارة"], name="الإدارة"))
+    return df[[col for col in RESULT_COLUMN_ORDER if col in df.columns]]
+
+def plan_records(df):
+    """تحويل جدول النتائج إلى قائمة قواميس (نفس صيغة all_results المستخدمة في الميزانية)."""
+    role_columns = [col for col in df.columns if col in DEFAULT_SALARY]
+    values = df[role_columns].to_numpy()
+    records = []
+    for name, category, row, total in zip(df.index, df["القسم"], values, df[TOTAL_COLUMN]):
+        entry = {"الإدارة": name, "القسم": category}
+        entry.update({role: int(v) for role, v in zip(role_columns, row) if v == v}) # v == v يستبعد NaN
+        entry[TOTAL_COLUMN] = int(total)
+        records.append(entry)
+    return records
+
+def hospitality_groups(table):
+    """مراكز الضيافة تُجمع في صف واحد، وباقي الإدارات كل منها صف مستقل. تعيد (عدد المراكز، أسماء الصفوف)."""
+    n_hosp = int((table['type'] == HOSPITALITY_TYPE).sum())
+    names = ([HOSPITALITY_CATEGORY] if n_hosp else []) + list(table["الإدارة"].iloc[n_hosp:])
+    return n_hosp, names
+
+def group_hospitality(values, n_hosp):
+    """جمع أعمدة مراكز الضيافة (وهي أول الصفوف في جدول الإدارات) في عمود واحد على المحور الأخير."""
+    if not n_hosp:
+        return values
+    return np.concatenate([values[..., :n_hosp].sum(axis=-1, keepdims=True), values[..., n_hosp:]], axis=-1)
+
+def compute_unified_plan(global_params, user_settings, centers, salaries=None):
+    """
+    تحسب خطة القوى العاملة الموحدة لجميع الإدارات ومراكز الضيافة.
+    تعيد قاموساً يحتوي جدول النتائج والإجماليات وقيمة الميزانية
+    (قائمة النتائج التفصيلية تُشتق من الجدول عند الحاجة عبر plan_records حتى لا تُخزن النتائج مرتين).
+    """
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+
+    table = build_department_table(user_settings, centers)
+    roles = compute_role_arrays(table, global_params)
+    df = plan_frame(table, roles)
+
+    # إجمالي الموظفين لكل دور (بدون احتياط) لحساب الميزانية
+    total_staff_per_role = {role: int(roles[role].sum()) for role in DEFAULT_SALARY}
+
+    return {
+        'df': df,
+        'total_staff_needed': int(roles[TOTAL_COLUMN].sum()),
+        'total_staff_per_role': total_staff_per_role,
+        'total_project_cost': plan_cost(total_staff_per_role, salaries),
+    }
+
+# -------------------------------------------------------------------
+# 4. إعادة الحساب التزايدي (Incremental Recomputation)
+# -------------------------------------------------------------------
+
+# مخطط الاعتماديات: كل مُدخل وما يعتمد عليه من المخرجات
+# - الإعدادات العامة  → جميع الصفوف
+# - إعدادات الإدارة / بيانات المركز → صف الإدارة أو المركز فقط
+# - اسم الإدارة أو المركز → اسم الصف فقط (بدون إعادة حساب)
+# - المكافآت → التكلفة فقط (بدون إعادة حساب أي صف)
+ROW_INPUT_COLUMNS = [
+    'type', 'present', 'coverage', 'ratio', 'time', 'events_multiplier', 'bus_count', 'units',
+    'required_assistant_heads', 'manager_count', 'admin_count', *DEFAULT_QUEUE_SETTINGS, 'flow_override',
+]
+ROLE_OUTPUTS = list(DEFAULT_SALARY) + [TOTAL_COLUMN]
+
+def department_row_keys(centers, catalog=None):
+    """مفاتيح ثابتة لصفوف جدول الإدارات (معرف المركز للضيافة، واسم الإدارة لغيرها)."""
+    keys = [f"{HOSPITALITY_TYPE}:{c['id']}" for c in centers if c['active']]
+    keys.extend(dept['name'] for _, dept in (catalog or current_catalog()).departments())
+    return keys
+
+class IncrementalPlan:
+    """
+    خطة موحدة تحتفظ بآخر مدخلاتها ونتائجها، وتعيد حساب الصفوف المتغيرة فقط عند كل تحديث
+    ثم تُحدّث إجماليات الأدوار والميزانية بالفرق بدلاً من إعادة الجمع.
+    (نسخة لكل جلسة؛ النتيجة المعادة جديدة في كل تحديث ويمكن مشاركتها.)
+    """
+
+    def __init__(self):
+        self.params = None
+        self.keys = None
+        self.table = None
+        self.roles = None
+        self.totals = None
+        self.last_stats = {'rows': 0, 'recomputed': 0}
+
+    def update(self, global_params, user_settings, centers, salaries=None):
+        """نفس مخرجات compute_unified_plan مع إعادة حساب الصفوف المتأثرة فقط."""
+        if salaries is None:
+            salaries = dict(DEFAULT_SALARY)
+
+        params = {key: global_params.get(key, default) for key, default in DEFAULT_GLOBAL_PARAMS.items()}
+        catalog = current_catalog() # نفس الدليل للمفاتيح والجدول حتى لو أعيد تحميله أثناء التحديث
+        keys = department_row_keys(centers, catalog)
+        table = build_department_table(user_settings, centers, catalog)
+        n_rows = len(table)
+
+        # مطابقة الصفوف الجديدة مع السابقة عبر المفاتيح (-1 = صف جديد)
+        if self.table is None or params != self.params:
+            old_pos = np.full(n_rows, -1)
+        elif keys == self.keys:
+            old_pos = np.arange(n_rows)
+        else:
+            old_pos = pd.Index(self.keys).get_indexer(keys)
+
+        matched = old_pos >= 0
+        dirty = ~matched
+        if matched.any():
+            for col in ROW_INPUT_COLUMNS:
+                old_values = self.table[col].to_numpy()[old_pos[matched]]
+                new_values = table[col].to_numpy()[matched]
+                dirty[matched] |= (old_values != new_values) & ~(pd.isna(old_values) & pd.isna(new_values))
+
+        # الصفوف غير المتأثرة تُنسخ من النتائج السابقة، والمتأثرة فقط تُحسب
+        dirty_idx = np.flatnonzero(dirty)
+        fresh = compute_role_arrays(table.iloc[dirty_idx], params) if len(dirty_idx) else None
+        roles = {}
+        for role in ROLE_OUTPUTS:
+            values = np.zeros(n_rows, dtype=np.int64)
+            if matched.any():
+                values[matched] = self.roles[role][old_pos[matched]]
+            if fresh is not None:
+                values[dirty_idx] = np.broadcast_to(fresh[role], len(dirty_idx))
+            roles[role] = values
+
+        # الإجماليات: تحديث بالفرق عندما تبقى الصفوف نفسها، وإلا يُعاد الجمع
+        if self.totals is not None and keys == self.keys and params == self.params:
+            totals = {
+                role: self.totals[role] + int(roles[role][dirty_idx].sum()) - int(self.roles[role][dirty_idx].sum())
+                for role in ROLE_OUTPUTS
+            }
+        else:
+            totals = {role: int(roles[role].sum()) for role in ROLE_OUTPUTS}
+
+        df = plan_frame(table, roles)
+
+        self.params, self.keys, self.table = params, keys, table
+        self.roles, self.totals = roles, totals
+        self.last_stats = {'rows': n_rows, 'recomputed': len(dirty_idx)}
+
+        # المكافآت تؤثر على التكلفة فقط
+        total_staff_per_role = {role: totals[role] for role in DEFAULT_SALARY}
+        return {
+            'df': df,
+            'total_staff_needed': totals[TOTAL_COLUMN],
+            'total_staff_per_role': total_staff_per_role,
+            'total_project_cost': plan_cost(total_staff_per_role, salaries),
+        }
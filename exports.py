@@ -0,0 +1,262 @@
+"""
+تصدير النتائج إلى Excel (Excel Exports)
+دوال توليد ملفات Excel للقوى العاملة والميزانية والمركبات دون الاعتماد على Streamlit،
+مع ذاكرة مشتركة مفتاحها بصمة محتوى النتائج حتى لا يُعاد توليد ملف لم تتغير بياناته.
+"""
+from io import BytesIO
+import numbers
+import tempfile
+
+import pandas as pd
+import xlsxwriter
+
+from engine import DEFAULT_SALARY
+from cache import EXPORT_CACHE, frame_hash, stable_hash
+from budget import BUDGET_ROLES, Budget
+from cashflow import DEFAULT_ACCRUAL_SETTINGS, AccrualSchedule, cash_flow, phase_costs
+
+def to_excel(df):
+    """تحويل DataFrame إلى ملف Excel في الذاكرة."""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=True, sheet_name='احتياج القوى العاملة')
+    processed_data = output.getvalue()
+    return processed_data
+
+# **تم تحديث الدالة لإنشاء جدول الميزانية التفصيلي حسب الإدارة**
+def generate_detailed_budget_excel(all_results, service_days, is_all_page=True, dept_name_single=None, salaries=None, accrual=None): 
+    """توليد بيانات الميزانية الإجمالية (تفاصيل الإدارات) أو الفردية، مع التدفق النقدي اليومي على مدة الخدمة."""
+    
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    
+    if is_all_page:
+        # 1. تجهيز بيانات التفاصيل (الإدارة في الصفوف) للصفحة الموحدة: التكاليف دفعة واحدة من مصفوفة الأعداد
+        budget = Budget.from_records(all_results)
+        df_detailed_budget = pd.DataFrame(dict(zip(BUDGET_DETAIL_COLUMNS, budget.detail(salaries))))
+        
+        # 2. تجهيز ملخص الإجمالي الكلي
+        final_total_project_cost = df_detailed_budget["التكلفة الإجمالية (ريال)"].sum().item()
+        total_staff_count = df_detailed_budget["العدد المطلوب"].sum().item()
+        
+        # 3. كتابة الملف
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            # جدول التفاصيل
+            df_detailed_budget.to_excel(
+                writer, 
+                index=False, 
+                sheet_name='تفاصيل_ميزانية_الإدارات',
+                columns=["الإدارة", "الرتبة الوظيفية", "العدد المطلوب", "متوسط المكافأة (ريال)", "التكلفة الإجمالية (ريال)"]
+            ) 
+            
+            # جدول الملخص 
+            summary_rows = [
+                ("إجمالي تكلفة المكافآت (ريال)", final_total_project_cost),
+                ("إجمالي الموظفين في الهيكل القيادي", total_staff_count),
+                *accrual_summary_rows(budget, service_days, salaries, accrual),
+            ]
+            summary_data = {
+                "البيان": [label for label, _ in summary_rows],
+                "القيمة": [value for _, value in summary_rows]
+            }
+            df_summary = pd.DataFrame(summary_data)
+            df_summary.to_excel(writer, startrow=1, startcol=1, index=False, sheet_name='ملخص_الميزانية')
+            
+            # التدفق النقدي اليومي (تدريب، خدمة، ما بعد الموسم)
+            budget_cash_flow(budget, service_days, salaries, accrual).to_excel(writer, sheet_name=CASH_FLOW_SHEET)
+            
+        return output.getvalue()
+    
+    else: # الصفحة الفردية
+        # 1. تجهيز بيانات التفاصيل (للإدارة الواحدة؛ all_results هنا هو توزيع الأدوار المترجم)
+        budget = Budget.from_records([all_results])
+        detail = budget.detail(salaries)
+        df_budget = pd.DataFrame(dict(zip(BUDGET_DETAIL_COLUMNS[1:], detail[1:])))
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            df_budget.to_excel(
+                writer, 
+                index=False, 
+                sheet_name=f'ميزانية_{dept_name_single}',
+                columns=["الرتبة الوظيفية", "العدد المطلوب", "متوسط المكافأة (ريال)", "التكلفة الإجمالية (ريال)"]
+            ) 
+            budget_cash_flow(budget, service_days, salaries, accrual).to_excel(writer, sheet_name=CASH_FLOW_SHEET)
+        return output.getvalue()
+
+
+# تم تحديث الدالة to_excel_budget لتوجيه البيانات بشكل صحيح
+def to_excel_budget(data_for_budget, service_days, is_all_page=True, dept_name_single=None, salaries=None, accrual=None):
+    """نقطة دخول لتحويل بيانات الميزانية إلى Excel."""
+    return generate_detailed_budget_excel(data_for_budget, service_days, is_all_page, dept_name_single, salaries, accrual)
+
+CASH_FLOW_SHEET = 'التدفق_النقدي_اليومي'
+
+def budget_cash_flow(budget, service_days, salaries=None, accrual=None):
+    """جدول التدفق النقدي اليومي لكامل الموسم (مقرباً لهللتين) لورقة Excel."""
+    return cash_flow(budget, AccrualSchedule(service_days, budget.effective_salaries(salaries), accrual)).round(2)
+
+def accrual_summary_rows(budget, service_days, salaries=None, accrual=None):
+    """
+    صفوف مطابقة ملخص الميزانية مع التدفق النقدي عند وجود أيام تدريب أو ما بعد الموسم:
+    تكلفة كل مرحلة والإجمالي (يساوي آخر قيمة تراكمية في ورقة التدفق النقدي). بدونها لا صفوف إضافية.
+    """
+    costs = phase_costs(budget, AccrualSchedule(service_days, budget.effective_salaries(salaries), accrual))
+    if not costs['training'] and not costs['post']:
+        return []
+    return [
+        ("تكلفة موسم الخدمة (ريال)", round(costs['service'], 2)),
+        ("تكلفة التدريب قبل الانتشار (ريال)", round(costs['training'], 2)),
+        ("تكلفة ما بعد الموسم (ريال)", round(costs['post'], 2)),
+        ("إجمالي التكلفة مع التدريب وما بعد الموسم (ريال)", round(sum(costs.values()), 2)),
+    ]
+
+# -------------------------------------------------------------------
+# التصدير المتدفق بذاكرة ثابتة (للخطط الكبيرة جداً)
+# -------------------------------------------------------------------
+
+# حجم الملف الناتج الذي يبقى في الذاكرة، وما يتجاوزه يُكتب في ملف مؤقت على القرص
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+BUDGET_CHUNK_ROWS = 4096 # عدد الإدارات التي تُحوَّل صفوفها معاً أثناء الكتابة المتدفقة
+
+BUDGET_DETAIL_COLUMNS = ["الإدارة", "الرتبة الوظيفية", "العدد المطلوب", "متوسط المكافأة (ريال)", "التكلفة الإجمالية (ريال)"]
+
+def _write_cell(worksheet, row, col, value):
+    """كتابة خلية واحدة (القيم الفارغة و NaN تُترك فارغة كما في pandas)."""
+    if value is None:
+        return
+    if isinstance(value, bool):
+        worksheet.write_boolean(row, col, value)
+    elif isinstance(value, numbers.Number):
+        if value == value: # استبعاد NaN
+            worksheet.write_number(row, col, value)
+    else:
+        worksheet.write_string(row, col, str(value))
+
+def _write_streaming_workbook(target, write_sheets):
+    """فتح مصنف xlsxwriter بوضع الذاكرة الثابتة (constant_memory) وكتابة الأوراق ثم إغلاقه."""
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    try:
+        write_sheets(workbook)
+    finally:
+        workbook.close()
+
+def _stream_to(path, write_sheets):
+    """الكتابة إلى مسار ملف إن وُجد، وإلا إلى ملف مؤقت (يبقى في الذاكرة حتى SPOOL_MAX_BYTES) وإرجاع البيانات."""
+    if path is not None:
+        _write_streaming_workbook(path, write_sheets)
+        return path
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        _write_streaming_workbook(spool, write_sheets)
+        spool.seek(0)
+        return spool.read()
+
+def stream_frame_excel(df, sheet_name='احتياج القوى العاملة', path=None):
+    """نفس to_excel (مع الفهرس) لكن بالكتابة المتدفقة صفاً بصف."""
+    def write_sheets(workbook):
+        worksheet = workbook.add_worksheet(sheet_name)
+        _write_cell(worksheet, 0, 0, df.index.name)
+        for col, name in enumerate(df.columns, start=1):
+            _write_cell(worksheet, 0, col, name)
+        for row, values in enumerate(df.itertuples(index=True, name=None), start=1):
+            for col, value in enumerate(values):
+                _write_cell(worksheet, row, col, value)
+    return _stream_to(path, write_sheets)
+
+def _as_budget(all_results):
+    return all_results if isinstance(all_results, Budget) else Budget.from_records(all_results)
+
+def iter_budget_rows(all_results, salaries=None, chunk_rows=BUDGET_CHUNK_ROWS):
+    """
+    مولد صفوف الميزانية التفصيلية (إدارة، رتبة، عدد، مكافأة، تكلفة) للأعداد الموجبة من مصفوفة الأعداد،
+    دفعة من الإدارات في كل مرة حتى لا تُبنى أعمدة التفاصيل كاملة (all_results قائمة نتائج أو Budget).
+    """
+    budget = _as_budget(all_results)
+    for start in range(0, len(budget.departments), chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        names = budget.departments[rows].tolist()
+        chunk_salaries = budget.row_salaries(salaries, rows) # مكافآت كل إدارة (ملف قسمها إن وُجد)
+        for name, counts, salary in zip(names, budget.counts[rows].tolist(), chunk_salaries):
+            for role, staff_count, salary_or_reward in zip(BUDGET_ROLES, counts, salary.tolist()):
+                if staff_count > 0:
+                    yield name, role, staff_count, salary_or_reward, staff_count * salary_or_reward
+
+def stream_budget_excel(all_results, service_days, salaries=None, path=None, accrual=None):
+    """نفس ميزانية الصفحة الموحدة (generate_detailed_budget_excel) لكن بالكتابة المتدفقة (all_results قائمة نتائج أو Budget)."""
+    budget = _as_budget(all_results)
+    def write_sheets(workbook):
+        details = workbook.add_worksheet('تفاصيل_ميزانية_الإدارات')
+        summary = workbook.add_worksheet('ملخص_الميزانية')
+        cash = workbook.add_worksheet(CASH_FLOW_SHEET)
+        
+        # جدول التفاصيل صفاً بصف من المولد، والإجماليات من مصفوفة الأعداد مباشرة
+        final_total_project_cost = budget.total_cost(salaries)
+        total_staff_count = int(budget.counts.sum())
+        for col, name in enumerate(BUDGET_DETAIL_COLUMNS):
+            _write_cell(details, 0, col, name)
+        for row, values in enumerate(iter_budget_rows(budget, salaries), start=1):
+            for col, value in enumerate(values):
+                _write_cell(details, row, col, value)
+        
+        # جدول الملخص (نفس الموضع: الصف 2 والعمود B)
+        summary_rows = [
+            ("البيان", "القيمة"),
+            ("إجمالي تكلفة المكافآت (ريال)", final_total_project_cost),
+            ("إجمالي الموظفين في الهيكل القيادي", total_staff_count),
+            *accrual_summary_rows(budget, service_days, salaries, accrual),
+        ]
+        for row, values in enumerate(summary_rows, start=1):
+            for col, value in enumerate(values, start=1):
+                _write_cell(summary, row, col, value)
+        
+        # التدفق النقدي اليومي (يوم لكل صف؛ عدد الأيام صغير)
+        flow = budget_cash_flow(budget, service_days, salaries, accrual)
+        _write_cell(cash, 0, 0, flow.index.name)
+        for col, name in enumerate(flow.columns, start=1):
+            _write_cell(cash, 0, col, name)
+        for row, values in enumerate(flow.itertuples(index=True, name=None), start=1):
+            for col, value in enumerate(values):
+                _write_cell(cash, row, col, value)
+    return _stream_to(path, write_sheets)
+
+# -------------------------------------------------------------------
+# التوليد المؤجل مع الذاكرة المشتركة (يُستدعى عند الضغط على زر التحميل فقط)
+# -------------------------------------------------------------------
+
+def manpower_excel_key(df):
+    return ('manpower', frame_hash(df))
+
+def _accrual_key(accrual):
+    return {**DEFAULT_ACCRUAL_SETTINGS, **(accrual or {})}
+
+def plan_budget_excel_key(df, service_days, salaries, accrual=None):
+    return ('plan_budget', frame_hash(df), stable_hash([service_days, salaries, _accrual_key(accrual)]))
+
+def cached_manpower_excel(df):
+    """ملف جدول الاحتياج من الذاكرة أو توليده إذا تغيرت بيانات الجدول."""
+    return EXPORT_CACHE.get_or_compute(manpower_excel_key(df), lambda: stream_frame_excel(df))
+
+def cached_budget_excel(data_for_budget, service_days, is_all_page=True, dept_name_single=None, salaries=None, accrual=None):
+    """ملف الميزانية من الذاكرة أو توليده إذا تغيرت النتائج أو المكافآت أو إعدادات الاستحقاق."""
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    key = ('budget', stable_hash([data_for_budget, service_days, is_all_page, dept_name_single, salaries, _accrual_key(accrual)]))
+    if is_all_page:
+        # الميزانية الموحدة قد تصل لعشرات الآلاف من الصفوف: كتابة متدفقة
+        build = lambda: stream_budget_excel(data_for_budget, service_days, salaries, accrual=accrual)
+    else:
+        build = lambda: to_excel_budget(data_for_budget, service_days, is_all_page, dept_name_single, salaries, accrual)
+    return EXPORT_CACHE.get_or_compute(key, build)
+
+def cached_plan_budget_excel(df, service_days, salaries=None, accrual=None):
+    """ميزانية الصفحة الموحدة من جدول الخطة مباشرة (مصفوفة الأعداد تُبنى عند التوليد فقط)."""
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    key = plan_budget_excel_key(df, service_days, salaries, accrual)
+    return EXPORT_CACHE.get_or_compute(
+        key, lambda: stream_budget_excel(Budget.from_frame(df), service_days, salaries, accrual=accrual)
+    )
+
+def cached_vehicle_excel(df):
+    """ملف نتائج المركبات من الذاكرة أو توليده إذا تغيرت النتائج."""
+    return EXPORT_CACHE.get_or_compute(('vehicles', frame_hash(df)), lambda: stream_frame_excel(df, 'احتياج المركبات'))
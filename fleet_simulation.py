@@ -0,0 +1,182 @@
+"""
+محاكاة الأسطول بالأحداث المتقطعة (Discrete-Event Fleet Simulation)
+تتحقق من حجم أسطول المركبات بمحاكاة يوم عمل: زيارات المواقع تصدر على مدار الوردية ولكل زيارة نافذة زمنية،
+وأول مركبة تتفرغ تُرسل للزيارة الأقرب انتهاءً بزمن رحلة وخدمة عشوائي، والزيارة التي تتجاوز نافذتها تفوت.
+
+النافذة متساوية لجميع الزيارات، لذلك ترتيب الأقرب انتهاءً هو نفسه ترتيب الطلب، وتصبح أحداث اليوم
+معادلة تكرارية على أوقات تفرغ المركبات تُنفذ زيارة بعد زيارة لآلاف الأيام المحاكاة معاً (مصفوفات NumPy)،
+وتوزع الأيام على أنوية المعالج عبر مجمع العمليات المشترك.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from simulation import get_executor
+
+DEFAULT_FLEET_SETTINGS = {
+    'window_hr': 1.0, # أقصى انتظار للزيارة من وقت طلبها حتى إرسال مركبة
+    'service_cv': 0.3, # معامل اختلاف وقت الخدمة
+    'travel_cv': 0.3, # معامل اختلاف وقت الرحلة
+    'replications': 2_000,
+    'max_fleet': 200,
+    'max_missed_pct': 0.0, # نسبة الزيارات الفائتة المسموحة في اليوم
+    'reliability': 0.95, # نسبة الأيام المحاكاة التي يجب أن تحقق الهدف
+}
+DENSE_FLEET_SIZES = 20 # كل الأحجام حتى هذا العدد، ثم أحجام متباعدة حتى الحد الأعلى
+MAX_CURVE_POINTS = 40
+MAX_LANE_CELLS = 2_000_000 # الحد الأعلى لخلايا (يوم × مركبة) في الدفعة الواحدة
+MIN_REPLICATIONS_PER_TASK = 250
+MAX_TASKS = 64
+
+UTILIZATION_LABEL = "متوسط نسبة الاستخدام"
+MISSED_LABEL = "متوسط الزيارات الفائتة"
+TARGET_LABEL = "نسبة الأيام المحققة للهدف"
+
+def _gamma(rng, mean, cv, size):
+    """أزمنة موجبة بمتوسط mean ومعامل اختلاف cv (توزيع جاما؛ cv = 0 يعني زمناً ثابتاً)."""
+    if cv <= 0:
+        return np.full(size, float(mean))
+    shape = 1 / cv**2
+    return rng.gamma(shape, mean / shape, size)
+
+def sample_days(rng, vehicle_settings, fleet_settings, days):
+    """
+    زيارات عدة أيام (يوم × زيارة) مرتبة بوقت الطلب: (وقت الطلب، آخر وقت للإرسال، مدة انشغال المركبة).
+    زيارات كل موقع موزعة بالتساوي على الوردية مع إزاحة عشوائية لكل موقع في كل يوم.
+    """
+    n_sites = int(vehicle_settings['num_sites'])
+    visits = int(vehicle_settings['visits_per_site_day'])
+    horizon = float(vehicle_settings['vehicle_shift_hr'])
+    phase = rng.random((days, n_sites, 1))
+    release = np.sort(((np.arange(visits)[None, None, :] + phase) * horizon / visits).reshape(days, -1), axis=1)
+    size = release.shape
+    duration = (
+        _gamma(rng, vehicle_settings['service_time_hr'], fleet_settings['service_cv'], size)
+        + _gamma(rng, vehicle_settings['travel_time_hr'], fleet_settings['travel_cv'], size)
+    )
+    return release, release + fleet_settings['window_hr'], duration
+
+def simulate_days(release, deadline, duration, fleet, horizon):
+    """
+    محاكاة عدة أيام بأسطول fleet: لكل زيارة بالترتيب تُرسل أول مركبة تتفرغ عند max(وقت الطلب، وقت التفرغ)،
+    ما لم يتجاوز ذلك نافذة الزيارة أو نهاية الوردية فتُحسب فائتة.
+    تعيد لكل يوم: الزيارات الفائتة، ساعات الانشغال داخل الوردية، وهل انتظرت أي زيارة.
+    """
+    days, n_visits = release.shape
+    # زيارة بعد زيارة: أعمدة متجاورة في الذاكرة، والإرسال بعد نهاية الوردية غير مسموح
+    release, duration = np.ascontiguousarray(release.T), np.ascontiguousarray(duration.T)
+    deadline = np.ascontiguousarray(np.minimum(deadline, horizon).T)
+    free_at = np.zeros((days, fleet))
+    flat = free_at.reshape(-1)
+    row_start = np.arange(days) * fleet
+    missed = np.zeros(days, dtype=np.int64)
+    busy = np.zeros(days)
+    waited = np.zeros(days, dtype=bool)
+    for j in range(n_visits):
+        slot = row_start + free_at.argmin(axis=1)
+        dispatch = np.maximum(release[j], flat[slot])
+        served = dispatch <= deadline[j]
+        flat[slot] = np.where(served, dispatch + duration[j], flat[slot])
+        busy += served * np.minimum(duration[j], horizon - dispatch) # الانشغال داخل الوردية فقط
+        missed += ~served
+        waited |= dispatch > release[j]
+    return missed, busy, waited | (missed > 0)
+
+def fleet_sizes(max_fleet):
+    """أحجام الأسطول في المنحنى: كل الأحجام الصغيرة ثم أحجام متباعدة حتى الحد الأعلى."""
+    dense = np.arange(1, min(max_fleet, DENSE_FLEET_SIZES) + 1)
+    if max_fleet <= DENSE_FLEET_SIZES:
+        return dense
+    sparse = np.linspace(DENSE_FLEET_SIZES, max_fleet, MAX_CURVE_POINTS - DENSE_FLEET_SIZES + 1)[1:]
+    return np.unique(np.concatenate([dense, np.rint(sparse).astype(np.int64)]))
+
+def _simulate_replications(task):
+    """
+    مجموعة أيام محاكاة لكل حجم أسطول (نفس الأيام لكل حجم لعدالة المقارنة).
+    اليوم الذي خُدمت جميع زياراته لحظة طلبها يعطي نفس النتيجة مع أي أسطول أكبر، فلا يُعاد حسابه.
+    """
+    vehicle_settings, fleet_settings, sizes, seed, replications = task
+    rng = np.random.default_rng(seed)
+    horizon = float(vehicle_settings['vehicle_shift_hr'])
+    release, deadline, duration = sample_days(rng, vehicle_settings, fleet_settings, replications)
+    missed = np.zeros((replications, len(sizes)), dtype=np.int64)
+    busy = np.zeros((replications, len(sizes)))
+    active = np.arange(replications) # الأيام التي لم تصل بعد إلى حجم بدون انتظار
+    for i, fleet in enumerate(sizes):
+        if not active.size:
+            busy[:, i:] = busy[:, i - 1:i]
+            break
+        if i:
+            busy[:, i] = busy[:, i - 1]
+        batch = max(1, MAX_LANE_CELLS // int(fleet))
+        still_waiting = []
+        for start in range(0, active.size, batch):
+            days = active[start:start + batch]
+            day_missed, day_busy, waited = simulate_days(release[days], deadline[days], duration[days], int(fleet), horizon)
+            missed[days, i], busy[days, i] = day_missed, day_busy
+            still_waiting.append(days[waited])
+        active = np.concatenate(still_waiting)
+    return missed, busy
+
+def fleet_curve(vehicle_settings, fleet_settings=None, workers=None, seed=None):
+    """
+    منحنى الأسطول من المحاكاة لأحجام من 1 إلى max_fleet، وأقل أسطول يحقق الهدف
+    (نسبة الأيام التي لا تتجاوز فيها الزيارات الفائتة max_missed_pct ≥ reliability).
+    """
+    fleet_settings = {**DEFAULT_FLEET_SETTINGS, **(fleet_settings or {})}
+    replications = int(fleet_settings['replications'])
+    max_fleet = int(fleet_settings['max_fleet'])
+    if replications < 1 or max_fleet < 1:
+        raise ValueError("عدد التكرارات والحد الأعلى للأسطول يجب أن يكونا 1 على الأقل.")
+    if vehicle_settings['vehicle_shift_hr'] <= 0:
+        raise ValueError("ساعات عمل المركبة يجب أن تكون أكبر من صفر.")
+    workers = max(1, workers or os.cpu_count() or 1)
+    n_visits = int(vehicle_settings['num_sites']) * int(vehicle_settings['visits_per_site_day'])
+    horizon = float(vehicle_settings['vehicle_shift_hr'])
+    allowed_missed = n_visits * fleet_settings['max_missed_pct'] / 100
+
+    # نفس تقسيم المهام والبذور بغض النظر عن عدد العمليات حتى تتطابق النتائج لنفس البذرة
+    n_tasks = max(1, min(MAX_TASKS, replications // MIN_REPLICATIONS_PER_TASK))
+    task_sizes = [replications // n_tasks + (1 if i < replications % n_tasks else 0) for i in range(n_tasks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+
+    def run(sizes):
+        tasks = [(dict(vehicle_settings), fleet_settings, sizes, s, n) for s, n in zip(seeds, task_sizes)]
+        if workers == 1 or n_tasks == 1:
+            parts = [_simulate_replications(task) for task in tasks]
+        else:
+            parts = list(get_executor(workers).map(_simulate_replications, tasks))
+        return tuple(np.concatenate(p) for p in zip(*parts))
+
+    sizes = fleet_sizes(max_fleet)
+    missed, busy = run(sizes)
+
+    # أقل أسطول يحقق الهدف بدقة مركبة واحدة: بحث ثنائي بين الحجمين المتجاورين في المنحنى (نفس الأيام)،
+    # والأحجام المحسوبة أثناء البحث تُضاف إلى المنحنى
+    reached = np.flatnonzero((missed <= allowed_missed).mean(axis=0) >= fleet_settings['reliability'])
+    min_fleet = None
+    if len(reached):
+        low, high = (int(sizes[reached[0] - 1]) if reached[0] else 0), int(sizes[reached[0]])
+        while high - low > 1:
+            middle = (low + high) // 2
+            middle_missed, middle_busy = run(np.array([middle]))
+            sizes = np.append(sizes, middle)
+            missed, busy = np.hstack([missed, middle_missed]), np.hstack([busy, middle_busy])
+            if (middle_missed[:, 0] <= allowed_missed).mean() >= fleet_settings['reliability']:
+                high = middle
+            else:
+                low = middle
+        min_fleet = high
+
+    curve = pd.DataFrame({
+        UTILIZATION_LABEL: (busy / (sizes * horizon)).mean(axis=0),
+        MISSED_LABEL: missed.mean(axis=0),
+        TARGET_LABEL: (missed <= allowed_missed).mean(axis=0),
+    }, index=pd.Index(sizes, name="عدد المركبات")).sort_index()
+    return {
+        'curve': curve,
+        'min_fleet': min_fleet,
+        'replications': replications,
+        'visits_per_day': n_visits,
+    }
@@ -0,0 +1,140 @@
+"""
+بيانات الوصول (Arrival Manifests)
+قراءة ملفات الرحلات والقطارات والمنافذ البرية (CSV قد يحتوي ملايين الصفوف) على دفعات دون تحميلها كاملة،
+وتجميعها إلى أعداد وصول بالساعة لكل إدارة استقبال لتغذية حساب الاحتياج.
+"""
+import numpy as np
+import pandas as pd
+
+RECEPTION_DEPARTMENTS = ["استقبال المطار", "استقبال القطار", "استقبال الهجرة"]
+MANIFEST_CHUNK_ROWS = 500_000
+
+# المسميات المقبولة لكل عمود (عربي/إنجليزي)
+MANIFEST_COLUMN_ALIASES = {
+    'timestamp': ["timestamp", "arrival_time", "datetime", "time", "وقت الوصول", "التاريخ والوقت", "الوقت"],
+    'passengers': ["passengers", "passenger_count", "pax", "count", "عدد الركاب", "عدد الحجاج", "العدد"],
+    'department': ["department", "mode", "type", "الإدارة", "المنفذ", "نوع الوصول"],
+}
+
+# قيم عمود المنفذ وما يقابلها من إدارات الاستقبال
+MODE_ALIASES = {
+    "استقبال المطار": ["استقبال المطار", "المطار", "مطار", "جوي", "air", "airport", "flight"],
+    "استقبال القطار": ["استقبال القطار", "القطار", "قطار", "train", "rail"],
+    "استقبال الهجرة": ["استقبال الهجرة", "الهجرة", "بري", "منفذ بري", "border", "land", "immigration"],
+}
+_MODE_LOOKUP = {
+    alias.lower(): RECEPTION_DEPARTMENTS.index(dept) for dept, aliases in MODE_ALIASES.items() for alias in aliases
+}
+
+def _match_manifest_columns(columns):
+    normalized = {str(col).strip().lower(): col for col in columns}
+    mapping = {}
+    for field, aliases in MANIFEST_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in normalized:
+                mapping[field] = normalized[alias.lower()]
+                break
+    if 'timestamp' not in mapping:
+        raise ValueError(f"عمود وقت الوصول غير موجود في الملف: {' / '.join(MANIFEST_COLUMN_ALIASES['timestamp'][:4])}")
+    return mapping
+
+def _aggregate_chunk(chunk, mapping, default_code):
+    """مجموع الركاب لكل (ساعة، إدارة) في دفعة واحدة كسلسلة مفتاحها ساعة × عدد الإدارات + رمز الإدارة."""
+    n_depts = len(RECEPTION_DEPARTMENTS)
+    timestamps = pd.to_datetime(chunk[mapping['timestamp']], errors='coerce')
+    valid = timestamps.notna().to_numpy().copy()
+    hours = timestamps.to_numpy(dtype='datetime64[h]').astype(np.int64)
+
+    if 'passengers' in mapping:
+        passengers = pd.to_numeric(chunk[mapping['passengers']], errors='coerce').to_numpy(dtype=np.float64)
+        valid &= ~np.isnan(passengers)
+    else:
+        passengers = np.ones(len(chunk)) # كل صف راكب واحد
+
+    if 'department' in mapping:
+        codes = chunk[mapping['department']].astype('string').str.strip().str.lower().map(_MODE_LOOKUP)
+        codes = codes.to_numpy(dtype=np.float64, na_value=np.nan)
+        matched = ~np.isnan(codes)
+        unmatched = int((valid & ~matched).sum())
+        valid &= matched
+        codes = np.where(matched, codes, 0).astype(np.int64)
+    else:
+        codes = np.full(len(chunk), default_code, dtype=np.int64)
+        unmatched = 0
+
+    keys = hours[valid] * n_depts + codes[valid]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=passengers[valid], minlength=len(unique_keys))
+    return pd.Series(sums, index=unique_keys), int(valid.sum()), unmatched
+
+def aggregate_manifest(file, service_days, start_date=None, default_department=RECEPTION_DEPARTMENTS[0], chunk_rows=MANIFEST_CHUNK_ROWS):
+    """
+    تجميع ملف الوصول على دفعات إلى أعداد وصول بالساعة لكل إدارة استقبال خلال مدة الخدمة.
+    start_date: بداية مدة الخدمة (الافتراضي: أول يوم في الملف).
+    default_department: الإدارة المستخدمة إذا لم يحتوِ الملف عمود المنفذ.
+    تعيد قاموساً: arrivals (إدارة → مصفوفة بطول الأيام × 24)، وبداية المدة، وإحصاءات القراءة.
+    """
+    n_depts = len(RECEPTION_DEPARTMENTS)
+    if default_department not in RECEPTION_DEPARTMENTS:
+        raise ValueError(f"إدارة استقبال غير معروفة: {default_department}")
+
+    header = pd.read_csv(file, nrows=0, encoding='utf-8-sig')
+    mapping = _match_manifest_columns(header.columns)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    parts, rows, valid_rows, unmatched = [], 0, 0, 0
+    reader = pd.read_csv(
+        file, usecols=list(mapping.values()), chunksize=chunk_rows, encoding='utf-8-sig',
+        dtype={mapping[key]: 'string' for key in ('timestamp', 'department') if key in mapping},
+    )
+    for chunk in reader:
+        sums, chunk_valid, chunk_unmatched = _aggregate_chunk(chunk, mapping, RECEPTION_DEPARTMENTS.index(default_department))
+        parts.append(sums)
+        rows += len(chunk)
+        valid_rows += chunk_valid
+        unmatched += chunk_unmatched
+
+    totals = pd.concat(parts).groupby(level=0).sum() if parts else pd.Series(dtype=np.float64)
+    keys = totals.index.to_numpy(dtype=np.int64)
+    hours, codes = keys // n_depts, keys % n_depts
+
+    if start_date is not None:
+        start_hour = int(np.datetime64(pd.Timestamp(start_date).normalize(), 'h').astype(np.int64))
+    elif len(hours):
+        start_hour = int(hours.min()) - int(hours.min()) % 24 # بداية أول يوم في الملف
+    else:
+        start_hour = 0
+    n_hours = int(service_days) * 24
+    offset = hours - start_hour
+    inside = (offset >= 0) & (offset < n_hours)
+
+    arrivals = {}
+    for code, dept in enumerate(RECEPTION_DEPARTMENTS):
+        mask = inside & (codes == code)
+        if mask.any():
+            arrivals[dept] = np.bincount(offset[mask], weights=totals.to_numpy()[mask], minlength=n_hours)
+
+    return {
+        'arrivals': arrivals,
+        'start': pd.Timestamp(np.datetime64(start_hour, 'h')),
+        'rows': rows,
+        'valid_rows': valid_rows,
+        'unmatched_rows': unmatched,
+        'passengers': float(totals.to_numpy()[inside].sum()),
+        'outside_window': float(totals.to_numpy()[~inside].sum()),
+    }
+
+def manifest_summary(arrivals, start):
+    """ملخص لكل إدارة: إجمالي الوصول، المتوسط اليومي، وأعلى ساعة ووقتها."""
+    rows = []
+    for dept, hourly in arrivals.items():
+        peak = int(hourly.argmax())
+        rows.append({
+            "الإدارة": dept,
+            "إجمالي الوصول": int(hourly.sum()),
+            "المتوسط اليومي": int(round(hourly.sum() / (len(hourly) / 24))),
+            "أعلى ساعة": int(hourly.max()),
+            "وقت الذروة": start + pd.Timedelta(hours=peak),
+        })
+    return pd.DataFrame(rows).set_index("الإدارة") if rows else pd.DataFrame()
@@ -0,0 +1,114 @@
+"""
+قياس زمن مراحل التشغيل (Rerun Profiler)
+يسجل زمن كل مرحلة (الشريط الجانبي، عناصر الإدخال، الحساب، بناء الجداول، التصدير) في كل إعادة تشغيل،
+ويحسب p50/p95 على آخر التشغيلات، ويمكنه كتابة السجل إلى ملف JSON Lines للتحليل لاحقاً.
+عند تعطيله لا يُنفذ أي قياس (span يعيد سياقاً فارغاً مشتركاً).
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# التفعيل الافتراضي ومسار السجل من متغيرات البيئة
+PROFILE_ENABLED_DEFAULT = os.environ.get('PROFILE_RERUNS', '').lower() in ('1', 'true', 'yes')
+PROFILE_LOG_PATH = os.environ.get('PROFILE_LOG_PATH') or None
+PROFILE_WINDOW = int(os.environ.get('PROFILE_WINDOW', 200)) # عدد التشغيلات في الإحصاءات المتحركة
+
+PHASE_COLUMN = "المرحلة"
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class RerunProfiler:
+    """مسجل مراحل لكل جلسة: تشغيل واحد مفتوح في كل مرة، والمراحل خارج التشغيل (مثل التصدير) تُسجل منفردة."""
+
+    def __init__(self, enabled=PROFILE_ENABLED_DEFAULT, log_path=PROFILE_LOG_PATH, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.history = deque(maxlen=window)
+        self._current = None
+        self._lock = threading.Lock()
+
+    def start_rerun(self, page):
+        if self.enabled:
+            self._current = {'page': page, 'started': time.time(), 'spans': {}}
+
+    def span(self, name):
+        """سياق لقياس مرحلة باسم name (لا يفعل شيئاً عند التعطيل)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def _record(self, name, seconds):
+        with self._lock:
+            current = self._current
+            if current is not None:
+                current['spans'][name] = current['spans'].get(name, 0.0) + seconds
+                return
+        # مرحلة خارج أي تشغيل (مثل توليد الملف عند الضغط على زر التحميل)
+        self._append({'page': None, 'started': time.time(), 'spans': {name: seconds}})
+
+    def finish_rerun(self):
+        """إغلاق التشغيل الحالي وإضافته إلى السجل. تعيد سجل التشغيل."""
+        with self._lock:
+            current, self._current = self._current, None
+        if current is not None:
+            self._append(current)
+        return current
+
+    def _append(self, record):
+        record['spans'] = {name: round(seconds, 6) for name, seconds in record['spans'].items()}
+        with self._lock:
+            self.history.append(record)
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def last_rerun(self):
+        """آخر تشغيل كامل (يتجاهل المراحل المنفردة)."""
+        for record in reversed(self.history):
+            if record['page'] is not None:
+                return record
+        return None
+
+    def summary(self):
+        """جدول لكل مرحلة: زمن آخر تشغيل و p50 و p95 وعدد القياسات (بالمللي ثانية)."""
+        samples = {}
+        for record in self.history:
+            for name, seconds in record['spans'].items():
+                samples.setdefault(name, []).append(seconds * 1000)
+        if not samples:
+            return pd.DataFrame()
+        last = (self.last_rerun() or {'spans': {}})['spans']
+        rows = []
+        for name, values in samples.items():
+            p50, p95 = np.percentile(values, [50, 95])
+            rows.append({
+                PHASE_COLUMN: name,
+                "آخر تشغيل (ms)": last[name] * 1000 if name in last else np.nan,
+                "p50 (ms)": p50,
+                "p95 (ms)": p95,
+                "عدد القياسات": len(values),
+            })
+        return pd.DataFrame(rows).set_index(PHASE_COLUMN).round(2)
+
+    def to_jsonl(self):
+        """السجل الحالي بصيغة JSON Lines (للتحميل)."""
+        with self._lock:
+            return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self.history)
+
+    def clear(self):
+        with self._lock:
+            self.history.clear()
@@ -0,0 +1,113 @@
+"""
+نموذج الطوابير (Erlang-C)
+يحسب أقل عدد من نقاط الخدمة المتزامنة لتحقيق مستوى خدمة مستهدف (مثلاً 90% يُخدمون خلال N دقيقة)
+من معدل الوصول ومتوسط زمن الخدمة، لعدة أزواج دفعة واحدة باستخدام NumPy.
+
+الحساب مستقر عددياً: احتمال الانتظار يُشتق من صيغة Erlang-B التكرارية
+    B(0) = 1,  B(n) = A·B(n-1) / (n + A·B(n-1))
+    C(n) = n·B(n) / (n - A·(1 - B(n)))           (n > A)
+    مستوى الخدمة = 1 - C(n)·exp(-(n - A)·T / زمن الخدمة)
+دون حساب مضروبات أو قوى كبيرة.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_AGENTS = 1_000_000 # حماية من المدخلات غير المنطقية
+SOLVED_CACHE_SIZE = 100_000 # عدد الأزواج المحلولة المحفوظة في الذاكرة
+
+_SOLVED = OrderedDict()
+_SOLVED_LOCK = threading.Lock()
+
+def service_level(agents, arrival_rate, handle_time, target_wait):
+    """نسبة الطلبات المخدومة خلال target_wait (نفس وحدة زمن الخدمة) لعدد نقاط خدمة معين."""
+    agents = np.asarray(agents, dtype=np.int64)
+    load = np.asarray(arrival_rate, dtype=np.float64) * np.asarray(handle_time, dtype=np.float64)
+    agents, load, handle_time, target_wait = np.broadcast_arrays(agents, load, handle_time, target_wait)
+
+    blocking = np.ones(agents.shape)
+    for n in range(1, int(agents.max(initial=0)) + 1):
+        active = agents >= n
+        b = blocking[active]
+        a = load[active]
+        blocking[active] = a * b / (n + a * b)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        wait_prob = agents * blocking / (agents - load * (1 - blocking))
+        level = 1 - wait_prob * np.exp(-(agents - load) * target_wait / handle_time)
+    level = np.where(agents > load, level, 0.0)
+    return np.where(load == 0, 1.0, level)
+
+def _solve(load, handle_time, target_level, target_wait):
+    """أقل عدد نقاط خدمة لكل زوج (الأزواج مختلفة ولا تحتوي حملاً صفرياً)."""
+    result = np.zeros(load.shape, dtype=np.int64)
+    idx = np.arange(load.size)
+    blocking = np.ones(load.size)
+    n = 0
+    while idx.size:
+        n += 1
+        if n > MAX_AGENTS:
+            raise ValueError("عدد نقاط الخدمة المطلوب يتجاوز الحد المسموح؛ تحقق من مدخلات نموذج الطوابير.")
+        a = load[idx]
+        blocking = a * blocking / (n + a * blocking)
+        stable = n > a
+        if not stable.any():
+            continue
+        with np.errstate(over='ignore'):
+            wait_prob = n * blocking / (n - a * (1 - blocking))
+            level = 1 - wait_prob * np.exp(-(n - a) * target_wait[idx] / handle_time[idx])
+        done = stable & (level >= target_level[idx])
+        if done.any():
+            result[idx[done]] = n
+            keep = ~done
+            idx, blocking = idx[keep], blocking[keep]
+    return result
+
+def required_agents(arrival_rate, handle_time, target_level, target_wait):
+    """
+    أقل عدد نقاط خدمة متزامنة لتحقيق مستوى الخدمة المستهدف (مصفوفات قابلة للبث).
+    arrival_rate: طلبات لكل وحدة زمن، handle_time و target_wait: بنفس وحدة الزمن، target_level: بين 0 و 1.
+    الأزواج المكررة تُحل مرة واحدة، والأزواج المحلولة سابقاً تُقرأ من الذاكرة.
+    """
+    arrays = np.broadcast_arrays(
+        np.asarray(arrival_rate, dtype=np.float64), np.asarray(handle_time, dtype=np.float64),
+        np.asarray(target_level, dtype=np.float64), np.asarray(target_wait, dtype=np.float64),
+    )
+    shape = arrays[0].shape
+    rate, aht, level, wait = (arr.ravel() for arr in arrays)
+    if ((level <= 0) | (level >= 1)).any():
+        raise ValueError("مستوى الخدمة المستهدف يجب أن يكون بين 0% و 100% (غير شامل).")
+    if (rate < 0).any() or (aht <= 0).any() or (wait < 0).any():
+        raise ValueError("معدل الوصول وزمن الانتظار يجب ألا يكونا سالبين، وزمن الخدمة أكبر من صفر.")
+
+    load = rate * aht
+    agents = np.zeros(load.size, dtype=np.int64)
+    positive = load > 0
+    if not positive.any():
+        return agents.reshape(shape)
+
+    pairs = np.stack([load[positive], aht[positive], level[positive], wait[positive]], axis=1)
+    unique_pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+    keys = [tuple(row) for row in unique_pairs.tolist()]
+
+    solved = np.empty(len(keys), dtype=np.int64)
+    missing = []
+    with _SOLVED_LOCK:
+        for i, key in enumerate(keys):
+            value = _SOLVED.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                solved[i] = value
+                _SOLVED.move_to_end(key)
+    if missing:
+        todo = unique_pairs[missing]
+        solved[missing] = _solve(todo[:, 0], todo[:, 1], todo[:, 2], todo[:, 3])
+        with _SOLVED_LOCK:
+            for i in missing:
+                _SOLVED[keys[i]] = int(solved[i])
+            while len(_SOLVED) > SOLVED_CACHE_SIZE:
+                _SOLVED.popitem(last=False)
+
+    agents[positive] = solved[inverse.ravel()]
+    return agents.reshape(shape)
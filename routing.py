@@ -0,0 +1,229 @@
+"""
+مسارات المركبات من الإحداثيات (Coordinate-Aware Routing)
+يحسب مصفوفة أزمنة الرحلات بين المواقع والمستودعات من الإحداثيات دفعة واحدة (NumPy)، ويحفظها على القرص
+بمفتاح مجموعة المواقع حتى لا تُعاد بين التشغيلات، ثم يبني مسارات الوردية بخوارزمية التوفير (Clarke-Wright)
+مع تحسين محلي (2-opt)، ويحسب عدد المركبات بتوزيع رحلات اليوم على ساعات عمل المركبة.
+تغيير عدد الزيارات اليومية يعيد توزيع الرحلات فقط دون إعادة حساب المسافات أو المسارات.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache, stable_hash
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_ROUTING_SETTINGS = {
+    'speed_kmh': 30.0, # متوسط سرعة المركبة داخل المشاعر والمدن
+    'road_factor': 1.3, # نسبة طول الطريق الفعلي إلى المسافة المستقيمة
+}
+ROUTING_CACHE_DIR = os.environ.get('ROUTING_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.routing_cache')
+MAX_TWO_OPT_ROUNDS = 200
+
+# المسميات المقبولة لكل عمود (عربي/إنجليزي)
+SITE_COLUMN_ALIASES = {
+    'name': ["name", "site", "الاسم", "الموقع", "اسم الموقع"],
+    'lat': ["lat", "latitude", "خط العرض", "العرض"],
+    'lon': ["lon", "lng", "longitude", "خط الطول", "الطول"],
+    'kind': ["kind", "type", "النوع"],
+}
+DEPOT_VALUES = {"depot", "مستودع", "مقر", "مركز"}
+VIRTUAL_DEPOT = "مستودع افتراضي (وسط المواقع)"
+
+# المصفوفات والمسارات المحسوبة في هذه العملية (فوق ذاكرة القرص)
+MATRIX_CACHE = LRUCache(maxsize=16)
+ROUTES_CACHE = LRUCache(maxsize=64)
+
+def read_sites_file(file, file_name):
+    """قراءة ملف المواقع (CSV أو Excel): الاسم وخط العرض وخط الطول والنوع (موقع / مستودع)."""
+    if str(file_name).lower().endswith(('.xlsx', '.xls')):
+        try:
+            df = pd.read_excel(file)
+        except ImportError as e:
+            raise ValueError("قراءة ملفات Excel تتطلب تثبيت الحزمة openpyxl.") from e
+    else:
+        df = pd.read_csv(file, encoding='utf-8-sig')
+    normalized = {str(col).strip().lower(): col for col in df.columns}
+    mapping = {}
+    for field, aliases in SITE_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in normalized:
+                mapping[field] = normalized[alias.lower()]
+                break
+    missing = [field for field in ('lat', 'lon') if field not in mapping]
+    if missing:
+        raise ValueError(f"عمود مطلوب غير موجود في الملف: {' / '.join(SITE_COLUMN_ALIASES[missing[0]][:4])}")
+
+    sites = pd.DataFrame({
+        'name': df[mapping['name']].astype('string').str.strip() if 'name' in mapping else pd.Series([f"موقع {i + 1}" for i in range(len(df))], dtype='string'),
+        'lat': pd.to_numeric(df[mapping['lat']], errors='coerce'),
+        'lon': pd.to_numeric(df[mapping['lon']], errors='coerce'),
+        'depot': df[mapping['kind']].astype('string').str.strip().str.lower().isin(DEPOT_VALUES) if 'kind' in mapping else False,
+    })
+    valid = sites['lat'].between(-90, 90) & sites['lon'].between(-180, 180)
+    if not valid.all():
+        raise ValueError(f"إحداثيات غير صالحة في {int((~valid).sum())} صف (مثال: الصف {int(np.flatnonzero(~valid.to_numpy())[0]) + 2}).")
+    if not (~sites['depot']).any():
+        raise ValueError("الملف لا يحتوي أي موقع للخدمة (جميع الصفوف مستودعات).")
+    return sites.reset_index(drop=True)
+
+def _points(sites):
+    """المستودعات أولاً ثم المواقع؛ إذا لم يوجد مستودع يُستخدم وسط المواقع."""
+    depots = sites[sites['depot']]
+    if depots.empty:
+        depots = pd.DataFrame({'name': [VIRTUAL_DEPOT], 'lat': [sites['lat'].mean()], 'lon': [sites['lon'].mean()], 'depot': [True]})
+    points = pd.concat([depots, sites[~sites['depot']]], ignore_index=True)
+    return points, len(depots)
+
+def travel_time_matrix(lat, lon, speed_kmh, road_factor):
+    """مصفوفة أزمنة الرحلات (ساعة) بين جميع النقاط بمسافة الدائرة العظمى (haversine) دفعة واحدة."""
+    lat, lon = np.radians(lat)[:, None], np.radians(lon)[:, None]
+    a = np.sin((lat - lat.T) / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return distance_km * road_factor / speed_kmh
+
+def cached_travel_matrix(points, speed_kmh, road_factor, cache_dir=ROUTING_CACHE_DIR):
+    """مصفوفة أزمنة الرحلات من الذاكرة أو القرص أو تُحسب وتُحفظ (المفتاح: الإحداثيات والسرعة ومعامل الطريق)."""
+    key = stable_hash({
+        'points': np.round(points[['lat', 'lon']].to_numpy(), 6).tolist(),
+        'speed': speed_kmh,
+        'road_factor': road_factor,
+    })
+
+    def load_or_compute():
+        path = os.path.join(cache_dir, f"{key}.npy") if cache_dir else None
+        matrix = None
+        if path and os.path.exists(path):
+            try:
+                matrix = np.load(path)
+            except (OSError, ValueError):
+                matrix = None # ملف تالف يُعاد حسابه
+        if matrix is None or matrix.shape != (len(points), len(points)):
+            matrix = travel_time_matrix(points['lat'].to_numpy(), points['lon'].to_numpy(), speed_kmh, road_factor)
+            _save_matrix(path, matrix)
+        matrix.setflags(write=False)
+        return matrix
+
+    return key, MATRIX_CACHE.get_or_compute(key, load_or_compute)
+
+def _save_matrix(path, matrix):
+    """حفظ المصفوفة على القرص (اختياري؛ الأخطاء لا توقف الحساب)."""
+    if path:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # كتابة ذرية حتى لا تقرأ جلسة أخرى ملفاً ناقصاً
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.npy', delete=False) as f:
+                np.save(f, matrix)
+            os.replace(f.name, path)
+        except OSError:
+            pass
+
+def _route_time(route, depot, matrix, service_hr):
+    stops = [depot, *route, depot]
+    return float(matrix[stops[:-1], stops[1:]].sum()) + service_hr * len(route)
+
+def savings_routes(depot, stops, matrix, service_hr, max_route_hr):
+    """
+    خوارزمية التوفير (Clarke-Wright): تبدأ بمسار لكل موقع ثم تدمج المسارات حسب التوفير
+    s(i, j) = t(المستودع، i) + t(j، المستودع) - t(i، j) ما دام زمن المسار لا يتجاوز max_route_hr.
+    """
+    stops = np.asarray(stops)
+    if stops.size == 0:
+        return []
+    # التوفير لجميع الأزواج دفعة واحدة ثم ترتيبه تنازلياً
+    i_idx, j_idx = np.triu_indices(stops.size, k=1)
+    a, b = stops[i_idx], stops[j_idx]
+    savings = matrix[depot, a] + matrix[b, depot] - matrix[a, b]
+    order = np.argsort(-savings, kind='stable')
+    order = order[savings[order] > 0]
+
+    routes = {int(s): [int(s)] for s in stops}
+    route_of = {int(s): int(s) for s in stops}
+    duration = {int(s): float(matrix[depot, s] + matrix[s, depot]) + service_hr for s in stops}
+    for i, j, saving in zip(a[order].tolist(), b[order].tolist(), savings[order].tolist()):
+        ri, rj = route_of[i], route_of[j]
+        if ri == rj or duration[ri] + duration[rj] - saving > max_route_hr:
+            continue
+        left, right = routes[ri], routes[rj]
+        # الدمج ممكن فقط بين طرفي مسارين (i آخر الأول و j أول الثاني بعد العكس عند الحاجة)
+        if left[-1] != i:
+            if left[0] != i:
+                continue
+            left.reverse()
+        if right[0] != j:
+            if right[-1] != j:
+                continue
+            right.reverse()
+        left.extend(right)
+        for s in right:
+            route_of[s] = ri
+        duration[ri] += duration.pop(rj) - saving
+        del routes[rj]
+    return list(routes.values())
+
+def two_opt(route, depot, matrix):
+    """تحسين محلي 2-opt: عكس أفضل مقطع في كل جولة (التغير لجميع المقاطع محسوب دفعة واحدة)."""
+    route = list(route)
+    if len(route) < 3:
+        return route
+    for _ in range(MAX_TWO_OPT_ROUNDS):
+        tour = np.array([depot, *route, depot])
+        # عكس المقطع [i+1 .. j]: استبدال الحافتين (i, i+1) و (j, j+1) بـ (i, j) و (i+1, j+1)
+        i, j = np.triu_indices(len(tour) - 1, k=1)
+        delta = matrix[tour[i], tour[j]] + matrix[tour[i + 1], tour[j + 1]] - matrix[tour[i], tour[i + 1]] - matrix[tour[j], tour[j + 1]]
+        best = int(np.argmin(delta))
+        if delta[best] >= -1e-12:
+            break
+        start, stop = i[best] + 1, j[best] + 1
+        tour[start:stop] = tour[start:stop][::-1]
+        route = tour[1:-1].tolist()
+    return route
+
+def build_routes(sites, service_hr, max_route_hr, speed_kmh, road_factor, cache_dir=ROUTING_CACHE_DIR):
+    """
+    مسارات الوردية: كل موقع يُخدم من أقرب مستودع، ومسارات كل مستودع بالتوفير ثم 2-opt.
+    تعيد جدول المسارات (المستودع، المواقع، زمن الرحلات، زمن المسار).
+    """
+    if max_route_hr <= 0 or speed_kmh <= 0 or road_factor <= 0:
+        raise ValueError("ساعات العمل والسرعة ومعامل الطريق يجب أن تكون أكبر من صفر.")
+    points, n_depots = _points(sites)
+    matrix_key, matrix = cached_travel_matrix(points, speed_kmh, road_factor, cache_dir)
+
+    def compute():
+        names = points['name'].to_numpy()
+        site_idx = np.arange(n_depots, len(points))
+        nearest = matrix[site_idx][:, :n_depots].argmin(axis=1)
+        rows = []
+        for depot in range(n_depots):
+            for route in savings_routes(depot, site_idx[nearest == depot], matrix, service_hr, max_route_hr):
+                route = two_opt(route, depot, matrix)
+                total = _route_time(route, depot, matrix, service_hr)
+                rows.append({
+                    "المستودع": names[depot],
+                    "عدد المواقع": len(route),
+                    "المواقع": " ← ".join(str(names[s]) for s in route),
+                    "زمن الرحلات (ساعة)": round(total - service_hr * len(route), 3),
+                    "زمن المسار (ساعة)": round(total, 3),
+                })
+        routes = pd.DataFrame(rows)
+        routes.index = pd.RangeIndex(1, len(routes) + 1, name="المسار")
+        return routes
+
+    return ROUTES_CACHE.get_or_compute(stable_hash([matrix_key, service_hr, max_route_hr]), compute)
+
+def vehicles_for_routes(route_hours, visits_per_day, shift_hr):
+    """
+    عدد المركبات لتنفيذ كل مسار visits_per_day مرة يومياً ضمن ساعات عمل المركبة
+    (توزيع الرحلات على المركبات بطريقة الأول المناسب للأطول أولاً FFD).
+    """
+    trips = np.sort(np.repeat(np.asarray(route_hours, dtype=np.float64), int(visits_per_day)))[::-1]
+    remaining = []
+    for hours in trips.tolist():
+        for k, free in enumerate(remaining):
+            if free >= hours - 1e-9:
+                remaining[k] = free - hours
+                break
+        else:
+            remaining.append(shift_hr - hours)
+    return len(remaining)
@@ -0,0 +1,171 @@
+"""
+مخزن السيناريوهات (Scenario Store)
+حفظ السيناريوهات المسماة (المدخلات والنتائج) في قاعدة SQLite محلية مع فهارس على السيناريو والإدارة والدور،
+والبحث فيها، ومقارنة أي سيناريوهين لكل إدارة ودور باستعلام واحد دون إعادة حساب أي خطة.
+"""
+import json
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine import DEFAULT_SALARY, RESULT_COLUMN_ORDER, Center
+
+SCENARIO_DB_PATH = os.environ.get('SCENARIO_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios.db')
+RESULT_ROLES = RESULT_COLUMN_ORDER[1:] # الأدوار والمجموع الإجمالي بترتيب جدول النتائج
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    notes TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    total_staff INTEGER NOT NULL,
+    total_cost INTEGER NOT NULL,
+    inputs TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    department TEXT NOT NULL,
+    category TEXT NOT NULL,
+    role TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    salary INTEGER,
+    PRIMARY KEY (scenario_id, row, role)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_scenario_department_role ON results (scenario_id, department, role);
+CREATE INDEX IF NOT EXISTS results_department_role ON results (department, role);
+CREATE INDEX IF NOT EXISTS results_role ON results (role);
+"""
+
+def _json_default(value):
+    """تحويل المراكز ومصفوفات وأرقام NumPy في المدخلات (مثل ذروات الحافلات) إلى قيم JSON."""
+    if isinstance(value, Center):
+        return value.as_dict()
+    if isinstance(value, Mapping): # إعدادات الجلسة المبنية على القيم المشتركة
+        return dict(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"قيمة غير قابلة للحفظ: {type(value).__name__}")
+
+def connect(path=SCENARIO_DB_PATH):
+    """اتصال جديد بالقاعدة (اتصال لكل عملية قراءة/كتابة؛ وضع WAL يسمح بالقراءة أثناء الكتابة من جلسات أخرى)."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _result_rows(scenario_id, df, salaries):
+    """جدول النتائج بصيغة طويلة (صف × دور) جاهز للإدراج دفعة واحدة."""
+    roles = [role for role in RESULT_ROLES if role in df.columns]
+    counts = df[roles].fillna(0).to_numpy(dtype=np.int64)
+    n_rows = len(df)
+    salary = [salaries.get(role, DEFAULT_SALARY.get(role)) if role in DEFAULT_SALARY else None for role in roles]
+    return zip(
+        [scenario_id] * (n_rows * len(roles)),
+        np.repeat(np.arange(n_rows), len(roles)).tolist(),
+        np.repeat(df.index.to_numpy(dtype=object), len(roles)).tolist(),
+        np.repeat(df["القسم"].to_numpy(dtype=object), len(roles)).tolist(),
+        roles * n_rows,
+        counts.ravel().tolist(),
+        salary * n_rows,
+    )
+
+def save_scenario(name, plan, inputs, salaries=None, notes='', replace=False, path=SCENARIO_DB_PATH):
+    """
+    حفظ سيناريو باسم name: جدول نتائج الخطة الموحدة (plan['df']) والمدخلات (قاموس قابل للتحويل إلى JSON).
+    replace=True يستبدل السيناريو الموجود بنفس الاسم. تعيد معرف السيناريو.
+    """
+    name = str(name).strip()
+    if not name:
+        raise ValueError("اسم السيناريو مطلوب.")
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    with closing(connect(path)) as conn, conn:
+        existing = conn.execute("SELECT id FROM scenarios WHERE name = ?", (name,)).fetchone()
+        if existing and not replace:
+            raise ValueError(f"يوجد سيناريو محفوظ بالاسم «{name}».")
+        if existing:
+            conn.execute("DELETE FROM scenarios WHERE id = ?", existing)
+        cursor = conn.execute(
+            "INSERT INTO scenarios (name, notes, created_at, total_staff, total_cost, inputs) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                name, notes, datetime.now().isoformat(timespec='seconds'),
+                int(plan['total_staff_needed']), int(plan['total_project_cost']),
+                json.dumps(inputs, ensure_ascii=False, default=_json_default),
+            ),
+        )
+        scenario_id = cursor.lastrowid
+        conn.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", _result_rows(scenario_id, plan['df'], salaries))
+    return scenario_id
+
+def list_scenarios(search='', path=SCENARIO_DB_PATH):
+    """قائمة السيناريوهات (الأحدث أولاً)، مع تصفية اختيارية بالاسم أو الملاحظات."""
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT id, name AS 'السيناريو', notes AS 'ملاحظات', created_at AS 'تاريخ الحفظ', "
+            "total_staff AS 'إجمالي الموظفين', total_cost AS 'الميزانية (ريال)' FROM scenarios "
+            "WHERE name LIKE ?1 OR notes LIKE ?1 ORDER BY created_at DESC, id DESC",
+            conn, params=(f"%{search.strip()}%",), index_col='id'
+        )
+
+def load_inputs(scenario_id, path=SCENARIO_DB_PATH):
+    """مدخلات السيناريو المحفوظة (لإعادة تحميلها في الصفحة)."""
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT inputs FROM scenarios WHERE id = ?", (int(scenario_id),)).fetchone()
+    if row is None:
+        raise ValueError("السيناريو غير موجود.")
+    return json.loads(row[0])
+
+def load_results(scenario_id, path=SCENARIO_DB_PATH):
+    """جدول نتائج السيناريو بنفس شكل جدول الاحتياج الموحد."""
+    with closing(connect(path)) as conn:
+        long = pd.read_sql_query(
+            "SELECT row, department, category, role, count FROM results WHERE scenario_id = ? ORDER BY row",
+            conn, params=(int(scenario_id),)
+        )
+    df = long.pivot(index=['row', 'department', 'category'], columns='role', values='count')
+    df = df.reset_index(level=['row', 'category']).drop(columns='row').rename(columns={'category': "القسم"})
+    df.index.name = "الإدارة"
+    df.columns.name = None
+    return df[["القسم"] + [role for role in RESULT_ROLES if role in df.columns]]
+
+def delete_scenario(scenario_id, path=SCENARIO_DB_PATH):
+    with closing(connect(path)) as conn, conn:
+        conn.execute("DELETE FROM scenarios WHERE id = ?", (int(scenario_id),))
+
+def diff_scenarios(first_id, second_id, path=SCENARIO_DB_PATH):
+    """
+    مقارنة سيناريوهين لكل (إدارة، دور) في استعلام واحد على فهرس السيناريو:
+    العدد والتكلفة في كل سيناريو والفرق بينهما (الإدارات المكررة الاسم تُجمع).
+    """
+    first_id, second_id = int(first_id), int(second_id)
+    with closing(connect(path)) as conn:
+        diff = pd.read_sql_query(
+            """
+            SELECT department AS 'الإدارة', role AS 'الرتبة الوظيفية',
+                   SUM(CASE WHEN scenario_id = ?1 THEN count ELSE 0 END) AS count_a,
+                   SUM(CASE WHEN scenario_id = ?2 THEN count ELSE 0 END) AS count_b,
+                   SUM(CASE WHEN scenario_id = ?1 THEN count * salary ELSE 0 END) AS cost_a,
+                   SUM(CASE WHEN scenario_id = ?2 THEN count * salary ELSE 0 END) AS cost_b
+            FROM results
+            WHERE scenario_id IN (?1, ?2)
+            GROUP BY department, role
+            """,
+            conn, params=(first_id, second_id)
+        )
+    diff["فرق العدد"] = diff['count_b'] - diff['count_a']
+    diff["فرق التكلفة (ريال)"] = diff['cost_b'] - diff['cost_a']
+    diff = diff.rename(columns={
+        'count_a': "العدد (الأول)", 'count_b': "العدد (الثاني)",
+        'cost_a': "التكلفة (الأول)", 'cost_b': "التكلفة (الثاني)",
+    })
+    return diff.set_index(["الإدارة", "الرتبة الوظيفية"])
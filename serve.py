@@ -0,0 +1,25 @@
+"""
+تشغيل الخادم مع تجهيز مسبق (Warm Start)
+يبدأ تجهيز السيناريو الافتراضي (الخطة وملفا Excel) في الذاكرة المشتركة لحظة بدء العملية،
+ثم يشغل خادم Streamlit في نفس العملية فتجد أول الجلسات النتائج جاهزة.
+
+مثال:
+    python serve.py --server.port 8501
+
+الخيارات تُمرر كما هي إلى streamlit run. فحص الجاهزية دون تشغيل الخادم: python shared.py
+"""
+import os
+import sys
+
+from shared import warm_up
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+def main(argv=None):
+    warm_up()
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', APP_PATH, *(sys.argv[1:] if argv is None else argv)]
+    return cli.main()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+الموارد المشتركة للقراءة فقط (Shared Read-Only Resources)
+نسخة واحدة لكل عملية خادم من الإعدادات الافتراضية للإدارات ونتائج السيناريو الافتراضي وملفاته،
+غير قابلة للتعديل ومعها بصمة إصدار تتبع دليل الإدارات (تُبنى من جديد عند إعادة تحميله).
+الجلسات تحتفظ بالفروقات عن الإعدادات الافتراضية فقط.
+"""
+import threading
+import time
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+
+from budget import Budget
+from cache import EXPORT_CACHE, PLAN_CACHE, plan_cache_key, stable_hash
+from catalog import current_catalog
+from engine import (
+    DEFAULT_GLOBAL_PARAMS,
+    DEFAULT_HOSPITALITY_RATIO,
+    DEFAULT_SALARY,
+    compute_unified_plan,
+    default_department_settings,
+    default_inputs,
+)
+from exports import manpower_excel_key, plan_budget_excel_key, stream_budget_excel, stream_frame_excel
+
+def _freeze(value):
+    """نسخة غير قابلة للتعديل من القواميس والقوائم المتداخلة."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+# الإعدادات الافتراضية (لكل إدارة عدا مراكز الضيافة) وبصمتها لآخر إصدار من دليل الإدارات
+_defaults = None
+_defaults_lock = threading.Lock()
+
+def shared_defaults():
+    """
+    (الإعدادات الافتراضية المجمدة، بصمة الإصدار) للدليل الحالي. تُبنى مرة واحدة لكل إصدار من الدليل،
+    فالجلسات القائمة تبقى على إعداداتها الأساسية السابقة والجلسات الجديدة تأخذ الإصدار الجديد.
+    """
+    global _defaults
+    catalog = current_catalog()
+    defaults = _defaults
+    if defaults is not None and defaults[0] == catalog.version:
+        return defaults[1], defaults[2]
+    with _defaults_lock:
+        if _defaults is None or _defaults[0] != catalog.version:
+            settings = _freeze(default_department_settings(catalog))
+            version = stable_hash({
+                'catalog': catalog.version,
+                'settings': settings,
+                'params': DEFAULT_GLOBAL_PARAMS,
+                'salaries': DEFAULT_SALARY,
+                'hospitality_ratio': DEFAULT_HOSPITALITY_RATIO,
+            })[:12]
+            _defaults = (catalog.version, settings, version)
+        return _defaults[1], _defaults[2]
+
+def shared_version():
+    """بصمة إصدار البيانات المشتركة الحالية."""
+    return shared_defaults()[1]
+
+# -------------------------------------------------------------------
+# إعدادات الجلسة كفروقات فوق الإعدادات الافتراضية المشتركة
+# -------------------------------------------------------------------
+
+_DELETED = object() # علامة حذف مفتاح موجود في القيم الافتراضية
+
+def _same(a, b):
+    try:
+        return type(a) is type(b) and bool(a == b)
+    except ValueError: # مصفوفات NumPy
+        return False
+
+class DepartmentSettings(MutableMapping):
+    """إعدادات إدارة واحدة: القيم الافتراضية المشتركة مع فروقات الجلسة (الكتابة بنفس القيمة الافتراضية لا تُخزن)."""
+    __slots__ = ('_base', '_diff')
+
+    def __init__(self, base, diff):
+        self._base = base
+        self._diff = diff
+
+    def __getitem__(self, key):
+        value = self._diff.get(key, self._base.get(key, _DELETED))
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._base and _same(self._base[key], value):
+            self._diff.pop(key, None)
+        else:
+            self._diff[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in self._base:
+            self._diff[key] = _DELETED
+        else:
+            del self._diff[key]
+
+    def __iter__(self):
+        for key in self._base:
+            if self._diff.get(key) is not _DELETED:
+                yield key
+        for key in self._diff:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"DepartmentSettings({dict(self)})"
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+class SessionSettings(MutableMapping):
+    """
+    إعدادات الصفحة الموحدة للجلسة (نفس واجهة القاموس): إدارات الدليل تُقرأ من الإعدادات الافتراضية المشتركة
+    وتُخزن تعديلات الجلسة فقط، والمفاتيح الأخرى (مثل Hosp_Ratio_{id}) تُخزن كما هي.
+    """
+
+    def __init__(self, values=None, base=None):
+        self._base = shared_defaults()[0] if base is None else base
+        self._diffs = {}
+        self._extra = {}
+        if values:
+            self.update(values)
+
+    def __getitem__(self, key):
+        if key in self._base:
+            return DepartmentSettings(self._base[key], self._diffs.setdefault(key, {}))
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._base:
+            self._extra[key] = value
+            return
+        self._diffs[key] = {}
+        dept = self[key]
+        for name in self._base[key]:
+            if name not in value:
+                del dept[name]
+        for name, item in value.items():
+            dept[name] = item
+
+    def __delitem__(self, key):
+        if key in self._base:
+            raise KeyError(f"لا يمكن حذف إدارة من الإعدادات الافتراضية: {key}")
+        del self._extra[key]
+
+    def __iter__(self):
+        yield from self._base
+        yield from self._extra
+
+    def __len__(self):
+        return len(self._base) + len(self._extra)
+
+    def __repr__(self):
+        return f"SessionSettings({self.diffs()})"
+
+    def __reduce__(self):
+        return (SessionSettings, ({key: dict(value) if isinstance(value, Mapping) else value for key, value in self.items()},))
+
+    def diffs(self):
+        """تعديلات الجلسة فقط (الإدارات المعدلة ومفاتيحها، والمفاتيح الإضافية)."""
+        changed = {
+            name: {key: ('<محذوف>' if value is _DELETED else value) for key, value in diff.items()}
+            for name, diff in self._diffs.items() if diff
+        }
+        return {**changed, **self._extra}
+
+# -------------------------------------------------------------------
+# نتائج السيناريو الافتراضي وملفاته (تُحسب مرة واحدة لكل عملية)
+# -------------------------------------------------------------------
+
+_baseline = None
+_baseline_lock = threading.Lock()
+_warm_thread = None
+_status = {'seconds': None, 'error': None}
+
+def baseline():
+    """
+    السيناريو الافتراضي (نفس مدخلات الواجهة عند فتحها لأول مرة): الخطة وملفا Excel مثبتة في الذاكرة المشتركة
+    فلا تُخرج منها، وأي جلسة لم تعدل المدخلات تحصل عليها دون حساب.
+    عند إعادة تحميل دليل الإدارات يُحسب السيناريو للإصدار الجديد وتُلغى تثبيتات الإصدار السابق.
+    """
+    global _baseline
+    default_settings, version = shared_defaults()
+    current = _baseline
+    if current is not None and current['version'] == version:
+        return current
+    with _baseline_lock:
+        if _baseline is None or _baseline['version'] != version:
+            started = time.perf_counter()
+            global_params, _, centers, salaries = default_inputs()
+            plan = compute_unified_plan(global_params, default_settings, centers, salaries=salaries)
+            key = plan_cache_key(global_params, default_settings, centers)
+
+            # نفس مفاتيح ملفات التحميل في الصفحة الموحدة
+            df = plan['df']
+            manpower_df = df.reset_index()
+            service_days = global_params['service_days']
+            export_keys = (manpower_excel_key(manpower_df), plan_budget_excel_key(df, service_days, salaries))
+            if _baseline is not None:
+                PLAN_CACHE.unpin(_baseline['key'])
+                for export_key in _baseline['export_keys']:
+                    EXPORT_CACHE.unpin(export_key)
+            PLAN_CACHE.pin(key, plan)
+            EXPORT_CACHE.pin(export_keys[0], stream_frame_excel(manpower_df))
+            EXPORT_CACHE.pin(export_keys[1], stream_budget_excel(Budget.from_frame(df), service_days, salaries))
+            _baseline = MappingProxyType({
+                'version': version,
+                'key': key,
+                'export_keys': export_keys,
+                'plan': MappingProxyType(plan),
+                'global_params': MappingProxyType(global_params),
+                'salaries': MappingProxyType(salaries),
+            })
+            _status['seconds'] = round(time.perf_counter() - started, 3)
+            _status['error'] = None
+    return _baseline
+
+def _warm():
+    try:
+        baseline()
+    except Exception as e: # يبقى الخادم متاحاً، وأول جلسة تحتاج السيناريو تعيد المحاولة وتعرض الخطأ
+        _status['error'] = f"{type(e).__name__}: {e}"
+
+def warm_up(background=True):
+    """
+    تجهيز السيناريو الافتراضي عند بدء عملية الخادم (مرة واحدة؛ الاستدعاءات اللاحقة لا تفعل شيئاً).
+    في الخلفية لا يتأخر عرض الصفحة الأولى، والجلسات التي تطلبه قبل اكتماله تنتظر نفس الحساب بدلاً من تكراره.
+    """
+    global _warm_thread
+    with _baseline_lock:
+        if _baseline is not None or _warm_thread is not None:
+            return
+        _warm_thread = threading.Thread(target=_warm, name='baseline-warm-up', daemon=True)
+    if background:
+        _warm_thread.start()
+    else:
+        _warm_thread.run()
+
+def baseline_status():
+    """حالة الجاهزية: هل السيناريو الافتراضي جاهز، وزمن تجهيزه، وآخر خطأ."""
+    return {
+        'ready': _baseline is not None,
+        'version': shared_version(),
+        'seconds': _status['seconds'],
+        'error': _status['error'],
+    }
+
+def wait_until_ready(timeout=None):
+    """انتظار اكتمال التجهيز (للسكربتات وفحوص الجاهزية). تعيد True إذا كان السيناريو جاهزاً."""
+    thread = _warm_thread
+    if thread is not None and thread.ident is not None:
+        thread.join(timeout)
+    return _baseline is not None
+
+if __name__ == '__main__':
+    # فحص الجاهزية: python shared.py (رمز الخروج 0 عند نجاح تجهيز السيناريو الافتراضي)
+    warm_up(background=False)
+    status = baseline_status()
+    print(f"ready={status['ready']} version={status['version']} seconds={status['seconds']} error={status['error']}")
+    raise SystemExit(0 if status['ready'] else 1)
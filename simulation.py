@@ -0,0 +1,171 @@
+"""
+محاكاة عدم اليقين (Monte Carlo) لأعداد الحجاج
+تسحب قيم الحجاج المتواجدين والتدفق اليومي وعدد حجاج كل مركز ضيافة من توزيعات يحددها المستخدم،
+وتمرر السحبات دفعات (مصفوفات NumPy) عبر محرك التخطيط موزعة على أنوية المعالج.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from engine import (
+    DEFAULT_SALARY,
+    HOSPITALITY_TYPE,
+    TOTAL_COLUMN,
+    build_department_table,
+    compute_role_arrays,
+    group_hospitality,
+    hospitality_groups,
+    salary_vector,
+)
+
+# التوزيعات المتاحة (الانتشار نسبة من التقدير النقطي)
+DISTRIBUTIONS = {
+    'fixed': "ثابت (بدون عدم يقين)",
+    'normal': "طبيعي (الانتشار = معامل الاختلاف)",
+    'uniform': "منتظم (± الانتشار)",
+    'triangular': "مثلثي (± الانتشار، القمة عند التقدير)",
+}
+
+PERCENTILES = (50, 90, 99)
+DEFAULT_DRAWS = 100_000
+MAX_BATCH_CELLS = 2_000_000 # الحد الأعلى لخلايا (سحبة × إدارة × دور) في الدفعة الواحدة
+MIN_DRAWS_PER_TASK = 5_000
+MAX_TASKS = 256
+HEADCOUNT_LABEL = "عدد الموظفين"
+COST_LABEL = "التكلفة (ريال)"
+
+# مجمع العمليات يُنشأ مرة واحدة لكل عملية خادم ويعاد استخدامه بين التشغيلات (ومشترك مع محاكاة الأسطول)
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_EXECUTOR_LOCK = threading.Lock()
+
+def sample_counts(rng, spec, point, size):
+    """سحب أعداد صحيحة (≥ 1) حول التقدير النقطي حسب مواصفة التوزيع {'kind', 'spread'}."""
+    kind = spec.get('kind', 'fixed')
+    spread = spec.get('spread', 0)
+    point = np.asarray(point, dtype=np.float64)
+
+    if kind == 'fixed' or spread <= 0:
+        values = np.broadcast_to(point, size)
+    elif kind == 'normal':
+        values = rng.normal(point, spread * point, size)
+    elif kind == 'uniform':
+        values = rng.uniform(point * (1 - spread), point * (1 + spread), size)
+    elif kind == 'triangular':
+        values = rng.triangular(point * (1 - spread), point, point * (1 + spread), size)
+    else:
+        raise ValueError(f"توزيع غير معروف: {kind}")
+    return np.maximum(1, np.rint(values)).astype(np.int64)
+
+def _simulate_batch(task):
+    """تشغيل مجموعة سحبات في عملية مستقلة وإرجاع النتائج المجمعة لكل سحبة."""
+    table, params, specs, salary_values, seed, draws = task
+    rng = np.random.default_rng(seed)
+    hosp_mask = (table['type'] == HOSPITALITY_TYPE).to_numpy()
+    n_hosp, _ = hospitality_groups(table)
+    base_units = table['units'].to_numpy()
+    n_depts, n_roles = len(table), len(salary_values)
+    batch_size = max(1, MAX_BATCH_CELLS // max(1, n_depts * n_roles))
+
+    chunks = []
+    for start in range(0, draws, batch_size):
+        size = min(batch_size, draws - start)
+        batch_params = dict(params)
+        batch_params['num_hajjaj_present'] = sample_counts(rng, specs['num_hajjaj_present'], params['num_hajjaj_present'], (size, 1))
+        batch_params['num_hajjaj_flow'] = sample_counts(rng, specs['num_hajjaj_flow'], params['num_hajjaj_flow'], (size, 1))
+        units = np.broadcast_to(base_units, (size, n_depts)).copy()
+        units[:, hosp_mask] = sample_counts(rng, specs['hajjaj_count'], base_units[hosp_mask], (size, int(hosp_mask.sum())))
+
+        roles = compute_role_arrays(table, batch_params, {'units': units})
+        role_stack = np.stack(
+            [np.broadcast_to(roles[role], (size, n_depts)) for role in DEFAULT_SALARY], axis=-1
+        ) # (سحبة، إدارة، دور)
+        dept_cost = role_stack @ salary_values
+        chunks.append((
+            group_hospitality(np.broadcast_to(roles[TOTAL_COLUMN], (size, n_depts)), n_hosp).astype(np.int32),
+            group_hospitality(dept_cost, n_hosp).astype(np.int64),
+            role_stack.sum(axis=1).astype(np.int32),
+        ))
+    return tuple(np.concatenate(parts) for parts in zip(*chunks))
+
+def get_executor(workers):
+    """إرجاع مجمع العمليات المشترك (يُعاد إنشاؤه فقط عند تغيير عدد العمليات)."""
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_WORKERS != workers:
+            if _EXECUTOR is not None:
+                _EXECUTOR.shutdown(wait=False)
+            # spawn آمن مع خادم Streamlit متعدد الخيوط
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _EXECUTOR_WORKERS = workers
+        return _EXECUTOR
+
+def _percentile_table(values, index, label, scale=None):
+    """جدول المئينات P50/P90/P99 (تقريب لأعلى قيمة محاكاة لتكون النتائج أعداداً فعلية)."""
+    quantiles = np.percentile(values, PERCENTILES, axis=0, method='higher')
+    if scale is not None:
+        quantiles = quantiles * scale
+    return pd.DataFrame(
+        {f"{label} P{p}": q for p, q in zip(PERCENTILES, quantiles)},
+        index=index
+    )
+
+def run_monte_carlo(global_params, user_settings, centers, specs, draws=DEFAULT_DRAWS, salaries=None, workers=None, seed=None):
+    """
+    تشغيل محاكاة Monte Carlo وإرجاع مئينات عدد الموظفين والتكلفة لكل إدارة ولكل دور وللإجمالي.
+    specs: قاموس بمواصفة التوزيع لكل من num_hajjaj_present و num_hajjaj_flow و hajjaj_count.
+    """
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+    if draws < 1:
+        raise ValueError("يجب أن يكون عدد السحبات 1 على الأقل.")
+    specs = {key: specs.get(key, {'kind': 'fixed'}) for key in ('num_hajjaj_present', 'num_hajjaj_flow', 'hajjaj_count')}
+    for spec in specs.values():
+        if spec.get('kind', 'fixed') not in DISTRIBUTIONS:
+            raise ValueError(f"توزيع غير معروف: {spec.get('kind')}")
+
+    table = build_department_table(user_settings, centers)
+    salary_values = salary_vector(salaries).astype(np.int64)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    # تقسيم السحبات على المهام مع بذور مستقلة لكل مهمة
+    # (عدد المهام لا يعتمد على عدد العمليات حتى تتطابق النتائج لنفس البذرة)
+    n_tasks = max(1, min(MAX_TASKS, draws // MIN_DRAWS_PER_TASK))
+    sizes = [draws // n_tasks + (1 if i < draws % n_tasks else 0) for i in range(n_tasks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+    tasks = [(table, dict(global_params), specs, salary_values, s, n) for s, n in zip(seeds, sizes)]
+
+    if workers == 1 or n_tasks == 1:
+        parts = [_simulate_batch(task) for task in tasks]
+    else:
+        parts = list(get_executor(workers).map(_simulate_batch, tasks))
+    dept_headcount, dept_cost, role_counts = (np.concatenate(p) for p in zip(*parts))
+
+    _, dept_names = hospitality_groups(table)
+    dept_index = pd.Index(dept_names, name="الإدارة")
+    role_index = pd.Index(list(DEFAULT_SALARY), name="الرتبة الوظيفية")
+
+    by_department = pd.concat([
+        _percentile_table(dept_headcount, dept_index, HEADCOUNT_LABEL),
+        _percentile_table(dept_cost, dept_index, COST_LABEL),
+    ], axis=1)
+    # تكلفة الدور = العدد × المكافأة (ثابتة)، لذا تُشتق مئيناتها مباشرة من مئينات العدد
+    by_role = pd.concat([
+        _percentile_table(role_counts, role_index, HEADCOUNT_LABEL),
+        _percentile_table(role_counts, role_index, COST_LABEL, scale=salary_values),
+    ], axis=1)
+    totals = pd.concat([
+        _percentile_table(dept_headcount.sum(axis=1, dtype=np.int64)[:, None], pd.Index(["الإجمالي"]), HEADCOUNT_LABEL),
+        _percentile_table(dept_cost.sum(axis=1)[:, None], pd.Index(["الإجمالي"]), COST_LABEL),
+    ], axis=1)
+
+    return {
+        'draws': draws,
+        'by_department': by_department,
+        'by_role': by_role,
+        'totals': totals,
+    }
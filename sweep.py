@@ -0,0 +1,165 @@
+"""
+وضع مقارنة السيناريوهات (Scenario Sweep)
+يقيّم جميع تركيبات المعايير (الشبكة الديكارتية) في تمريرة متجهة واحدة عبر محرك التخطيط.
+"""
+import numpy as np
+import pandas as pd
+
+from engine import (
+    DEFAULT_GLOBAL_PARAMS,
+    DEFAULT_SALARY,
+    GLOBAL_PARAM_BOUNDS,
+    TOTAL_COLUMN,
+    build_department_table,
+    compute_role_arrays,
+    salary_vector,
+)
+
+# المعايير العامة القابلة للمقارنة مع مسمياتها في الواجهة
+SWEEP_PARAM_LABELS = {
+    'num_hajjaj_present': "عدد الحجاج المتواجدين",
+    'num_hajjaj_flow': "عدد الحجاج التدفق اليومي",
+    'service_days': "مدة الخدمة (يوم)",
+    'reserve_factor_input': "نسبة الاحتياط (%)",
+    'shifts_count': "عدد الورديات",
+}
+
+RATIO_PREFIX = "المعيار: " # بادئة أعمدة معيار النسبة لكل إدارة في جدول السيناريوهات
+SCENARIO_COLUMN = "السيناريو"
+ROLE_COLUMN = "الرتبة الوظيفية"
+COUNT_COLUMN = "العدد المطلوب"
+COST_COLUMN = "التكلفة الإجمالية (ريال)"
+TOTAL_STAFF_COLUMN = "إجمالي الموظفين (بالاحتياط)"
+TOTAL_COST_COLUMN = "قيمة الميزانية (ريال)"
+
+# الحد الأعلى لعدد الخلايا (سيناريو × إدارة × دور) لحماية ذاكرة الخادم
+MAX_SWEEP_CELLS = 50_000_000
+
+def parse_values(text, cast=int, unique=True):
+    """تحويل نص مثل '100, 200' أو '100:500:100' (بداية:نهاية:خطوة) إلى قائمة قيم (unique=False يحافظ على التكرار)."""
+    values = []
+    for part in str(text).replace('،', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            bounds = [cast(p.strip()) for p in part.split(':')]
+            if len(bounds) != 3 or bounds[2] <= 0:
+                raise ValueError(f"صيغة المدى غير صحيحة: {part} (المطلوب بداية:نهاية:خطوة)")
+            start, stop, step = bounds
+            values.extend(cast(v) for v in np.arange(start, stop + step / 2, step))
+        else:
+            values.append(cast(part))
+    if not unique:
+        return values
+    return list(dict.fromkeys(values)) # إزالة التكرار مع الحفاظ على الترتيب
+
+def _check_range(label, values, kind, low, high):
+    """التحقق من قيم مدى واحد (أعداد صحيحة عند kind=int، ضمن الحدود). يرفع ValueError."""
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iuf' or not np.isfinite(values).all():
+        raise ValueError(f"قيم «{label}» يجب أن تكون أرقاماً.")
+    if kind is int and not np.all(values == np.round(values)):
+        raise ValueError(f"قيم «{label}» يجب أن تكون أعداداً صحيحة.")
+    if (values < low).any() or (high is not None and (values > high).any()):
+        bounds = f"{low} إلى {high}" if high is not None else f"{low} على الأقل"
+        raise ValueError(f"قيم «{label}» يجب أن تكون من {bounds}.")
+
+def build_scenario_grid(base_params, param_ranges=None, ratio_ranges=None):
+    """بناء الشبكة الديكارتية لجميع التركيبات (صف لكل سيناريو). يرفع ValueError لقيم خارج حدود المعايير."""
+    param_ranges = param_ranges or {}
+    ratio_ranges = ratio_ranges or {}
+
+    unknown = set(param_ranges) - set(DEFAULT_GLOBAL_PARAMS)
+    if unknown:
+        raise ValueError(f"معايير غير معروفة: {', '.join(sorted(unknown))}")
+    for key, values in param_ranges.items():
+        if values:
+            _check_range(SWEEP_PARAM_LABELS.get(key, key), values, *GLOBAL_PARAM_BOUNDS[key])
+    for dept_name, values in ratio_ranges.items():
+        if values:
+            _check_range(RATIO_PREFIX + dept_name, values, int, 1, None)
+
+    axes = {}
+    for key, default in DEFAULT_GLOBAL_PARAMS.items():
+        values = param_ranges.get(key) or [base_params.get(key, default)]
+        axes[key] = np.asarray(values)
+    for dept_name, values in ratio_ranges.items():
+        if values:
+            axes[RATIO_PREFIX + dept_name] = np.asarray(values)
+
+    grids = np.meshgrid(*axes.values(), indexing='ij')
+    grid = pd.DataFrame({key: g.ravel() for key, g in zip(axes, grids)})
+    grid.index = pd.RangeIndex(1, len(grid) + 1, name=SCENARIO_COLUMN)
+    return grid
+
+def run_sweep(base_params, user_settings, centers, param_ranges=None, ratio_ranges=None, salaries=None):
+    """
+    تقييم جميع السيناريوهات دفعة واحدة.
+    تعيد قاموساً يحتوي جدول السيناريوهات (مع الإجماليات)، والجدول الطويل (سيناريو × إدارة × دور)، والملخص.
+    """
+    if salaries is None:
+        salaries = dict(DEFAULT_SALARY)
+
+    grid = build_scenario_grid(base_params, param_ranges, ratio_ranges)
+    table = build_department_table(user_settings, centers)
+    roles_order = list(DEFAULT_SALARY)
+    n_scenarios, n_depts, n_roles = len(grid), len(table), len(roles_order)
+
+    if n_scenarios * n_depts * n_roles > MAX_SWEEP_CELLS:
+        raise ValueError(
+            f"عدد التركيبات كبير جداً ({n_scenarios:,} سيناريو × {n_depts:,} إدارة). يرجى تقليل المديات."
+        )
+
+    # المعايير العامة كأعمدة (سيناريو × 1) لتُبث على جميع الإدارات
+    params = {key: grid[key].to_numpy()[:, None] for key in DEFAULT_GLOBAL_PARAMS}
+
+    # معيار النسبة لكل إدارة كمصفوفة (سيناريو × إدارة)
+    overrides = {}
+    ratio_columns = [col for col in grid.columns if col.startswith(RATIO_PREFIX)]
+    if ratio_columns:
+        ratio = np.repeat(table['ratio'].to_numpy()[None, :], n_scenarios, axis=0)
+        dept_names = table["الإدارة"].to_numpy()
+        for col in ratio_columns:
+            ratio[:, dept_names == col[len(RATIO_PREFIX):]] = grid[col].to_numpy()[:, None]
+        overrides['ratio'] = ratio
+
+    roles = compute_role_arrays(table, params, overrides)
+    shape = (n_scenarios, n_depts)
+    role_stack = np.stack([np.broadcast_to(roles[role], shape) for role in roles_order], axis=-1) # (S, D, R)
+    salaries = salary_vector(salaries)
+
+    # الإجماليات لكل سيناريو (الميزانية بدون احتياط كما في الصفحة الموحدة)
+    scenarios = grid.copy()
+    scenarios[TOTAL_STAFF_COLUMN] = np.broadcast_to(roles[TOTAL_COLUMN], shape).sum(axis=1)
+    scenarios[TOTAL_COST_COLUMN] = role_stack.sum(axis=1) @ salaries
+
+    # الجدول الطويل: صف لكل (سيناريو، إدارة، دور) مع استبعاد الأدوار الصفرية
+    counts = role_stack.ravel()
+    keep = counts > 0
+    long = pd.DataFrame({
+        SCENARIO_COLUMN: np.repeat(grid.index.to_numpy(), n_depts * n_roles)[keep],
+        "الإدارة": np.tile(np.repeat(table["الإدارة"].to_numpy(), n_roles), n_scenarios)[keep],
+        "القسم": np.tile(np.repeat(table["القسم"].to_numpy(), n_roles), n_scenarios)[keep],
+        ROLE_COLUMN: np.tile(np.asarray(roles_order, dtype=object), n_scenarios * n_depts)[keep],
+        COUNT_COLUMN: counts[keep],
+        COST_COLUMN: (role_stack * salaries).ravel()[keep],
+    })
+
+    return {
+        'scenarios': scenarios,
+        'long': long,
+        'summary': summarize_sweep(scenarios),
+    }
+
+def summarize_sweep(scenarios):
+    """ملخص أفضل وأسوأ السيناريوهات من حيث الميزانية وعدد الموظفين."""
+    picks = {
+        "الأقل تكلفة": scenarios[TOTAL_COST_COLUMN].idxmin(),
+        "الأعلى تكلفة": scenarios[TOTAL_COST_COLUMN].idxmax(),
+        "الأقل عدداً": scenarios[TOTAL_STAFF_COLUMN].idxmin(),
+        "الأعلى عدداً": scenarios[TOTAL_STAFF_COLUMN].idxmax(),
+    }
+    summary = scenarios.loc[list(picks.values())].reset_index()
+    summary.index = pd.Index(list(picks.keys()), name="البيان")
+    return summary
@@ -0,0 +1,185 @@
+"""
+الاحتياج على مدار الساعة (Hourly Demand Timeline)
+يحسب عدد مقدمي الخدمة المطلوب لكل ساعة ولكل إدارة طوال مدة الخدمة من منحنيات التواجد والتدفق
+(يومية أو بالساعة) كمصفوفات NumPy، ويعرض الذروة واحتياج كل وردية بدلاً من المتوسط.
+
+المنحنيات تُحوَّل إلى مستويات بالساعة بنفس وحدة المعايير العامة:
+- التواجد: عدد الحجاج المتواجدين في الساعة (مكافئ num_hajjaj_present).
+- التدفق: معدل يومي مكافئ للساعة = الوصول في الساعة × 24 (مكافئ num_hajjaj_flow).
+لذلك المنحنى الثابت يعطي نفس نتيجة الحساب الموحد في كل ساعة.
+"""
+import numpy as np
+import pandas as pd
+
+from engine import (
+    HOSPITALITY_TYPE,
+    build_department_table,
+    compute_role_arrays,
+    group_hospitality,
+    hospitality_groups,
+    plan_frame,
+)
+
+HOURS_PER_DAY = 24
+SERVICE_ROLE = "مقدم خدمة" # الدور المرتبط مباشرة بحجم الطلب
+MAX_TIMELINE_CELLS = 4_000_000 # الحد الأعلى لخلايا (ساعة × إدارة) في الدفعة الواحدة
+
+# أشكال توزيع جاهزة خلال اليوم (24 وزناً، تُطبَّع داخلياً)
+INTRADAY_PROFILES = {
+    'flat': np.ones(HOURS_PER_DAY),
+    # ذروتان: الصباح الباكر والمساء (نمط الرحلات الجوية والقطارات)
+    'two_peaks': np.array([2, 2, 3, 5, 8, 10, 9, 7, 5, 4, 3, 3, 3, 3, 4, 5, 7, 9, 10, 8, 6, 4, 3, 2], dtype=np.float64),
+    # ذروة واحدة منتصف النهار
+    'midday': np.array([1, 1, 1, 1, 2, 3, 4, 6, 8, 9, 10, 10, 10, 9, 8, 7, 6, 5, 4, 3, 2, 2, 1, 1], dtype=np.float64),
+}
+INTRADAY_PROFILE_LABELS = {
+    'flat': "ثابت خلال اليوم",
+    'two_peaks': "ذروتان (صباحاً ومساءً)",
+    'midday': "ذروة منتصف النهار",
+}
+
+def _normalized_profile(profile):
+    profile = np.asarray(INTRADAY_PROFILES[profile] if isinstance(profile, str) else profile, dtype=np.float64)
+    if profile.shape != (HOURS_PER_DAY,) or (profile < 0).any() or profile.sum() <= 0:
+        raise ValueError("شكل التوزيع اليومي يجب أن يكون 24 قيمة غير سالبة.")
+    return profile / profile.mean() # متوسط 1 حتى لا يتغير متوسط اليوم
+
+def present_levels(curve, days, profile='flat'):
+    """
+    مستوى التواجد لكل ساعة من منحنى يومي (عدد الأيام) أو بالساعة (الأيام × 24).
+    المنحنى اليومي يُوزَّع على ساعات اليوم حسب profile بنفس المتوسط اليومي.
+    """
+    curve = np.asarray(curve, dtype=np.float64)
+    if curve.shape == (days * HOURS_PER_DAY,):
+        return curve
+    if curve.shape == (days,):
+        return (curve[:, None] * _normalized_profile(profile)[None, :]).ravel()
+    raise ValueError(f"طول المنحنى ({curve.size}) يجب أن يساوي عدد الأيام ({days}) أو عدد الساعات ({days * HOURS_PER_DAY}).")
+
+def flow_levels(curve, days, profile='flat', hourly=None):
+    """
+    معدل التدفق اليومي المكافئ لكل ساعة.
+    المنحنى بالساعة يمثل أعداد الوصول في كل ساعة (× 24)، والمنحنى اليومي يمثل الوصول اليومي.
+    """
+    curve = np.asarray(curve, dtype=np.float64)
+    if curve.shape == (days * HOURS_PER_DAY,):
+        return curve * HOURS_PER_DAY
+    return present_levels(curve, days, profile)
+
+def _hourly_basic(table, params, present, flow, hosp_mask, mean_present, flow_override=None):
+    """عدد مقدمي الخدمة (ساعة × إدارة) مع تقسيم الساعات على دفعات لحماية الذاكرة."""
+    n_hours, n_depts = len(present), len(table)
+    base_units = table['units'].to_numpy()
+    batch = max(1, MAX_TIMELINE_CELLS // max(1, n_depts))
+    staff = np.empty((n_hours, n_depts), dtype=np.int32)
+    for start in range(0, n_hours, batch):
+        stop = min(n_hours, start + batch)
+        hour_params = dict(params)
+        hour_params['num_hajjaj_present'] = present[start:stop, None]
+        hour_params['num_hajjaj_flow'] = flow[start:stop, None]
+        # حجاج المراكز يتبعون منحنى التواجد العام (بنسبة الساعة إلى المتوسط)
+        units = np.broadcast_to(base_units.astype(np.float64), (stop - start, n_depts)).copy()
+        if hosp_mask.any():
+            units[:, hosp_mask] *= (present[start:stop] / mean_present)[:, None]
+        overrides = {'units': units}
+        if flow_override is not None:
+            overrides['flow_override'] = flow_override[start:stop]
+        roles = compute_role_arrays(table, hour_params, overrides)
+        staff[start:stop] = np.broadcast_to(roles[SERVICE_ROLE], (stop - start, n_depts))
+    return staff
+
+def _dept_flow_override(table, dept_flow_curves, days):
+    """تدفق بالساعة لكل إدارة لها منحنى خاص (مثل ملف الوصول)، و NaN لباقي الإدارات (ساعة × إدارة)."""
+    n_hours = days * HOURS_PER_DAY
+    flow_override = np.broadcast_to(table['flow_override'].to_numpy(), (n_hours, len(table))).copy()
+    fixed_names = table["الإدارة"].where(table['type'] != HOSPITALITY_TYPE).to_numpy()
+    for dept, curve in dept_flow_curves.items():
+        columns = np.flatnonzero(fixed_names == dept)
+        if len(columns):
+            flow_override[:, columns] = flow_levels(curve, days)[:, None]
+    return flow_override
+
+def demand_timeline(global_params, user_settings, centers, present_curve=None, flow_curve=None,
+                    present_profile='flat', flow_profile='flat', dept_flow_curves=None):
+    """
+    الاحتياج بالساعة لجميع الإدارات طوال مدة الخدمة.
+    المنحنى غير المحدد يُعتبر ثابتاً عند قيمة المعيار العام (num_hajjaj_present / num_hajjaj_flow).
+    dept_flow_curves: منحنيات وصول بالساعة لإدارات محددة {اسم الإدارة: مصفوفة} تحل محل منحنى التدفق العام لها.
+    تعيد قاموساً يحتوي مصفوفة الساعات × الإدارات (مع تجميع مراكز الضيافة)، وجداول الذروة والورديات،
+    وخطة الهيكل الكامل عند ذروة كل إدارة.
+    """
+    days = int(global_params['service_days'])
+    shifts = int(global_params['shifts_count'])
+    if days < 1 or shifts < 1:
+        raise ValueError("مدة الخدمة وعدد الورديات يجب أن تكون 1 على الأقل.")
+    n_hours = days * HOURS_PER_DAY
+
+    if present_curve is None:
+        present = np.full(n_hours, float(global_params['num_hajjaj_present']))
+    else:
+        present = present_levels(present_curve, days, present_profile)
+    if flow_curve is None:
+        flow = np.full(n_hours, float(global_params['num_hajjaj_flow']))
+    else:
+        flow = flow_levels(flow_curve, days, flow_profile)
+    mean_present = present.mean() if present.mean() > 0 else 1.0
+
+    table = build_department_table(user_settings, centers)
+    hosp_mask = (table['type'] == HOSPITALITY_TYPE).to_numpy()
+    n_hosp, dept_names = hospitality_groups(table)
+
+    flow_override = _dept_flow_override(table, dept_flow_curves, days) if dept_flow_curves else None
+    staff = _hourly_basic(table, global_params, present, flow, hosp_mask, mean_present, flow_override)
+    grouped = group_hospitality(staff.astype(np.int64), n_hosp) # (ساعة × إدارة) مع المراكز كصف واحد
+
+    # الاحتياج المتوسط (الحساب الموحد الحالي) للمقارنة
+    average_roles = compute_role_arrays(table, global_params)
+    average = group_hospitality(np.asarray(average_roles[SERVICE_ROLE], dtype=np.int64), n_hosp)
+
+    peak_hour = grouped.argmax(axis=0)
+    peak = grouped.max(axis=0)
+    categories = ["الضيافة"] * (1 if n_hosp else 0) + list(table["القسم"].iloc[n_hosp:])
+    dept_index = pd.Index(dept_names, name="الإدارة")
+    peak_table = pd.DataFrame({
+        "القسم": categories,
+        "الاحتياج المتوسط": average,
+        "احتياج الذروة": peak,
+        "يوم الذروة": peak_hour // HOURS_PER_DAY + 1,
+        "ساعة الذروة": peak_hour % HOURS_PER_DAY,
+        "الفرق عن المتوسط": peak - average,
+    }, index=dept_index)
+
+    # احتياج كل وردية: أعلى ساعة داخل الوردية (الوردية = 24 / عدد الورديات ساعة)
+    shift_of_hour = (np.arange(HOURS_PER_DAY) * shifts) // HOURS_PER_DAY
+    shift_index = (np.arange(days)[:, None] * shifts + shift_of_hour[None, :]).ravel()
+    shift_staff = np.zeros((days * shifts, grouped.shape[1]), dtype=np.int64)
+    np.maximum.at(shift_staff, shift_index, grouped)
+    shift_table = pd.DataFrame(
+        shift_staff.reshape(days, shifts, -1).max(axis=0).T,
+        index=dept_index,
+        columns=[f"الوردية {s + 1}" for s in range(shifts)]
+    )
+
+    # الهيكل الكامل (قيادات + احتياط) عند ساعة ذروة كل إدارة
+    dept_peak_hour = staff.argmax(axis=0)
+    peak_params = dict(global_params)
+    peak_params['num_hajjaj_present'] = present[dept_peak_hour]
+    peak_params['num_hajjaj_flow'] = flow[dept_peak_hour]
+    peak_units = table['units'].to_numpy().astype(np.float64)
+    peak_units[hosp_mask] *= present[dept_peak_hour[hosp_mask]] / mean_present
+    peak_overrides = {'units': peak_units}
+    if flow_override is not None:
+        peak_overrides['flow_override'] = flow_override[dept_peak_hour, np.arange(len(table))]
+    peak_plan = plan_frame(table, compute_role_arrays(table, peak_params, peak_overrides))
+
+    return {
+        'hours': np.arange(n_hours),
+        'departments': dept_names,
+        'present': present,
+        'flow': flow,
+        'staff': grouped,
+        'peak': peak_table,
+        'per_shift': shift_table,
+        'shift_staff': shift_staff,
+        'peak_plan': peak_plan,
+    }